@@ -1,18 +1,39 @@
 import os
 import sys
 import json
-import time
+import asyncio
 
 from time import perf_counter
 from atexit import register
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    wait,
+)
 
 from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.blockchain.providers import create_web3
+from src.hopbridge.blockchain.read_cache import read_cache
+from src.hopbridge.blockchain.scheduler import (
+    BlockWatcher,
+    FixedRateTimer,
+)
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.route_scheduler import RouteScheduler
+from src.hopbridge.common.dispatcher import dispatcher
 from src.hopbridge.common.exceptions import exit_handler
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.evm_scanner.async_engine import AsyncQuoteEngine
+from src.hopbridge.evm_scanner.route_matrix import RouteMatrix
 from src.hopbridge.evm_scanner.helpers import (
     check_arb,
+    check_arbs_batch,
+    check_arbs_multicall,
+    check_arbs_local,
+    group_by_network,
     print_start_message,
+    print_best_routes,
 )
 from src.hopbridge.variables import (
     time_format,
@@ -30,9 +51,23 @@ register(exit_handler, program_name)
 
 info = json.loads(sys.argv[-1])
 sleep_time = info['settings']['sleep_time']
+quote_mode = info['settings'].get('quote_mode', "single")
+block_driven = info['settings'].get('block_driven', False)
+poll_interval = info['settings'].get('poll_interval', 1)
+alert_settings = info['settings'].get('alerts', {})
+failover = info['settings'].get('failover', False)
+hedge = info['settings'].get('hedge', False)
+route_budget = info['settings'].get('route_budget', 0)
+max_staleness = info['settings'].get('max_staleness', 60)
+bonder_fee_bps = info['settings'].get('bonder_fee_bps', {})
+relayer_fee = info['settings'].get('relayer_fee', {})
 network_data = info['network_data'].values()
 
-evm_args = [[item['network'], item['address'], ankr_endpoints[item['network'].lower()]]
+# Other quote modes quote every swap amount, they would silently ignore a search range
+if quote_mode not in ("single", "local") and any(item.get('search_range') for item in network_data):
+    sys.exit(f"'search_range' is only supported in the 'single' and 'local' quote modes, not '{quote_mode}'\n")
+
+evm_args = [[item['network'], item['address'], ankr_endpoints[item['network'].lower()], failover, hedge]
             for item in network_data]
 
 # Create a contract instance only once and then query multiple times
@@ -40,21 +75,143 @@ with ThreadPoolExecutor(max_workers=len(evm_args)) as pool:
     results = pool.map(lambda p: EvmContract(*p), evm_args, timeout=10)
 bridge_contracts = list(results)
 
-arb_args = [[contract, tuple(arg['swap_amount']), arg['decimals'], arg['coin'], arg['min_arb']]
+arb_args = [[contract, tuple(arg['swap_amount']), arg['decimals'], arg['coin'], arg['min_arb'],
+             tuple(arg.get('search_range', ()))]
             for contract, arg in zip(bridge_contracts, network_data)]
 
-print(f"{timestamp} - Started screening:\n")
+# All routes of a network are quoted in one batch request or one multicall
+multicalls = {endpoint: Multicall(endpoint, w3=create_web3(routes[0][0].name, endpoint, failover, hedge))
+              for endpoint, routes in group_by_network(arb_args).items()}
+
+# Quote modes whose reads are pinned to the head block learned by the watcher, through the read cache
+pinned_reads = quote_mode in ("single", "async")
+
+# Re-quote a network only when its head block moves, or every sleep_time secs if its node is unreachable
+watcher = BlockWatcher({contract.name: contract.web3_endpoint for contract in bridge_contracts},
+                       fallback_interval=sleep_time)
+timer = FixedRateTimer(poll_interval if block_driven else sleep_time)
+
+# Alert each opportunity when it opens, changes or closes, one digest message per loop
+tracker = AlertTracker(**alert_settings)
+
+# Quote only the most promising routes each loop, and every route at least every max_staleness secs
+scheduler = RouteScheduler([arg[4] for arg in arb_args], route_budget, max_staleness) if route_budget else None
+route_index = {id(arg): i for i, arg in enumerate(arb_args)}
+
+# Network quote functions, each quotes all routes of one network
+network_checks = {
+    "batch": lambda routes: check_arbs_batch(routes, tracker),
+    "multicall": lambda routes: check_arbs_multicall(routes, multicalls[routes[0][0].web3_endpoint], tracker),
+    "local": lambda routes: check_arbs_local(routes, multicalls[routes[0][0].web3_endpoint], tracker),
+}
+
+# Worker threads and the event loop are created once and reused by every loop
+pool = ThreadPoolExecutor(max_workers=len(arb_args))
+event_loop = asyncio.new_event_loop()
+
+# Network or route -> its last quote, a quote still running past the loop's timeout is not submitted again,
+# so two loops never share a network's Multicall
+in_flight = {}
+
+# Stale cached ABIs are re-fetched once at start, within the explorer's rate limit
+event_loop.run_until_complete(asyncio.gather(*[contract.refresh_abi() for contract in bridge_contracts]))
+
+if quote_mode == "async":
+    engine = AsyncQuoteEngine({contract.name: contract.web3_endpoint for contract in bridge_contracts},
+                              tracker=tracker)
+    event_loop.run_until_complete(engine.connect())
+    register(lambda: event_loop.run_until_complete(engine.close()))
+
+# Every source x destination route of each token, quoted from one snapshot of all pools
+if quote_mode == "matrix":
+    route_matrix = RouteMatrix(arb_args, multicalls, bonder_fee_bps, relayer_fee)
+
+print(f"{timestamp} - Started screening in '{quote_mode}' quote mode:\n")
 print_start_message(arb_args)
 
 loop_counter = 1
 while True:
     start = perf_counter()
 
-    with ThreadPoolExecutor(max_workers=len(arb_args)) as pool:
-        results = pool.map(lambda p: check_arb(*p), arb_args, timeout=10)
+    # One head poll per chain each loop, the reads of the loop are pinned to it. Not needed otherwise.
+    moved = watcher.poll() if block_driven or pinned_reads else set()
+    if block_driven:
+        loop_args = [arg for arg in arb_args if arg[0].name in moved]
+    else:
+        loop_args = arb_args
+
+    # The matrix always quotes every route, so it only needs to know that a pool may have changed
+    if quote_mode == "matrix":
+        if loop_args:
+            best_routes = route_matrix.check_arbs(tracker)
+            tracker.flush()
+
+            timestamp = datetime.now().astimezone().strftime(time_format)
+            print(f"{timestamp} - Loop {loop_counter} executed in {(perf_counter() - start):,.2f} secs.")
+            if loop_counter % 100 == 1:
+                print_best_routes(best_routes)
+            if loop_counter % 100 == 0:
+                print(f"{timestamp} - {dispatcher.summary()}")
+            loop_counter += 1
+
+        timer.wait()
+        continue
+
+    if scheduler is not None:
+        selected = set(scheduler.select())
+        loop_args = [arg for arg in loop_args if route_index[id(arg)] in selected]
+
+    if not loop_args:
+        timer.wait()
+        continue
+
+    # (route, highest arbitrage) of every route quoted this loop
+    quoted = []
+    if quote_mode == "async":
+        quoted = list(zip(loop_args, event_loop.run_until_complete(engine.check_arbs(loop_args))))
+    elif quote_mode in network_checks:
+        futures = {}
+        for endpoint, routes in group_by_network(loop_args).items():
+            if endpoint in in_flight and not in_flight[endpoint].done():
+                log_error.warning(f"'HopContract' - {routes[0][0].name} still quoting the previous loop, skipped")
+                continue
 
-    time.sleep(sleep_time)
+            in_flight[endpoint] = pool.submit(network_checks[quote_mode], routes)
+            futures[in_flight[endpoint]] = routes
+
+        wait(futures, timeout=10)
+        for future, routes in futures.items():
+            arbs = future.result() if future.done() and future.exception() is None else [None] * len(routes)
+            quoted += zip(routes, arbs)
+    else:
+        futures = {}
+        for arg in loop_args:
+            if id(arg) in in_flight and not in_flight[id(arg)].done():
+                log_error.warning(f"'HopContract' - {arg[3]} on {arg[0].name} still quoting the previous loop, "
+                                  f"skipped")
+                continue
+
+            in_flight[id(arg)] = pool.submit(check_arb, *arg, tracker=tracker)
+            futures[in_flight[id(arg)]] = arg
+
+        wait(futures, timeout=10)
+        quoted = [(arg, future.result() if future.done() and future.exception() is None else None)
+                  for future, arg in futures.items()]
+
+    if scheduler is not None:
+        for route, arbitrage in quoted:
+            scheduler.record(route_index[id(route)], arbitrage)
+
+    tracker.flush()
 
     timestamp = datetime.now().astimezone().strftime(time_format)
     print(f"{timestamp} - Loop {loop_counter} executed in {(perf_counter() - start):,.2f} secs.")
+    if loop_counter % 100 == 0:
+        print(f"{timestamp} - {dispatcher.summary()}")
+    if loop_counter % 100 == 0 and pinned_reads:
+        metrics = read_cache.metrics()
+        print(f"{timestamp} - Read cache: {metrics['hits']:,} hits, {metrics['misses']:,} misses "
+              f"({metrics['hit_rate']:.1%}), {metrics['size']:,} entries.")
     loop_counter += 1
+
+    timer.wait()
@@ -3,7 +3,6 @@ import sys
 import json
 import asyncio
 
-from copy import deepcopy
 from atexit import register
 from datetime import datetime
 from time import (
@@ -14,22 +13,48 @@ from concurrent.futures import ThreadPoolExecutor
 
 from src.hopbridge.blockchain.interface import args
 from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.cursor import TxnCursor
+from src.hopbridge.blockchain.seen import SeenTxns
+from src.hopbridge.blockchain.records import (
+    TxnRecord,
+    Erc20TxnRecord,
+)
+from src.hopbridge.blockchain.explorer_scheduler import explorer_scheduler
+from src.hopbridge.blockchain.logs import LogScanner
+from src.hopbridge.blockchain.subscriptions import (
+    SubscriptionEngine,
+    poll_scanners,
+)
+from src.hopbridge.blockchain.scheduler import (
+    BlockWatcher,
+    FixedRateTimer,
+    AdaptivePoller,
+)
 from src.hopbridge.blockchain.helpers import (
     print_start_message,
+    print_poll_report,
     gather_funcs,
 )
 from src.hopbridge.common.message import telegram_send_message
+from src.hopbridge.common.dispatcher import dispatcher
 from src.hopbridge.common.exceptions import exit_handler
-from src.hopbridge.variables import time_format
+from src.hopbridge.variables import (
+    time_format,
+    ankr_endpoints,
+    ws_endpoints,
+)
 
 
 if len(sys.argv) != 3:
     sys.exit(f"Usage: python3 {os.path.basename(__file__)} <mode> contracts.json\n")
 
-# Send telegram debug message if program terminates
+# One event loop for the whole run, so explorer sessions stay open between polls
+event_loop = asyncio.new_event_loop()
+
+# Send telegram debug message and close explorer sessions if program terminates
 timestamp = datetime.now().astimezone().strftime(time_format)
 program_name = os.path.abspath(os.path.basename(__file__))
-register(exit_handler, program_name)
+register(exit_handler, program_name, on_exit=lambda: event_loop.run_until_complete(EvmContract.close_sessions()))
 
 # Fetch variables
 info = json.loads(sys.argv[-1])
@@ -37,6 +62,26 @@ contr_addresses = [contr for contr in info['contracts'].values()]
 
 filter_by = tuple(info['settings']['filter_by'])
 sleep_time = info['settings']['sleep_time']
+block_driven = info['settings'].get('block_driven', False)
+poll_interval = info['settings'].get('poll_interval', 1)
+rescan_blocks = info['settings'].get('rescan_blocks', 2)
+seen_size = info['settings'].get('seen_size', 10000)
+bloom_capacity = info['settings'].get('bloom_capacity', 0)
+adaptive = info['settings'].get('adaptive', False)
+min_poll = info['settings'].get('min_poll', 2)
+max_latency = info['settings'].get('max_latency', 300)
+
+# Records only keep the fields the scanners use, a filter on any other field would never match
+record_fields = TxnRecord.FIELDS if args.transactions else Erc20TxnRecord.FIELDS
+if len(filter_by) == 2 and filter_by[0] not in record_fields:
+    sys.exit(f"Can not filter by '{filter_by[0]}', choose from: {', '.join(record_fields)}\n")
+
+# Records hold lowercase addresses, the filter value is compared as is from here on
+if len(filter_by) == 2:
+    filter_by = (filter_by[0], str(filter_by[1]).lower())
+
+# Explorer calls per sec allowed per explorer and API key
+explorer_scheduler.configure(rate=info['settings'].get('explorer_rate', 5))
 
 print(f"{timestamp} - Started screening:\n")
 print_start_message(contr_addresses)
@@ -48,6 +93,14 @@ with ThreadPoolExecutor(max_workers=len(contr_addresses)) as pool:
     results = pool.map(lambda p: EvmContract(*p), arguments, timeout=20)
 
 evm_contracts = list(results)
+
+# Each poll only fetches blocks after the last one seen
+for contract in evm_contracts:
+    contract.cursor = TxnCursor(rescan_blocks=rescan_blocks)
+
+# Stale cached ABIs are re-fetched between polls, behind every transaction poll
+abi_refreshes = [event_loop.create_task(contract.refresh_abi()) for contract in evm_contracts]
+
 contract_instances = [contract for contract in evm_contracts if contract.contract]
 print(f"Initialised {len(contract_instances)}/{len(contr_addresses)} contract instances."
       f"Look at log files for more details.")
@@ -65,40 +118,114 @@ elif args.erc20tokentxns:
     txn_args = [[contr['token_address'], 100, filter_by] for contr in contr_addresses]
     txn_funcs = [contract.get_last_erc20_txns for contract in evm_contracts]
 
+elif args.logs or args.websocket:
+    print(f"Screening for 'Erc20 Token Txns' in node logs and filtering by {filter_by}:")
+
+    scanners = [LogScanner(contr['network'], ankr_endpoints[contr['network'].lower()], contr['token_address'],
+                           contr['contract_address'], contr['token'], contr['decimals'], rescan_blocks=rescan_blocks)
+                for contr in contr_addresses]
+
+    txn_args = [[filter_by] for _ in contr_addresses]
+    txn_funcs = [scanner.get_new_txns for scanner in scanners]
+
 else:
     sys.exit()
 
 telegram_send_message(f"✅ HOP_ETHERSCAN has started.")
 
-old_txns = asyncio.run(gather_funcs(txn_funcs, txn_args))
+# Poll busy contracts often and quiet ones rarely, expected detection latency is half the interval
+poller = AdaptivePoller(len(contr_addresses), min_interval=min_poll,
+                        max_interval=[2 * item.get('max_latency', max_latency) for item in contr_addresses])
+
+# Mark the latest txns of every contract as seen, and estimate how often each contract is used from them
+seen_txns = [SeenTxns(max_size=seen_size, bloom_capacity=bloom_capacity) for _ in contr_addresses]
+for i, txns in enumerate(event_loop.run_until_complete(gather_funcs(txn_funcs, txn_args))):
+    seen_txns[i].filter_new(txns)
+    poller.seed(i, txns)
+
+if adaptive:
+    print_poll_report(contr_addresses, poller.report())
+
+if args.websocket:
+    def alert_new_txns(index: int, txns: list) -> None:
+        """Alerts the pushed or backfilled txns of a contract not seen before."""
+
+        if len(filter_by) == 2:
+            txns = [txn for txn in txns if txn[filter_by[0]] == filter_by[1]]
+
+        found_txns = seen_txns[index].filter_new(txns)
+        if found_txns:
+            evm_contracts[index].alert_erc20_txns(txns=found_txns, min_txn_amount=contr_addresses[index]['min_amount'])
+
+    # One engine per network, networks with no WebSocket endpoint are polled every sleep_time secs
+    endpoints = {**ws_endpoints, **info['settings'].get('ws_endpoints', {})}
+    network_scanners = {}
+    for i, scanner in enumerate(scanners):
+        network_scanners.setdefault(scanner.network, []).append((i, scanner))
+
+    tasks = []
+    for network, indexed_scanners in network_scanners.items():
+        if endpoints.get(network):
+            tasks.append(SubscriptionEngine(network, endpoints[network], indexed_scanners, alert_new_txns).run())
+        else:
+            print(f"No WebSocket endpoint for {network}, polling every {sleep_time} secs.")
+            tasks.append(poll_scanners(indexed_scanners, alert_new_txns, sleep_time))
+
+    async def run_subscriptions() -> None:
+        await asyncio.gather(*tasks)
+
+    event_loop.run_until_complete(run_subscriptions())
+
+# Poll a contract only when its network's head block moves, or every sleep_time secs if its node is unreachable
+watcher = BlockWatcher({item['network']: ankr_endpoints[item['network'].lower()] for item in contr_addresses},
+                       fallback_interval=sleep_time)
+timer = FixedRateTimer(poll_interval if block_driven else sleep_time)
 
 loop_counter = 1
 while True:
     # Wait for new transactions to appear
+    if adaptive:
+        sleep(max(poller.wait_time(), poll_interval if block_driven else 0))
+    else:
+        timer.wait()
     start = perf_counter()
-    sleep(sleep_time)
 
-    new_txns = asyncio.run(gather_funcs(txn_funcs, txn_args))
+    if block_driven:
+        moved = watcher.poll()
+        indices = [i for i, item in enumerate(contr_addresses) if item['network'].lower() in moved]
+    else:
+        indices = list(range(len(contr_addresses)))
+
+    if adaptive:
+        due = set(poller.due())
+        indices = [i for i in indices if i in due]
 
-    for i, item in enumerate(contr_addresses):
+    if not indices:
+        continue
 
-        # If empty list returned - no point to compare
-        if not new_txns[i]:
-            continue
+    results = event_loop.run_until_complete(gather_funcs([txn_funcs[i] for i in indices],
+                                                         [txn_args[i] for i in indices]))
+    new_txns = dict(zip(indices, results))
 
-        # Compare new and old txns
-        found_txns = EvmContract.compare_lists(new_txns[i], old_txns[i])
+    for i in indices:
+        item = contr_addresses[i]
+
+        # Keep only txns not seen before
+        found_txns = seen_txns[i].filter_new(new_txns[i]) if new_txns[i] else []
+        poller.record(i, len(found_txns))
 
         # If new txns found - check them and send the interesting ones
         if found_txns:
-            if args.erc20tokentxns:
+            if args.erc20tokentxns or args.logs:
                 evm_contracts[i].alert_erc20_txns(txns=found_txns, min_txn_amount=item['min_amount'])
             elif args.transactions:
                 evm_contracts[i].alert_checked_txns(txns=found_txns)
 
-            # Save latest txns in old_txns only if there is a found txn
-            old_txns[i] = deepcopy(new_txns[i])
-
     timestamp = datetime.now().astimezone().strftime(time_format)
     print(f"{timestamp} - Loop {loop_counter} executed in {(perf_counter() - start):,.2f} secs.")
+
+    if loop_counter % 100 == 0:
+        print(f"{timestamp} - {dispatcher.summary()}")
+    if adaptive and loop_counter % 100 == 0:
+        print_poll_report(contr_addresses, poller.report())
     loop_counter += 1
@@ -6,58 +6,97 @@ from time import sleep, perf_counter
 from datetime import datetime
 from atexit import register
 
-from src.hopbridge.driver.driver import chrome_driver
 from src.hopbridge.web.helpers import print_start_message
-from src.hopbridge.web.price_query import query_hop
-from src.hopbridge.common.exceptions import exit_handler_driver
+from src.hopbridge.web.price_query import (
+    quote_hop,
+    alert_highest_arb,
+)
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.route_scheduler import RouteScheduler
+from src.hopbridge.common.dispatcher import dispatcher
+from src.hopbridge.common.exceptions import exit_handler
 from src.hopbridge.common.message import telegram_send_message
 from src.hopbridge.variables import time_format
 
 
-if len(sys.argv) != 2:
-    sys.exit(f"Usage: python3 {os.path.basename(__file__)} contracts.json\n")
+# Quote from on-chain AMM state instead of the web page
+direct = "--direct" in sys.argv
+
+if len(sys.argv) != 2 + direct:
+    sys.exit(f"Usage: python3 {os.path.basename(__file__)} [--direct] contracts.json\n")
 
 # Send telegram debug message if program terminates
 program_name = os.path.abspath(os.path.basename(__file__))
-register(exit_handler_driver, chrome_driver, program_name)
+register(exit_handler, program_name)
 timestamp = datetime.now().astimezone().strftime(time_format)
 
 # Extract input info from file
 info = json.loads(sys.argv[-1])
 
-sleep_time, special_chat = info['settings'].values()
+sleep_time = info['settings']['sleep_time']
+special_chat = info['settings']['special_chat']
+workers = info['settings'].get('workers', 1)
+intercept = info['settings'].get('intercept', False)
+route_budget = info['settings'].get('route_budget', 0)
+max_staleness = info['settings'].get('max_staleness', 60)
+
+# Alert each opportunity when it opens, changes or closes, one digest message per loop
+tracker = AlertTracker(**info['settings'].get('alerts', {}))
 
 args = []
 for coin in info['coins']:
     for in_network in info['coins'][coin]['in_networks']:
         for out_network in info['coins'][coin]['out_networks']:
             # Append argument for each network configuration
-            args.append((chrome_driver, info['coins'][coin], in_network, out_network, coin, special_chat))
-
-
-print(f"{timestamp} - Started screening https://app.hop.exchange with the following networks:")
+            args.append((None, info['coins'][coin], in_network, out_network, coin, special_chat, tracker))
+
+# Load only the most promising routes each loop, and every route at least every max_staleness secs
+scheduler = RouteScheduler([arg[1]['min_arb'] for arg in args], route_budget, max_staleness) if route_budget else None
+
+
+if direct:
+    from src.hopbridge.web.direct_quote import DirectQuoter
+    quoter = DirectQuoter(args, info['settings'].get('bonder_fee_bps', {}), info['settings'].get('relayer_fee', {}))
+    print(f"{timestamp} - Started quoting Hop AMMs on-chain with the following networks:")
+else:
+    # Each worker owns a driver, which fills the first argument of each route
+    from src.hopbridge.driver.pool import BrowserPool
+    from src.hopbridge.web.intercept import intercept_hop
+    browser_pool = BrowserPool(workers, performance_log=intercept)
+    quote = intercept_hop if intercept else quote_hop
+    print(f"{timestamp} - Started screening https://app.hop.exchange with the following networks:")
 print_start_message(args)
 
 telegram_send_message(f"✅ HOP_WEB has started.")
 
+loop_counter = 1
 while True:
     start = perf_counter()
 
-    token = args[0][4]
-    for arg in args:
-        # Refresh only if token changes
-        if token != arg[4]:
-            # Refresh this way! and update token
-            chrome_driver.get("https://www.google.com")
-            token = arg[4]
+    if direct:
+        # All routes priced from one snapshot of the pools
+        quoter.query_routes(args, tracker)
+    else:
+        indices = scheduler.select() if scheduler is not None else range(len(args))
+
+        # Query https://app.hop.exchange for prices, routes spread over all workers
+        routes = [args[i][1:5] for i in indices]
+        results = browser_pool.map(quote, routes)
+
+        # Alert from this thread only, one route after another
+        for i, (data, in_network, out_network, coin), all_arbs in zip(indices, routes, results):
+            if all_arbs is not None:
+                alert_highest_arb(all_arbs, data, coin, in_network, out_network, special_chat, tracker)
 
-        # Query https://app.hop.exchange for prices
-        query_hop(*arg)
+            if scheduler is not None:
+                scheduler.record(i, max(all_arbs) if all_arbs else None)
 
-    # Refresh this way! one more time to prepare for new while loop
-    chrome_driver.get("https://www.google.com")
+    tracker.flush()
 
     # Sleep and print loop info
     sleep(sleep_time)
     timestamp = datetime.now().astimezone().strftime(time_format)
     print(f"{timestamp} - Loop executed in {perf_counter() - start} secs.")
+    if loop_counter % 100 == 0:
+        print(f"{timestamp} - {dispatcher.summary()}")
+    loop_counter += 1
@@ -0,0 +1,225 @@
+"""
+Persistent, content-addressed cache of contract ABIs.
+
+Usage:
+    python3 -m src.hopbridge.blockchain.abi_cache --list
+    python3 -m src.hopbridge.blockchain.abi_cache --invalidate [network] [address]
+"""
+import os
+import json
+
+from time import time
+from hashlib import sha256
+from threading import Lock
+from argparse import ArgumentParser
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.variables import (
+    abi_cache_dir,
+    abi_cache_ttl,
+)
+
+
+class AbiCache:
+
+    def __init__(self, directory: str = abi_cache_dir, ttl: float = abi_cache_ttl):
+        """
+        Stores ABIs on disk keyed by (network, address). Each distinct ABI is stored once under
+        its content hash and parsed once per process, however many contracts share it.
+
+        :param directory: Folder to keep the cache in
+        :param ttl: Secs after which a cached ABI is stale and should be re-fetched
+        """
+
+        self.directory = directory
+        self.ttl = ttl
+        self.index_file = os.path.join(directory, "index.json")
+        self.fetched_file = os.path.join(directory, "fetched.json")
+
+        self.lock = Lock()
+        self.parsed: Dict[str, list] = {}
+
+        try:
+            with open(self.index_file) as file:
+                self.index: Dict[str, str] = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+
+        # Index key -> unix time the ABI was last fetched, missing for caches older than this file
+        try:
+            with open(self.fetched_file) as file:
+                self.fetched: Dict[str, float] = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.fetched = {}
+
+    @staticmethod
+    def key(network: str, address: str) -> str:
+        """Index key of a contract."""
+
+        return f"{network.lower()}:{address.lower()}"
+
+    def save_index(self) -> None:
+        """Writes the index and fetch times to disk atomically. Must be called holding the lock."""
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        for content, file_name in ((self.index, self.index_file), (self.fetched, self.fetched_file)):
+            temp_file = f"{file_name}.tmp"
+            with open(temp_file, "w") as file:
+                json.dump(content, file, indent=4, sort_keys=True)
+
+            os.replace(temp_file, file_name)
+
+    def is_stale(self, network: str, address: str) -> bool:
+        """
+        Checks if a cached ABI was fetched more than ttl secs ago.
+
+        :param network: Network name, eg. Optimism
+        :param address: Contract's address
+        :return: True if cached and stale, False if fresh or not cached
+        """
+        key = self.key(network, address)
+
+        return key in self.index and time() - self.fetched.get(key, 0) > self.ttl
+
+    def get(self, network: str, address: str) -> list or None:
+        """
+        Returns the cached ABI of a contract.
+
+        :param network: Network name, eg. Optimism
+        :param address: Contract's address
+        :return: Parsed ABI, None if not cached
+        """
+        digest = self.index.get(self.key(network, address))
+        if digest is None:
+            return None
+
+        if digest not in self.parsed:
+            try:
+                with open(os.path.join(self.directory, f"{digest}.json")) as file:
+                    self.parsed[digest] = json.load(file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                return None
+
+        return self.parsed[digest]
+
+    def put(self, network: str, address: str, abi: str or list) -> list:
+        """
+        Stores the ABI of a contract.
+
+        :param network: Network name, eg. Optimism
+        :param address: Contract's address
+        :param abi: ABI as returned by the explorer, JSON text or parsed
+        :return: Parsed ABI
+        """
+        if isinstance(abi, str):
+            abi = json.loads(abi)
+
+        if not isinstance(abi, list):
+            raise ValueError(f"Not a valid ABI - {abi}")
+
+        content = json.dumps(abi, sort_keys=True, separators=(",", ":"))
+        digest = sha256(content.encode()).hexdigest()
+
+        with self.lock:
+            blob_file = os.path.join(self.directory, f"{digest}.json")
+            if not os.path.exists(blob_file):
+                os.makedirs(self.directory, exist_ok=True)
+                with open(blob_file, "w") as file:
+                    file.write(content)
+
+            self.parsed.setdefault(digest, abi)
+            self.index[self.key(network, address)] = digest
+            self.fetched[self.key(network, address)] = time()
+            self.save_index()
+
+        return self.parsed[digest]
+
+    def get_or_fetch(self, network: str, address: str, fetch: Callable[[], str or None]) -> list or None:
+        """
+        Returns the cached ABI of a contract, fetching and storing it on a miss.
+        Stale ABIs are still returned, they are re-fetched with EvmContract.refresh_abi.
+
+        :param network: Network name, eg. Optimism
+        :param address: Contract's address
+        :param fetch: Function returning the ABI from the explorer
+        :return: Parsed ABI, None if not cached and the fetch failed
+        """
+        abi = self.get(network, address)
+
+        if abi is not None:
+            return abi
+
+        return self.fetch_and_put(network, address, fetch)
+
+    def fetch_and_put(self, network: str, address: str, fetch: Callable[[], str or None]) -> list or None:
+        """
+        Fetches the ABI of a contract and stores it.
+
+        :param network: Network name, eg. Optimism
+        :param address: Contract's address
+        :param fetch: Function returning the ABI from the explorer
+        :return: Parsed ABI, None if the fetch failed
+        """
+
+        try:
+            return self.put(network, address, fetch())
+        except Exception as e:
+            log_error.warning(f"'AbiCache' - Unable to fetch ABI for {network}, {address} - {e}")
+            return None
+
+    def invalidate(self, network: str = "", address: str = "") -> List[str]:
+        """
+        Removes cached ABIs and deletes files no longer referenced by any contract.
+
+        :param network: Only remove contracts of this network, all networks if empty
+        :param address: Only remove this contract address, all addresses if empty
+        :return: List of removed index keys
+        """
+
+        with self.lock:
+            removed = [key for key in self.index
+                       if (not network or key.split(":")[0] == network.lower())
+                       and (not address or key.split(":")[1] == address.lower())]
+
+            for key in removed:
+                del self.index[key]
+                self.fetched.pop(key, None)
+
+            referenced = set(self.index.values())
+            if os.path.isdir(self.directory):
+                for file_name in os.listdir(self.directory):
+                    digest = file_name[:-len(".json")]
+                    if file_name.endswith(".json") and file_name not in ("index.json", "fetched.json") \
+                            and digest not in referenced:
+                        os.remove(os.path.join(self.directory, file_name))
+                        self.parsed.pop(digest, None)
+
+            self.save_index()
+
+        return removed
+
+
+# Cache shared by all contracts of a process
+abi_cache = AbiCache()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Lists or invalidates cached contract ABIs.")
+    parser.add_argument("--list", action="store_true", help="Lists all cached contracts.")
+    parser.add_argument("--invalidate", nargs="*", metavar="NETWORK [ADDRESS]",
+                        help="Removes cached ABIs, of all contracts if no network is given.")
+    cli_args = parser.parse_args()
+
+    if cli_args.invalidate is not None:
+        keys = abi_cache.invalidate(*cli_args.invalidate[:2])
+        print(f"Invalidated {len(keys)} cached ABIs.")
+
+    if cli_args.list:
+        for contract_key, content_hash in sorted(abi_cache.index.items()):
+            print(f"{contract_key} -> {content_hash[:12]}")
@@ -0,0 +1,61 @@
+"""
+Block cursor for incremental block explorer polling.
+"""
+from typing import (
+    List,
+    Dict,
+)
+
+from src.hopbridge.blockchain.records import TxnRecord
+
+
+class TxnCursor:
+
+    def __init__(self, rescan_blocks: int = 2, page_size: int = 100, max_pages: int = 10):
+        """
+        Remembers how far a contract's transactions have been fetched, so each poll only asks
+        the explorer for blocks it has not seen yet. The hashes of the transactions in the rescanned
+        blocks are kept too, so a transaction fetched again by the rescan is not returned twice.
+
+        :param rescan_blocks: Number of already seen blocks to fetch again in case of reorgs
+        :param page_size: Number of transactions to request per page
+        :param max_pages: Max number of pages to fetch in one poll, the rest is fetched next poll
+        """
+
+        self.rescan_blocks = rescan_blocks
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        # Last block seen, None until the first poll
+        self.block = None
+
+        # Hash -> block of the transactions seen in the blocks the next poll fetches again
+        self.boundary: Dict[str, int] = {}
+
+    @property
+    def start_block(self) -> int:
+        """First block to request on the next poll."""
+
+        return max(self.block - self.rescan_blocks, 0)
+
+    def advance(self, txns: List[TxnRecord]) -> List[TxnRecord]:
+        """
+        Moves the cursor to the latest block of the fetched transactions.
+
+        :param txns: List of transaction records
+        :return: List of the transactions not returned by an earlier poll
+        """
+        new_txns = [txn for txn in txns if txn.hash not in self.boundary]
+
+        for txn in txns:
+            block = txn.block_number
+
+            if self.block is None or block > self.block:
+                self.block = block
+
+        if self.block is not None:
+            self.boundary.update((txn.hash, txn.block_number) for txn in txns)
+            self.boundary = {txn_hash: block for txn_hash, block in self.boundary.items()
+                             if block >= self.start_block}
+
+        return new_txns
@@ -1,8 +1,12 @@
 import os
 import json
+import asyncio
 
 from requests.exceptions import ConnectionError
-from aiohttp import ClientSession
+from aiohttp import (
+    ClientSession,
+    TCPConnector,
+)
 from json.decoder import JSONDecodeError
 
 from datetime import (
@@ -16,8 +20,20 @@ from typing import (
 
 from web3 import Web3
 from web3.contract import Contract
-
-from src.hopbridge.common.message import telegram_send_message
+from web3.exceptions import ContractLogicError
+from eth_utils.abi import collapse_if_tuple
+
+from src.hopbridge.blockchain.cursor import TxnCursor
+from src.hopbridge.blockchain.abi_cache import abi_cache
+from src.hopbridge.blockchain.read_cache import read_cache
+from src.hopbridge.blockchain.records import (
+    TxnRecord,
+    Erc20TxnRecord,
+    decode_response,
+)
+from src.hopbridge.blockchain.providers import create_web3
+from src.hopbridge.blockchain.explorer_scheduler import explorer_scheduler
+from src.hopbridge.common.dispatcher import dispatcher
 from src.hopbridge.common.logger import (
     log_txns,
     log_error,
@@ -32,13 +48,19 @@ from src.hopbridge.variables import (
 
 class EvmContract:
 
-    def __init__(self, name: str, contract_address: str, web3_endpoint: str = ""):
+    # Long-lived explorer sessions shared by all contracts, one per explorer host
+    sessions: Dict[str, ClientSession] = {}
+
+    def __init__(self, name: str, contract_address: str, web3_endpoint: str = "", failover: bool = False,
+                 hedge: bool = False):
         """
         EVM contract and transaction screener class.
 
         :param name: Network name
         :param contract_address: Contract address on given network
         :param web3_endpoint: Node provider network url endpoint
+        :param failover: Send contract reads to the fastest healthy provider of the network instead
+        :param hedge: With failover, also send a duplicate read to a second provider when the first is slow
         """
 
         if name.lower() not in etherscans:
@@ -58,32 +80,141 @@ class EvmContract:
 
         self.erc20_api = f"{self.api}/api?module=account&action=tokentx"
 
+        self.web3_endpoint = web3_endpoint if web3_endpoint else infura_endpoints.get(self.name)
+
+        # If set, transaction polls only fetch blocks after the cursor
+        self.cursor: TxnCursor or None = None
+
         # Create contract instance
         try:
-            abi = self.get_contract_abi(self.contract_address, self.name, self.abi_endpoint)
-            self.contract = self.create_contract(self.name, self.contract_address, abi, web3_endpoint)
+            abi = abi_cache.get_or_fetch(self.name, self.contract_address, lambda: self.get_contract_abi(
+                self.contract_address, self.name, self.abi_endpoint))
+            if abi is None:
+                raise ValueError("ABI not cached and could not be fetched")
+
+            self.contract = self.create_contract(self.name, self.contract_address, abi, web3_endpoint,
+                                                 failover, hedge)
         except Exception as e:
             self.contract = None
             message = f"Contract instance not created for {self.name}, {self.contract_address}. {e}"
             log_error.warning(message)
 
+    @classmethod
+    def get_session(cls, host: str, connection_limit: int = 10, keepalive_timeout: float = 60) -> ClientSession:
+        """
+        Returns the shared session of an explorer host, creating it on first use.
+        Must be called from within the event loop the session is used in.
+
+        :param host: Explorer api url, eg. https://api.arbiscan.io
+        :param connection_limit: Max number of open connections to the host
+        :param keepalive_timeout: Secs to keep an idle connection open for reuse
+        :return: aiohttp ClientSession
+        """
+
+        if host not in cls.sessions or cls.sessions[host].closed:
+            connector = TCPConnector(limit_per_host=connection_limit, keepalive_timeout=keepalive_timeout,
+                                     ttl_dns_cache=300, ssl=False)
+            cls.sessions[host] = ClientSession(connector=connector)
+
+        return cls.sessions[host]
+
+    @classmethod
+    async def close_sessions(cls) -> None:
+        """
+        Closes all shared explorer sessions.
+
+        :return: None
+        """
+
+        for session in cls.sessions.values():
+            await session.close()
+
+        cls.sessions = {}
+
     @staticmethod
-    def run_contract_function(contract_instance: Contract, function_name: str, args_list: list):
+    def run_contract_function(contract_instance: Contract, function_name: str, args_list: list,
+                              cached: bool = True):
         """
-        Runs an EVM contract function by its name.
+        Runs an EVM contract function by its name. Cached reads are pinned to the chain's head block
+        and a duplicate read at the same block is answered from the read cache. While no recent head
+        is known, or if the provider does not have the head block yet, the read is sent at 'latest'.
 
         :param contract_instance: EVM Contract
         :param function_name: Name of function to get executed
         :param args_list: List of arguments to pass to function
+        :param cached: Pin the read to the head block and memoize it
         :return:
         """
 
         function_name = str(function_name)
 
-        contract_func = contract_instance.functions[function_name]
-        result = contract_func(*args_list).call()
+        contract_func = contract_instance.functions[function_name](*args_list)
+        if not cached:
+            return contract_func.call()
+
+        chain = getattr(contract_instance.w3, "network", None)
+        block = read_cache.head(chain) if chain is not None else None
+        if block is None:
+            return contract_func.call()
+
+        calldata = contract_instance.encodeABI(fn_name=function_name, args=list(args_list))
+        key = read_cache.key(chain, contract_instance.address, calldata, block)
+
+        try:
+            return read_cache.get_or_call(key, lambda: contract_func.call(block_identifier=block))
+        except ContractLogicError:
+            raise
+        except ValueError:
+            # A lagging provider of the network may not have the head block yet
+            return contract_func.call()
+
+    @staticmethod
+    def encode_contract_function(contract_instance: Contract, function_name: str, args_list: list) -> str:
+        """
+        Encodes an EVM contract function call into transaction call data.
+
+        :param contract_instance: EVM Contract
+        :param function_name: Name of function to encode
+        :param args_list: List of arguments to pass to function
+        :return: Hex encoded call data
+        """
+
+        return contract_instance.encodeABI(fn_name=str(function_name), args=list(args_list))
+
+    @staticmethod
+    def decode_contract_output(contract_instance: Contract, function_name: str, data: str or bytes):
+        """
+        Decodes the raw return data of an EVM contract function call.
+
+        :param contract_instance: EVM Contract
+        :param function_name: Name of function that was called
+        :param data: Hex encoded or raw return data
+        :return: Decoded value, or list of values if function has multiple outputs
+        """
+        if isinstance(data, str):
+            data = Web3.to_bytes(hexstr=data)
+
+        function_abi = contract_instance.get_function_by_name(str(function_name)).abi
+        output_types = [collapse_if_tuple(output) for output in function_abi['outputs']]
+
+        result = contract_instance.w3.codec.decode(output_types, data)
+
+        return result[0] if len(result) == 1 else list(result)
+
+    async def refresh_abi(self) -> None:
+        """
+        Re-fetches the contract's cached ABI if it is older than the cache's TTL, in the explorer
+        scheduler's low priority lane so it never delays transaction polls.
 
-        return result
+        :return: None
+        """
+
+        if not abi_cache.is_stale(self.name, self.contract_address):
+            return None
+
+        await explorer_scheduler.acquire(self.api, self.node_api_key, self.contract_address, priority=1)
+        await asyncio.to_thread(abi_cache.fetch_and_put, self.name, self.contract_address,
+                                lambda: self.get_contract_abi(self.contract_address, self.name, self.abi_endpoint))
 
     @staticmethod
     def get_contract_abi(address: str, network: str, abi_endpoint: str, timeout: float = 3) -> str or None:
@@ -113,7 +244,8 @@ class EvmContract:
         return abi['result']
 
     @staticmethod
-    def create_contract(network: str, address: str, abi: str, web3_endpoint: str = "") -> Contract:
+    def create_contract(network: str, address: str, abi: str or list, web3_endpoint: str = "",
+                        failover: bool = False, hedge: bool = False) -> Contract:
         """
         Creates a contract instance.
         Once instantiated, you can read data and execute transactions.
@@ -122,15 +254,17 @@ class EvmContract:
         :param address: Contract's address
         :param abi: Contract's ABI
         :param web3_endpoint: Node provider network url endpoint
+        :param failover: Bind the contract to all providers of the network instead of one endpoint
+        :param hedge: With failover, hedge every read across two providers
         :return: web3 Contract instance
         """
         if web3_endpoint == "":
             web3_endpoint = infura_endpoints[network.lower()]
 
-        w3 = Web3(Web3.HTTPProvider(web3_endpoint))
+        w3 = create_web3(network, web3_endpoint, failover, hedge)
 
         # Convert transaction address to check-sum address
-        checksum_address = Web3.toChecksumAddress(address)
+        checksum_address = Web3.to_checksum_address(address)
 
         # Create contract instance
         contract = w3.eth.contract(address=checksum_address, abi=abi)
@@ -153,19 +287,18 @@ class EvmContract:
         return func_params
 
     @staticmethod
-    def compare_lists(new_list: List[Dict[str, str]], old_list: List[Dict[str, str]],
-                      keyword: str = 'hash') -> list:
+    def compare_lists(new_list: List[TxnRecord], old_list: List[TxnRecord], keyword: str = 'hash') -> list:
         """
-        Compares two lists of dictionaries.
+        Compares two lists of transaction records.
 
         :param new_list: New list
         :param old_list: Old list
         :param keyword: Keyword to compare with
-        :return: List of dictionaries that are in new list but not in old list
+        :return: List of records that are in new list but not in old list
         """
 
         try:
-            hashes = [txn[keyword] for txn in old_list]
+            hashes = {txn[keyword] for txn in old_list}
 
             list_diff = [txn for txn in new_list if txn[keyword] not in hashes]
 
@@ -174,6 +307,96 @@ class EvmContract:
         except TypeError:
             return []
 
+    async def fetch_txns(self, api: str, payload: dict, timeout: float = 3, priority: int = 0,
+                         max_retries: int = 2, record: type = TxnRecord) -> List or None:
+        """
+        Fetches one page of transactions from the block explorer, within the explorer's rate limit.
+
+        :param api: Explorer api endpoint
+        :param payload: Request parameters
+        :param timeout: Max number of secs to wait for request
+        :param priority: Scheduler priority lane, 0 is served first
+        :param max_retries: Max number of retries of a rate limited request
+        :param record: Record class the transactions are decoded into
+        :return: A list of transaction records, None if the request failed
+        """
+
+        async_session = self.get_session(self.api)
+        for _ in range(max_retries + 1):
+            await explorer_scheduler.acquire(self.api, self.node_api_key, self.contract_address, priority)
+            try:
+                async with async_session.get(api, ssl=False, params=payload, timeout=timeout) as response:
+
+                    try:
+                        txn_dict = decode_response(await response.read(), record)
+                    except JSONDecodeError:
+                        log_error.warning(f"'JSONError' - {self.name} - {response.status} - {response.url}")
+                        return None
+
+            except Exception as e:
+                log_error.warning(f"'ConnectionError': Unable to fetch transaction data for {self.name} - {e}")
+                return None
+
+            rate_limited = txn_dict['status'] != "1" and "rate limit" in str(txn_dict.get('result')).lower()
+            explorer_scheduler.report(self.api, self.node_api_key, rate_limited)
+            if not rate_limited:
+                break
+
+        # An empty block range is not an error
+        if txn_dict['status'] != "1" and txn_dict.get('message') == "No transactions found":
+            return []
+
+        if txn_dict['status'] != "1" or type(txn_dict['result']) is not list:
+            log_error.warning(f"'ResponseError' {response.status} - {txn_dict} - {response.url}")
+            return None
+
+        txns = [txn for txn in txn_dict['result'] if isinstance(txn, TxnRecord)]
+        if len(txns) < len(txn_dict['result']):
+            log_error.warning(f"'RecordError' - {self.name} - dropped {len(txn_dict['result']) - len(txns)} "
+                              f"transactions that could not be decoded - {response.url}")
+
+        return txns
+
+    async def fetch_new_txns(self, api: str, payload: dict, timeout: float = 3,
+                             record: type = TxnRecord) -> List or None:
+        """
+        Fetches transactions from the contract's cursor onwards, page by page, oldest first.
+        On the first poll fetches the latest page instead to place the cursor.
+        Transactions of the rescanned blocks already returned by an earlier poll are left out.
+
+        :param api: Explorer api endpoint
+        :param payload: Request parameters without block range, sorting and paging
+        :param timeout: Max number of secs to wait for request
+        :param record: Record class the transactions are decoded into
+        :return: A list of transaction records, None if the first request failed
+        """
+        cursor = self.cursor
+
+        if cursor.block is None:
+            txns = await self.fetch_txns(api, {**payload, "page": "1", "offset": str(cursor.page_size),
+                                               "sort": "desc"}, timeout, record=record)
+            cursor.advance(txns or [])
+            return txns
+
+        txns = []
+        for page in range(1, cursor.max_pages + 1):
+            page_payload = {**payload, "startblock": str(cursor.start_block), "endblock": "99999999",
+                            "page": str(page), "offset": str(cursor.page_size), "sort": "asc"}
+
+            # Catching up on older pages yields to every contract's first page
+            page_txns = await self.fetch_txns(api, page_payload, timeout, priority=min(page - 1, 1), record=record)
+            if page_txns is None:
+                # Keep what was fetched, the cursor continues from there next poll
+                if page == 1:
+                    return None
+                break
+
+            txns += page_txns
+            if len(page_txns) < cursor.page_size:
+                break
+
+        return cursor.advance(txns)
+
     async def get_last_txns(self, contract_address: str, txn_count: int = 1,
                             filter_by: tuple = (), timeout: float = 3) -> List:
         """
@@ -183,7 +406,7 @@ class EvmContract:
         :param txn_count: Number of transactions to return
         :param filter_by: Filter transactions by field and value, eg. ('to', '0x000...000')
         :param timeout: Max number of secs to wait for request
-        :return: A list of transaction dictionaries
+        :return: A list of transaction records, from the cursor's block onwards if the contract has a cursor
         """
         if int(txn_count) < 1:
             txn_count = 1
@@ -191,40 +414,26 @@ class EvmContract:
         if contract_address == "":
             contract_address = self.contract_address
 
-        payload = {"address": contract_address, "startblock": "0", "endblock": "99999999", "sort": "desc",
-                   "apikey": self.node_api_key}
-
-        async with ClientSession(timeout=timeout) as async_session:
-            try:
-                async with async_session.get(self.txn_api, ssl=False, params=payload, timeout=timeout) as response:
-
-                    try:
-                        txn_dict = await response.json()
-                    except JSONDecodeError:
-                        log_error.warning(f"'JSONError' - {self.name} - {response.status} - {response.url}")
-                        return []
-
-            except Exception as e:
-                log_error.warning(f"'ConnectionError': Unable to fetch transaction data for {self.name} - {e}")
-                return []
+        if self.cursor is not None:
+            payload = {"address": contract_address, "apikey": self.node_api_key}
+            last_txns = await self.fetch_new_txns(self.txn_api, payload, timeout)
+        else:
+            payload = {"address": contract_address, "startblock": "0", "endblock": "99999999", "sort": "desc",
+                       "apikey": self.node_api_key}
+            last_txns = await self.fetch_txns(self.txn_api, payload, timeout)
 
-        if txn_dict['status'] != "1":
-            log_error.warning(f"'ResponseError' {response.status} - {txn_dict} - {response.url}")
-            return []
+            # Get a list with specified number of txns
+            if last_txns is not None:
+                last_txns = last_txns[:txn_count]
 
-        # Get a list with specified number of txns
-        try:
-            last_txns = txn_dict['result'][:txn_count]
-        except TypeError:
-            log_error.warning(f"'ResponseError' {response.status} - {txn_dict} - {response.url}")
+        if last_txns is None:
             return []
 
         if len(filter_by) == 2:
             field = filter_by[0]  # Eg. 'to' or 'from'
             value = filter_by[1]  # Eg. '0x000...0000'
             try:
-                temp = {t_dict['hash']: t_dict for t_dict in last_txns
-                        if type(t_dict) is dict and t_dict[field] == value}
+                temp = {txn.hash: txn for txn in last_txns if txn[field] == value}
 
                 last_txns_cleaned = [txn for txn in temp.values()]
                 return last_txns_cleaned
@@ -245,7 +454,7 @@ class EvmContract:
         :param filter_by: Filter transactions by field and value, eg. ('to', '0x000...000')
         :param bridge_address: Address of the smart contract interacting with Token
         :param timeout: Max number of secs to wait for request
-        :return: A list of transaction dictionaries
+        :return: A list of transaction records, from the cursor's block onwards if the contract has a cursor
         """
         if int(txn_count) < 1:
             txn_count = 1
@@ -255,40 +464,26 @@ class EvmContract:
         if bridge_address == "":
             bridge_address = self.contract_address
 
-        payload = {"contractaddress": token_address, "address": bridge_address, "page": "1",
-                   "offset": "100", "sort": "desc", "apikey": self.node_api_key}
-
-        async with ClientSession(timeout=timeout) as async_session:
-            try:
-                async with async_session.get(self.erc20_api, ssl=False, params=payload, timeout=timeout) as response:
-
-                    try:
-                        txn_dict = await response.json()
-                    except JSONDecodeError:
-                        log_error.warning(f"'JSONError' - {self.name} - {response.status} - {response.url}")
-                        return []
+        if self.cursor is not None:
+            payload = {"contractaddress": token_address, "address": bridge_address, "apikey": self.node_api_key}
+            last_txns = await self.fetch_new_txns(self.erc20_api, payload, timeout, record=Erc20TxnRecord)
+        else:
+            payload = {"contractaddress": token_address, "address": bridge_address, "page": "1",
+                       "offset": "100", "sort": "desc", "apikey": self.node_api_key}
+            last_txns = await self.fetch_txns(self.erc20_api, payload, timeout, record=Erc20TxnRecord)
 
-            except Exception as e:
-                log_error.warning(f"'ConnectionError': Unable to fetch transaction data for {self.name} - {e}")
-                return []
+            # Get a list with specified number of txns
+            if last_txns is not None:
+                last_txns = last_txns[:txn_count]
 
-        if txn_dict['status'] != "1":
-            log_error.warning(f"'ResponseError' {response.status} - {txn_dict} - {response.url}")
-            return []
-
-        # Get a list with specified number of txns
-        try:
-            last_txns = txn_dict['result'][:txn_count]
-        except TypeError:
-            log_error.warning(f"'ResponseError' {response.status} - {txn_dict} - {response.url}")
+        if last_txns is None:
             return []
 
         if len(filter_by) == 2:
             field = filter_by[0]  # Eg. 'to' or 'from'
             value = filter_by[1]  # Eg. '0x000...0000'
             try:
-                temp = {t_dict['hash']: t_dict for t_dict in last_txns
-                        if type(t_dict) is dict and t_dict[field] == value}
+                temp = {txn.hash: txn for txn in last_txns if txn[field] == value}
 
                 last_txns_cleaned = [txn for txn in temp.values()]
                 return last_txns_cleaned
@@ -299,24 +494,20 @@ class EvmContract:
         else:
             return last_txns
 
-    def alert_checked_txns(self, txns: list) -> None:
+    def alert_checked_txns(self, txns: List[TxnRecord]) -> None:
         """
         Alerts each txn from the txn list.
 
-        :param txns: List of transactions
+        :param txns: List of transaction records
         :return: None
         """
         for txn in txns:
-            txn_hash = txn['hash']
-            value = float(txn['value'])
-            from_addr = txn['from']
-            to_addr = txn['to']
-            time_at_secs = int(txn['timeStamp'])
-            try:
-                function_name: str = txn['functionName']
-                function_name = function_name.split("(")[0]
-            except (KeyError, TypeError):
-                function_name = 'n/a'
+            txn_hash = txn.hash
+            value = float(txn.value)
+            from_addr = txn.from_addr
+            to_addr = txn.to_addr
+            time_at_secs = txn.timestamp
+            function_name = txn.function_name.split("(")[0] or 'n/a'
 
             txn_hash_format = f"{txn_hash[0:6]}...{txn_hash[-4:]}"  # eg. 0xc43c...37ea
             from_addr_format = f"{from_addr[0:6]}...{from_addr[-4:]}"  # eg. 0xc43c...37ea
@@ -342,35 +533,32 @@ class EvmContract:
 
             # Log all transactions
             log_txns.info(terminal_msg)
-            telegram_send_message(message)
+            dispatcher.submit(message)
 
-    def alert_erc20_txns(self, txns: list, min_txn_amount: float) -> None:
+    def alert_erc20_txns(self, txns: List[Erc20TxnRecord], min_txn_amount: float) -> None:
         """
         Checks transaction list and alerts if new transaction is important.
 
-        :param txns: List of transactions
+        :param txns: List of token transaction records
         :param min_txn_amount: Minimum transfer amount to alert for
         :return: None
         """
         for txn in txns:
 
-            txn_amount = float(int(txn['value']) / 10 ** int(txn['tokenDecimal']))
-            # round txn amount number
-            rounding = int(txn['tokenDecimal']) // 6
-            txn_amount = round(txn_amount, rounding)
-            token_name = txn['tokenSymbol']
+            txn_amount = txn.amount
+            token_name = txn.token_symbol
 
             # Construct messages
             time_stamp = datetime.now().astimezone().strftime(time_format)
             message = f"{time_stamp} - hop_etherscan_async\n" \
                       f"-> {txn_amount:,} {token_name} swapped on " \
-                      f"<a href='{self.web_page}/tx/{txn['hash']}'>{self.name.upper()} {self.color}</a>"
+                      f"<a href='{self.web_page}/tx/{txn.hash}'>{self.name.upper()} {self.color}</a>"
 
-            terminal_msg = f"{txn['hash']}, {txn_amount:,} {token_name} swapped on {self.name.upper()}"
+            terminal_msg = f"{txn.hash}, {txn_amount:,} {token_name} swapped on {self.name.upper()}"
 
             # Log all transactions
             log_txns.info(terminal_msg)
 
             if txn_amount >= min_txn_amount:
                 # Send formatted Telegram message
-                telegram_send_message(message)
+                dispatcher.submit(message)
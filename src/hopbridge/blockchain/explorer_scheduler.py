@@ -0,0 +1,173 @@
+"""
+Central rate limiting of block explorer API calls, one token bucket per explorer host and API key.
+"""
+import asyncio
+
+from collections import (
+    OrderedDict,
+    deque,
+)
+from typing import (
+    Dict,
+    Tuple,
+)
+
+from src.hopbridge.common.rate_limit import TokenBucket
+from src.hopbridge.common.logger import log_error
+
+
+class ExplorerLimiter:
+
+    def __init__(self, rate: float, burst: float, lanes: int):
+        """
+        Token bucket of one explorer host and API key, with a queue per priority lane and per client.
+
+        :param rate: Calls per sec
+        :param burst: Max number of calls sent back to back
+        :param lanes: Number of priority lanes
+        """
+
+        self.bucket = TokenBucket(rate, burst)
+        self.lanes = [OrderedDict() for _ in range(lanes)]
+        self.ready = asyncio.Event()
+        self.task = None
+
+    def next_waiter(self) -> asyncio.Future or None:
+        """
+        Takes the next waiting call: the highest priority lane first, round robin over clients within a lane.
+
+        :return: Future of the waiting call, None if nothing waits
+        """
+
+        for lane in self.lanes:
+            while lane:
+                client, waiters = next(iter(lane.items()))
+                future = waiters.popleft()
+
+                # Client goes to the back of the lane, or leaves it if nothing else waits
+                del lane[client]
+                if waiters:
+                    lane[client] = waiters
+
+                if not future.done():
+                    return future
+
+        return None
+
+
+class ExplorerScheduler:
+
+    def __init__(self, rate: float = 5, burst: float = 5, min_rate: float = 0.5, increase: float = 0.05,
+                 decrease: float = 0.5, lanes: int = 2):
+        """
+        Spaces explorer API calls so each host and API key stays within its rate limit.
+        Waiting calls are released by priority lane, and fairly across clients within a lane.
+        The rate backs off multiplicatively when the explorer answers 'Max rate limit reached'
+        and recovers additively after each accepted call, up to the configured rate.
+
+        :param rate: Max calls per sec per host and API key, Etherscan allows 5
+        :param burst: Max number of calls sent back to back
+        :param min_rate: Rate never backed off below this
+        :param increase: Calls per sec added after each accepted call
+        :param decrease: Factor the rate is multiplied by after a rate limited call
+        :param lanes: Number of priority lanes, 0 is served first
+        """
+
+        self.max_rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.lane_count = lanes
+
+        self.limiters: Dict[Tuple[str, str], ExplorerLimiter] = {}
+
+    def configure(self, rate: float = None, burst: float = None) -> None:
+        """
+        Changes the rate limit of explorers not used yet.
+
+        :param rate: Max calls per sec per host and API key
+        :param burst: Max number of calls sent back to back
+        :return: None
+        """
+
+        if rate is not None:
+            self.max_rate = rate
+        if burst is not None:
+            self.burst = burst
+
+    def limiter(self, host: str, api_key: str) -> ExplorerLimiter:
+        """Returns the limiter of a host and API key, creating it on first use."""
+
+        key = (host, str(api_key))
+        if key not in self.limiters:
+            self.limiters[key] = ExplorerLimiter(self.max_rate, self.burst, self.lane_count)
+
+        return self.limiters[key]
+
+    async def acquire(self, host: str, api_key: str, client: str = "", priority: int = 0) -> None:
+        """
+        Waits until a call may be sent.
+
+        :param host: Explorer api url, eg. https://api.arbiscan.io
+        :param api_key: Explorer API key
+        :param client: Name calls are queued fairly by, eg. a contract address
+        :param priority: Priority lane, 0 is served first
+        :return: None
+        """
+        limiter = self.limiter(host, api_key)
+
+        if limiter.task is None or limiter.task.done():
+            limiter.task = asyncio.create_task(self.dispatch(limiter))
+
+        future = asyncio.get_running_loop().create_future()
+        lane = limiter.lanes[min(max(priority, 0), self.lane_count - 1)]
+        lane.setdefault(client, deque()).append(future)
+        limiter.ready.set()
+
+        await future
+
+    async def dispatch(self, limiter: ExplorerLimiter) -> None:
+        """Releases waiting calls of one limiter as tokens become available. Runs as a task forever."""
+
+        while True:
+            await limiter.ready.wait()
+
+            # Only a live waiter takes a token, cancelled calls never spend one
+            future = limiter.next_waiter()
+            if future is None:
+                limiter.ready.clear()
+                continue
+
+            while not future.done() and not limiter.bucket.try_acquire():
+                await asyncio.sleep(max(limiter.bucket.wait_time(), 0.01))
+
+            if not future.done():
+                future.set_result(None)
+
+    def report(self, host: str, api_key: str, rate_limited: bool) -> None:
+        """
+        Adapts the rate of a host and API key to the explorer's answer.
+
+        :param host: Explorer api url
+        :param api_key: Explorer API key
+        :param rate_limited: The explorer rejected the call for exceeding its rate limit
+        :return: None
+        """
+        bucket = self.limiter(host, api_key).bucket
+
+        with bucket.lock:
+            bucket.refill()
+            if rate_limited:
+                bucket.rate = max(bucket.rate * self.decrease, self.min_rate)
+            else:
+                bucket.rate = min(bucket.rate + self.increase, self.max_rate)
+
+        if rate_limited:
+            log_error.warning(f"'ExplorerScheduler' - Rate limited by {host}, "
+                              f"backing off to {bucket.rate:.2f} calls/sec")
+            bucket.pause(1 / bucket.rate)
+
+
+# Scheduler shared by all explorer calls of a process
+explorer_scheduler = ExplorerScheduler()
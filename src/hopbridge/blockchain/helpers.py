@@ -33,6 +33,23 @@ def print_start_message(arguments: List[dict]) -> None:
                    tablefmt="fancy_grid", numalign="left", stralign="left", colalign="left"))
 
 
+def print_poll_report(arguments: List[dict], report: List[tuple]) -> None:
+    """Prints the polling schedule of every contract.
+
+    :param arguments: List of contract dictionaries
+    :param report: Output of AdaptivePoller.report
+    """
+
+    table = []
+    for (_, rate, interval, latency), arg in zip(report, arguments):
+        table.append([arg['network'], arg['token'], f"{rate:,.2f}", f"{interval:,.1f}", f"{latency:,.1f}"])
+
+    columns = ["Network", "Token", "Txns/hour", "Poll every (secs)", "Expected latency (secs)"]
+
+    print(tabulate(table, headers=columns, showindex=True,
+                   tablefmt="fancy_grid", numalign="left", stralign="left", colalign="left"))
+
+
 async def gather_funcs(functions: List[Callable], func_args: List[list]) -> tuple:
     """
     Gathers all asyncio http requests to be scheduled.
@@ -23,6 +23,17 @@ parser.add_argument(
          f" filter criteria."
 )
 
+parser.add_argument(
+    "-l", "--logs", action="store", type=str, nargs=1, metavar="\b", dest="logs",
+    help=f"Screens for a new Erc20 Token transfer or swap straight from node logs instead of the block explorer"
+         f" and alerts via a Telegram message if it satisfies filter criteria."
+)
+
+parser.add_argument(
+    "-w", "--websocket", action="store", type=str, nargs=1, metavar="\b", dest="websocket",
+    help=f"Same as --logs, but new logs are pushed by node WebSocket subscriptions instead of polled."
+)
+
 parser.add_argument(
     "-v", "--version", action="version", version=__version__,
     help="Prints the program's current version."
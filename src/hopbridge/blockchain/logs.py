@@ -0,0 +1,290 @@
+"""
+Node-native transfer scanner built on eth_getLogs, an alternative to the explorer's tokentx endpoint.
+"""
+import asyncio
+
+from typing import (
+    List,
+    Dict,
+    Tuple,
+)
+
+from web3 import Web3
+
+from src.hopbridge.blockchain.records import Erc20TxnRecord
+from src.hopbridge.blockchain.rpc import (
+    rpc_batch_request,
+    rpc_request,
+    get_block_number,
+)
+from src.hopbridge.common.logger import log_error
+
+
+# keccak256 of the event signatures
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)").hex()
+TOKEN_SWAP_TOPIC = Web3.keccak(text="TokenSwap(address,uint256,uint256,uint128,uint128)").hex()
+
+# Call data of the AMM wrapper's 'exchangeAddress()', the Swap contract that emits TokenSwap
+EXCHANGE_ADDRESS_CALL = Web3.keccak(text="exchangeAddress()")[:4].hex()
+
+
+def address_topic(address: str) -> str:
+    """Left pads an address to a 32 byte log topic."""
+
+    return "0x" + address.lower().replace("0x", "").rjust(64, "0")
+
+
+def topic_address(topic: str) -> str:
+    """Reads the address of a 32 byte log topic."""
+
+    return "0x" + topic[-40:].lower()
+
+
+def data_words(data: str) -> List[int]:
+    """Splits log data into its 32 byte words."""
+
+    data = data.replace("0x", "")
+
+    return [int(data[i:i + 64], 16) for i in range(0, len(data), 64)]
+
+
+class LogScanner:
+
+    def __init__(self, network: str, endpoint: str, token_address: str, contract_address: str,
+                 token_symbol: str, decimals: int, swaps: bool = True, chunk_size: int = 2000,
+                 max_chunk_size: int = 10000, rescan_blocks: int = 2, initial_blocks: int = 100,
+                 max_chunks: int = 20):
+        """
+        Scans a node for Transfer logs of a token to or from a contract, and optionally for the contract's
+        TokenSwap logs, and returns them as explorer tokentx style dictionaries.
+        Each scan continues from the last block scanned. The block range of each eth_getLogs call is halved
+        when the provider rejects it and doubled again after successful calls.
+
+        :param network: Network name, eg. Optimism
+        :param endpoint: Node provider network url endpoint
+        :param token_address: Address of Token contract of interest
+        :param contract_address: Address of the smart contract interacting with Token
+        :param token_symbol: Token symbol to report, eg. hUSDC
+        :param decimals: Token decimals
+        :param swaps: Also scan the TokenSwap logs of the contract's Swap, found through the AMM wrapper
+        :param chunk_size: Initial number of blocks per eth_getLogs call
+        :param max_chunk_size: Max number of blocks per eth_getLogs call
+        :param rescan_blocks: Number of already scanned blocks to scan again in case of reorgs
+        :param initial_blocks: Number of blocks before the head to scan on the first call
+        :param max_chunks: Max number of eth_getLogs calls per scan, the rest is scanned next time
+        """
+
+        self.network = network.lower()
+        self.endpoint = endpoint
+        self.token_address = token_address.lower()
+        self.contract_address = contract_address.lower()
+        self.token_symbol = token_symbol
+        self.decimals = int(decimals)
+        self.swaps = swaps
+
+        self.chunk_size = chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.rescan_blocks = rescan_blocks
+        self.initial_blocks = initial_blocks
+        self.max_chunks = max_chunks
+
+        # Contract emitting the TokenSwap logs, None until resolved
+        self.swap_address = None
+
+        # Last block scanned, None until the first scan
+        self.block = None
+
+    def resolve_swap_address(self, timeout: float = 10) -> str:
+        """
+        Returns the Swap contract behind the AMM wrapper, read once with 'exchangeAddress()'.
+        The wrapper only forwards swaps, the TokenSwap logs are emitted by the Swap contract.
+
+        :param timeout: Max number of secs to wait for request
+        :return: Lowercase address, the contract itself if it is not a wrapper
+        """
+        if self.swap_address is not None:
+            return self.swap_address
+
+        call = {"to": self.contract_address, "data": EXCHANGE_ADDRESS_CALL}
+        try:
+            result = rpc_request(self.endpoint, "eth_call", [call, "latest"], timeout)
+        except ValueError:
+            # Reverted, the contract has no 'exchangeAddress()'
+            result = "0x"
+
+        if len(result.replace("0x", "")) == 64:
+            self.swap_address = topic_address(result)
+        else:
+            log_error.warning(f"'LogScanner' - {self.network}, {self.contract_address} is not an AMM wrapper, "
+                              f"scanning its own TokenSwap logs")
+            self.swap_address = self.contract_address
+
+        return self.swap_address
+
+    def log_filters(self, from_block: int = None, to_block: int = None) -> List[dict]:
+        """
+        Builds the eth_getLogs filters of a block range, or the eth_subscribe filters if no range is given.
+
+        :param from_block: First block, inclusive
+        :param to_block: Last block, inclusive
+        :return: List of filter objects
+        """
+        block_range = {} if from_block is None else {"fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        contract_topic = address_topic(self.contract_address)
+
+        filters = [
+            {**block_range, "address": self.token_address, "topics": [TRANSFER_TOPIC, contract_topic]},
+            {**block_range, "address": self.token_address, "topics": [TRANSFER_TOPIC, None, contract_topic]},
+        ]
+        if self.swaps:
+            filters.append({**block_range, "address": self.resolve_swap_address(), "topics": [TOKEN_SWAP_TOPIC]})
+
+        return filters
+
+    def get_logs(self, from_block: int, to_block: int, timeout: float = 10) -> List[dict] or None:
+        """
+        Fetches all logs of a block range in one batch request.
+
+        :param from_block: First block, inclusive
+        :param to_block: Last block, inclusive
+        :param timeout: Max number of secs to wait for request
+        :return: List of raw logs, None if the provider rejected any filter
+        """
+        calls = [("eth_getLogs", [log_filter]) for log_filter in self.log_filters(from_block, to_block)]
+        try:
+            results = rpc_batch_request(self.endpoint, calls, timeout)
+        except ValueError as e:
+            log_error.warning(f"'LogScanner' - {self.network} - {e}")
+            return None
+
+        if any(result is None for result in results):
+            return None
+
+        return [log for result in results for log in result]
+
+    def get_timestamps(self, blocks: List[int], timeout: float = 10) -> Dict[int, int]:
+        """
+        Fetches the timestamps of blocks in one batch request.
+
+        :param blocks: List of block numbers
+        :param timeout: Max number of secs to wait for request
+        :return: Dictionary of block number -> unix timestamp, blocks not returned are left out
+        """
+        calls = [("eth_getBlockByNumber", [hex(block), False]) for block in blocks]
+        results = rpc_batch_request(self.endpoint, calls, timeout) if calls else []
+
+        return {block: int(result['timestamp'], 16) for block, result in zip(blocks, results) if result}
+
+    def decode_log(self, log: dict, timestamp: int) -> Erc20TxnRecord or None:
+        """
+        Decodes a Transfer or TokenSwap log into the same record as an explorer tokentx item.
+        For a TokenSwap the value is the amount of the token of index 1, the hToken in Hop AMMs.
+
+        :param log: Raw log
+        :param timestamp: Unix timestamp of the log's block
+        :return: Erc20TxnRecord instance, None if the log is not recognised
+        """
+        topics = log['topics']
+
+        if topics[0] == TRANSFER_TOPIC and len(topics) == 3:
+            from_addr, to_addr = topic_address(topics[1]), topic_address(topics[2])
+            value = data_words(log['data'])[0]
+
+        elif topics[0] == TOKEN_SWAP_TOPIC and len(topics) == 2:
+            tokens_sold, tokens_bought, sold_id, _ = data_words(log['data'])
+            from_addr, to_addr = topic_address(topics[1]), self.contract_address
+            value = tokens_sold if sold_id == 1 else tokens_bought
+
+        else:
+            return None
+
+        return Erc20TxnRecord(log['transactionHash'], int(log['blockNumber'], 16), timestamp, from_addr, to_addr,
+                              value, self.token_symbol, self.decimals, int(log['logIndex'], 16))
+
+    def scan_range(self, from_block: int, to_block: int, timeout: float = 10) -> Tuple[List[dict], int]:
+        """
+        Fetches the logs of a block range in chunks, shrinking the chunk size when the provider rejects it.
+
+        :param from_block: First block, inclusive
+        :param to_block: Last block, inclusive
+        :param timeout: Max number of secs to wait for each request
+        :return: Raw logs and the last block scanned, from_block - 1 if none
+        """
+        logs = []
+        scanned = from_block - 1
+
+        for _ in range(self.max_chunks):
+            if scanned >= to_block:
+                break
+
+            chunk_end = min(scanned + self.chunk_size, to_block)
+            chunk_logs = self.get_logs(scanned + 1, chunk_end, timeout)
+
+            if chunk_logs is None:
+                if self.chunk_size == 1:
+                    break
+                # Provider caps the range or the number of results, retry a smaller range
+                self.chunk_size = max(self.chunk_size // 2, 1)
+                continue
+
+            logs.extend(chunk_logs)
+            scanned = chunk_end
+            self.chunk_size = min(self.chunk_size * 2, self.max_chunk_size)
+
+        return logs, scanned
+
+    def scan(self, timeout: float = 10) -> List[Erc20TxnRecord]:
+        """
+        Scans the blocks added since the last scan.
+
+        :param timeout: Max number of secs to wait for each request
+        :return: List of transaction records ordered by block and log index
+        """
+        head = get_block_number(self.endpoint, timeout)
+
+        if self.block is None:
+            from_block = max(head - self.initial_blocks, 0)
+        else:
+            from_block = max(self.block - self.rescan_blocks, 0) + 1
+
+        logs, scanned = self.scan_range(from_block, head, timeout)
+
+        blocks = sorted({int(log['blockNumber'], 16) for log in logs if not log.get('removed')})
+        timestamps = self.get_timestamps(blocks, timeout)
+
+        logs.sort(key=lambda log: (int(log['blockNumber'], 16), int(log['logIndex'], 16)))
+
+        txns = []
+        for log in logs:
+            if log.get('removed'):
+                continue
+
+            txn = self.decode_log(log, timestamps.get(int(log['blockNumber'], 16), 0))
+            if txn is not None:
+                txns.append(txn)
+
+        # Only advance once the range is fully decoded, so a failed scan is retried from the same block
+        if scanned >= from_block:
+            self.block = scanned
+
+        return txns
+
+    async def get_new_txns(self, filter_by: tuple = (), timeout: float = 10) -> List[Erc20TxnRecord]:
+        """
+        Scans the blocks added since the last call without blocking the event loop.
+
+        :param filter_by: Filter transactions by field and lowercase value, eg. ('to', '0x000...000')
+        :param timeout: Max number of secs to wait for each request
+        :return: List of transaction records, empty if the node could not be queried
+        """
+        try:
+            txns = await asyncio.to_thread(self.scan, timeout)
+        except Exception as e:
+            log_error.warning(f"'LogScanner' - {self.network}, {self.contract_address} - {e}")
+            return []
+
+        if len(filter_by) == 2:
+            field, value = filter_by
+            return [txn for txn in txns if txn[field] == value]
+
+        return txns
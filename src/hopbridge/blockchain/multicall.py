@@ -0,0 +1,110 @@
+"""
+Aggregate many contract reads on one chain into a single Multicall3 eth_call.
+"""
+from typing import List
+
+from web3 import Web3
+from web3.contract import Contract
+
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.common.logger import log_error
+
+
+# Multicall3 is deployed at the same address on every supported network
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]",
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"},
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]",
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function",
+    },
+]
+
+
+class Multicall:
+
+    def __init__(self, web3_endpoint: str, address: str = MULTICALL3_ADDRESS, w3: Web3 = None):
+        """
+        Collects pending contract reads for one chain and executes them in a single eth_call.
+
+        :param web3_endpoint: Node provider network url endpoint
+        :param address: Multicall3 contract address
+        :param w3: Web3 instance to use instead of one bound to web3_endpoint, eg. with provider failover
+        """
+
+        self.web3_endpoint = web3_endpoint
+        self.w3 = w3 if w3 is not None else Web3(Web3.HTTPProvider(web3_endpoint))
+        self.contract = self.w3.eth.contract(address=Web3.to_checksum_address(address), abi=MULTICALL3_ABI)
+
+        self.calls = []
+
+    def add_call(self, contract_instance: Contract, function_name: str, args_list: list) -> int:
+        """
+        Adds a contract function call to the pending reads.
+
+        :param contract_instance: EVM Contract
+        :param function_name: Name of function to get executed
+        :param args_list: List of arguments to pass to function
+        :return: Index of the call in the results of execute
+        """
+
+        data = EvmContract.encode_contract_function(contract_instance, function_name, args_list)
+        self.calls.append((contract_instance, str(function_name), Web3.to_bytes(hexstr=data)))
+
+        return len(self.calls) - 1
+
+    def execute(self, block_identifier: str or int = "latest") -> List[tuple]:
+        """
+        Executes all pending reads with one 'aggregate3' eth_call and clears them.
+        A failing call does not revert the others.
+
+        :param block_identifier: Block number or tag to execute all calls at
+        :return: List of (success, decoded value) tuples in the order calls were added
+        """
+
+        calls, self.calls = self.calls, []
+        if not calls:
+            return []
+
+        aggregate = [(contract.address, True, data) for contract, _, data in calls]
+        replies = self.contract.functions.aggregate3(aggregate).call(block_identifier=block_identifier)
+
+        results = []
+        for (contract, function_name, _), (success, return_data) in zip(calls, replies):
+            if not success:
+                log_error.warning(f"'Multicall' - {function_name} reverted for {contract.address}")
+                results.append((False, None))
+                continue
+
+            try:
+                value = EvmContract.decode_contract_output(contract, function_name, return_data)
+                results.append((True, value))
+            except Exception as e:
+                log_error.warning(f"'Multicall' - Unable to decode {function_name} for {contract.address} - {e}")
+                results.append((False, None))
+
+        return results
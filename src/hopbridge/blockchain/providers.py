@@ -0,0 +1,299 @@
+"""
+Latency-ranked failover and hedged requests across the node providers of a network.
+"""
+from collections import deque
+from threading import (
+    Lock,
+    Event,
+)
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    FIRST_COMPLETED,
+    wait,
+)
+from time import (
+    monotonic,
+    perf_counter,
+)
+from typing import (
+    Dict,
+    List,
+)
+
+from web3 import (
+    Web3,
+    HTTPProvider,
+)
+
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.variables import (
+    http_session,
+    infura_endpoints,
+    ankr_endpoints,
+)
+
+
+class EndpointStats:
+
+    def __init__(self, window: int = 100):
+        """
+        Rolling latency and error record of one endpoint.
+
+        :param window: Number of latest requests to keep
+        """
+
+        self.latencies = deque(maxlen=window)
+        self.errors = deque(maxlen=window)
+        self.last_error = 0
+
+    def record(self, latency: float, error: bool) -> None:
+        """Records the outcome of one request."""
+
+        self.errors.append(error)
+        if error:
+            self.last_error = monotonic()
+        else:
+            self.latencies.append(latency)
+
+    @property
+    def error_rate(self) -> float:
+        """Share of the recorded requests that failed."""
+
+        return sum(self.errors) / len(self.errors) if self.errors else 0
+
+    def percentile(self, share: float) -> float or None:
+        """Latency below which the given share of successful requests completed, None if none recorded."""
+
+        if not self.latencies:
+            return None
+
+        ordered = sorted(self.latencies)
+
+        return ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+
+
+class ProviderSet:
+
+    def __init__(self, network: str, endpoints: List[str], max_error_rate: float = 0.2,
+                 probe_interval: float = 30, min_hedge_delay: float = 0.05, timeout: float = 10,
+                 max_concurrency: int = 32):
+        """
+        Sends each JSON-RPC request to the fastest healthy endpoint of a network and fails over to the
+        next one on transport errors. Hedged requests also send a duplicate to the second endpoint
+        once the first has taken longer than its p95 latency, and return whichever answers first.
+
+        :param network: Network name, eg. Optimism
+        :param endpoints: Node provider network url endpoints
+        :param max_error_rate: Endpoints failing more often are only used after all healthy ones
+        :param probe_interval: Secs after its last error an unhealthy endpoint is ranked as healthy again
+        :param min_hedge_delay: Min secs to wait before sending a hedged duplicate
+        :param timeout: Max number of secs to wait for each request
+        :param max_concurrency: Max number of callers sending hedged requests at once
+        """
+        if not endpoints:
+            raise ValueError(f"No endpoints for {network}")
+
+        self.network = network.lower()
+        self.endpoints = list(dict.fromkeys(endpoints))
+        self.max_error_rate = max_error_rate
+        self.probe_interval = probe_interval
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+
+        self.stats: Dict[str, EndpointStats] = {endpoint: EndpointStats() for endpoint in self.endpoints}
+        self.lock = Lock()
+
+        # Two workers per concurrent caller, so requests do not queue behind other callers' requests
+        self.pool = ThreadPoolExecutor(max_workers=2 * max_concurrency)
+
+    def healthy(self, endpoint: str) -> bool:
+        """Checks if an endpoint fails rarely enough, or has had time to recover."""
+
+        stats = self.stats[endpoint]
+
+        return stats.error_rate <= self.max_error_rate or monotonic() - stats.last_error > self.probe_interval
+
+    def ranked(self) -> List[str]:
+        """
+        Orders endpoints by health, then by median latency. Endpoints with no record come first
+        among the healthy ones, so each gets measured.
+
+        :return: List of endpoints, best first
+        """
+
+        with self.lock:
+            def rank(endpoint: str) -> tuple:
+                median = self.stats[endpoint].percentile(0.5)
+                return not self.healthy(endpoint), median is not None, median or 0
+
+            return sorted(self.endpoints, key=rank)
+
+    def send(self, endpoint: str, payload: dict) -> dict:
+        """
+        Posts one JSON-RPC payload to an endpoint and records its latency or failure.
+
+        :param endpoint: Node provider network url endpoint
+        :param payload: JSON-RPC request
+        :return: JSON-RPC reply, may hold an 'error' the node returned
+        """
+        start = perf_counter()
+        try:
+            response = http_session.post(endpoint, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            reply = response.json()
+        except Exception:
+            with self.lock:
+                self.stats[endpoint].record(perf_counter() - start, True)
+            raise
+
+        with self.lock:
+            self.stats[endpoint].record(perf_counter() - start, False)
+
+        return reply
+
+    def make_request(self, method: str, params: list, hedge: bool = False) -> dict:
+        """
+        Sends a JSON-RPC request, failing over to the next endpoint on transport errors.
+
+        :param method: JSON-RPC method name, eg. eth_call
+        :param params: List of method parameters
+        :param hedge: Send a duplicate to the second endpoint if the first is slower than its p95
+        :return: JSON-RPC reply
+        """
+        payload = {"jsonrpc": "2.0", "id": 0, "method": method, "params": params}
+        endpoints = self.ranked()
+
+        if hedge and len(endpoints) > 1:
+            return self.hedged(endpoints, payload)
+
+        error = None
+        for endpoint in endpoints:
+            try:
+                return self.send(endpoint, payload)
+            except Exception as e:
+                error = e
+                log_error.warning(f"'ProviderSet' - {method} failed on {endpoint}, failing over - {e}")
+
+        raise ConnectionError(f"All {self.network} endpoints failed for {method} - {error}")
+
+    def hedged(self, endpoints: List[str], payload: dict) -> dict:
+        """
+        Sends a request to the best endpoint, and to the second best once the first has taken
+        longer than its p95 latency or failed. Returns the first reply.
+        The hedge delay runs from when the first request is actually sent, so time spent queued for
+        a worker is never mistaken for a slow endpoint.
+
+        :param endpoints: Ranked endpoints
+        :param payload: JSON-RPC request
+        :return: JSON-RPC reply
+        """
+        first, second = endpoints[0], endpoints[1]
+
+        with self.lock:
+            p95 = self.stats[first].percentile(0.95)
+        delay = max(p95 if p95 is not None else self.min_hedge_delay, self.min_hedge_delay)
+
+        started = Event()
+
+        def send_first() -> dict:
+            started.set()
+            return self.send(first, payload)
+
+        pending = {self.pool.submit(send_first)}
+        started.wait(self.timeout)
+        done, pending = wait(pending, timeout=delay)
+
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+
+        pending.add(self.pool.submit(self.send, second, payload))
+
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=self.timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+        raise ConnectionError(f"Hedged {payload['method']} failed on {first} and {second} - {error}")
+
+    def metrics(self) -> Dict[str, dict]:
+        """
+        Returns the current record of every endpoint.
+
+        :return: Dictionary of endpoint -> p50 and p95 latency in secs and error rate
+        """
+
+        with self.lock:
+            return {endpoint: {"p50": stats.percentile(0.5), "p95": stats.percentile(0.95),
+                               "error_rate": stats.error_rate} for endpoint, stats in self.stats.items()}
+
+
+class ProviderSetHTTPProvider(HTTPProvider):
+
+    def __init__(self, provider_set: ProviderSet, hedge: bool = False):
+        """
+        web3 HTTP provider that sends every request through a ProviderSet.
+
+        :param provider_set: Endpoints of the network
+        :param hedge: Hedge every request, for latency critical reads
+        """
+        super().__init__(provider_set.endpoints[0])
+
+        self.provider_set = provider_set
+        self.hedge = hedge
+
+    def make_request(self, method, params) -> dict:
+        """Sends a request to the best endpoint of the set."""
+
+        return self.provider_set.make_request(method, params, hedge=self.hedge)
+
+
+# Provider sets shared by all contracts of a process, one per network
+provider_sets: Dict[str, ProviderSet] = {}
+provider_sets_lock = Lock()
+
+
+def get_provider_set(network: str) -> ProviderSet:
+    """
+    Returns the provider set of a network, made of its Infura and Ankr endpoints.
+
+    :param network: Network name, eg. Optimism
+    :return: ProviderSet instance
+    """
+    network = network.lower()
+
+    # Contracts are created from many threads at once, each network must get a single set
+    with provider_sets_lock:
+        if network not in provider_sets:
+            endpoints = [endpoint for endpoint in (infura_endpoints.get(network), ankr_endpoints.get(network))
+                         if endpoint]
+            provider_sets[network] = ProviderSet(network, endpoints)
+
+        return provider_sets[network]
+
+
+def create_web3(network: str, web3_endpoint: str = "", failover: bool = False, hedge: bool = False) -> Web3:
+    """
+    Creates a Web3 instance bound to one endpoint, or to all endpoints of the network.
+
+    :param network: Network name, eg. Optimism
+    :param web3_endpoint: Node provider network url endpoint, used when failover is off
+    :param failover: Route requests through the network's provider set
+    :param hedge: Hedge every request, only used with failover
+    :return: Web3 instance, with its network name as 'network' to key its reads in the read cache
+    """
+
+    if failover:
+        w3 = Web3(ProviderSetHTTPProvider(get_provider_set(network), hedge=hedge))
+    else:
+        w3 = Web3(Web3.HTTPProvider(web3_endpoint))
+
+    w3.network = network.lower()
+
+    return w3
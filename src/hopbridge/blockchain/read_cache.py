@@ -0,0 +1,179 @@
+"""
+Memoization of contract reads pinned to a block, so duplicate reads of one chain state never reach the node.
+"""
+from threading import Lock
+from time import monotonic
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import (
+    Callable,
+    Dict,
+    Tuple,
+)
+
+
+class ReadCache:
+
+    def __init__(self, max_size: int = 4096, head_ttl: float = 15):
+        """
+        Results of eth_calls keyed by (chain, contract, calldata, block). A read at a given block can
+        never change, so entries are only dropped when their chain's head advances past their block,
+        or, least recently used first, when the cache is full. Concurrent misses of the same key
+        wait for the first one instead of sending a duplicate request.
+        Chains are keyed by network name, and their heads are learned from one shared poll per chain,
+        eg. the BlockWatcher's, never by the reads themselves.
+
+        :param max_size: Max number of results kept
+        :param head_ttl: Secs a learned head block is used to pin reads, older heads are ignored
+        """
+
+        self.max_size = max_size
+        self.head_ttl = head_ttl
+
+        self.entries: OrderedDict = OrderedDict()
+        self.pending: Dict[tuple, Future] = {}
+        # Network name -> (head block, monotonic time it was learned)
+        self.heads: Dict[str, Tuple[int, float]] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def key(chain: str, contract_address: str, calldata: str, block: int) -> tuple:
+        """Cache key of one read."""
+
+        return chain, contract_address.lower(), calldata.lower(), block
+
+    def head(self, chain: str) -> int or None:
+        """
+        Returns the head block of a chain if it was learned less than head_ttl secs ago.
+
+        :param chain: Network name
+        :return: Block number, None if unknown or too old
+        """
+
+        with self.lock:
+            head = self.heads.get(chain)
+
+        if head is None or monotonic() - head[1] > self.head_ttl:
+            return None
+
+        return head[0]
+
+    def advance(self, chain: str, block: int) -> None:
+        """
+        Records the head block of a chain and evicts its reads at older blocks.
+
+        :param chain: Network name
+        :param block: Latest block number
+        :return: None
+        """
+
+        with self.lock:
+            previous = self.heads.get(chain, (None, 0))[0]
+            if previous is not None and block < previous:
+                return None
+
+            self.heads[chain] = (block, monotonic())
+            if previous is None or block == previous:
+                return None
+
+            stale = [key for key in self.entries if key[0] == chain and key[3] < block]
+            for key in stale:
+                del self.entries[key]
+
+    def get_or_call(self, key: tuple, call: Callable[[], object]):
+        """
+        Returns the cached result of a read, or runs it once and caches its result.
+        Failed reads are not cached.
+
+        :param key: Output of ReadCache.key
+        :param call: Function that performs the read
+        :return: Result of the read
+        """
+
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+            # Same read already in flight - wait for its result
+            future = self.pending.get(key)
+            waiting = future is not None
+            if waiting:
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self.pending[key] = Future()
+
+        if waiting:
+            return future.result()
+
+        try:
+            result = call()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            self.put(key, result)
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+
+        return result
+
+    def lookup(self, key: tuple) -> Tuple[bool, object]:
+        """
+        Looks a read up without running it, for callers that run reads themselves, eg. in an event loop.
+
+        :param key: Output of ReadCache.key
+        :return: (found, result) tuple
+        """
+
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return True, self.entries[key]
+
+            self.misses += 1
+
+        return False, None
+
+    def put(self, key: tuple, result) -> None:
+        """
+        Caches the result of a read, unless its block is already behind its chain's head.
+
+        :param key: Output of ReadCache.key
+        :param result: Result of the read
+        :return: None
+        """
+
+        with self.lock:
+            head = self.heads.get(key[0])
+            if head is not None and key[3] < head[0]:
+                return None
+
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Returns the cache's counters.
+
+        :return: Dictionary of hits, misses, hit rate and size
+        """
+
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0,
+                    "size": len(self.entries)}
+
+
+# Read cache shared by all contracts of a process
+read_cache = ReadCache()
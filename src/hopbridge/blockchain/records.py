@@ -0,0 +1,153 @@
+"""
+Compact transaction records decoded from block explorer and node responses.
+"""
+import json
+
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+
+class TxnRecord:
+
+    __slots__ = ("hash", "block_number", "timestamp", "from_addr", "to_addr", "value", "function_name")
+
+    # Explorer field name -> attribute, for code that reads records like explorer dictionaries
+    FIELDS: Dict[str, str] = {
+        "hash": "hash",
+        "blockNumber": "block_number",
+        "timeStamp": "timestamp",
+        "from": "from_addr",
+        "to": "to_addr",
+        "value": "value",
+        "functionName": "function_name",
+    }
+
+    def __init__(self, txn_hash: str, block_number: int, timestamp: int, from_addr: str, to_addr: str,
+                 value: int, function_name: str = ""):
+        """
+        Transaction with only the fields the scanners use, numbers converted once.
+
+        :param txn_hash: Transaction hash
+        :param block_number: Block number
+        :param timestamp: Unix timestamp of the block
+        :param from_addr: Sender address, lower case
+        :param to_addr: Receiver address, lower case
+        :param value: Value in wei
+        :param function_name: Called function signature, eg. swap(uint8,uint8,uint256,uint256,uint256)
+        """
+
+        self.hash = txn_hash
+        self.block_number = block_number
+        self.timestamp = timestamp
+        self.from_addr = from_addr
+        self.to_addr = to_addr
+        self.value = value
+        self.function_name = function_name
+
+    @classmethod
+    def from_dict(cls, txn: dict) -> "TxnRecord":
+        """
+        Decodes an explorer txlist item.
+
+        :param txn: Transaction dictionary
+        :return: TxnRecord instance
+        """
+
+        return cls(txn['hash'], int(txn['blockNumber']), int(txn['timeStamp']), txn['from'].lower(),
+                   txn['to'].lower(), int(txn['value'] or 0), txn.get('functionName') or "")
+
+    def __getitem__(self, key: str):
+        """Reads a field by its explorer name, eg. txn['blockNumber']."""
+
+        try:
+            return getattr(self, self.FIELDS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        """Reads a field by its explorer name, default if the record has no such field."""
+
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.hash}, block {self.block_number})"
+
+
+class Erc20TxnRecord(TxnRecord):
+
+    __slots__ = ("token_symbol", "decimals", "amount", "log_index")
+
+    FIELDS: Dict[str, str] = {
+        **TxnRecord.FIELDS,
+        "tokenSymbol": "token_symbol",
+        "tokenDecimal": "decimals",
+        "logIndex": "log_index",
+    }
+
+    def __init__(self, txn_hash: str, block_number: int, timestamp: int, from_addr: str, to_addr: str,
+                 value: int, token_symbol: str, decimals: int, log_index: int = None):
+        """
+        Token transfer with its amount in whole tokens, rounded to decimals // 6 digits.
+
+        :param txn_hash: Transaction hash
+        :param block_number: Block number
+        :param timestamp: Unix timestamp of the block
+        :param from_addr: Sender address, lower case
+        :param to_addr: Receiver address, lower case
+        :param value: Amount in token precision
+        :param token_symbol: Token symbol, eg. USDC
+        :param decimals: Token decimals precision
+        :param log_index: Index of the log in its block, None if the explorer does not return it
+        """
+        super().__init__(txn_hash, block_number, timestamp, from_addr, to_addr, value)
+
+        self.token_symbol = token_symbol
+        self.decimals = decimals
+        self.amount = round(float(value / 10 ** decimals), decimals // 6)
+        self.log_index = log_index
+
+    @classmethod
+    def from_dict(cls, txn: dict) -> "Erc20TxnRecord":
+        """
+        Decodes an explorer tokentx item.
+
+        :param txn: Transaction dictionary
+        :return: Erc20TxnRecord instance
+        """
+
+        log_index = txn.get('logIndex')
+
+        return cls(txn['hash'], int(txn['blockNumber']), int(txn['timeStamp']), txn['from'].lower(),
+                   txn['to'].lower(), int(txn['value']), txn['tokenSymbol'], int(txn['tokenDecimal']),
+                   int(log_index) if log_index not in (None, "") else None)
+
+
+def decode_response(raw: bytes or str, record: type = TxnRecord) -> dict:
+    """
+    Decodes an explorer response, turning every transaction into a record as soon as its fields are parsed.
+    Only the fields of the record are collected, so no full explorer dictionary is built.
+    Transactions that can not be decoded are left as dictionaries.
+
+    :param raw: Response body
+    :param record: Record class of the transactions, TxnRecord or Erc20TxnRecord
+    :return: Response dictionary with a list of records as 'result', if the call succeeded
+    """
+
+    def decode_object(pairs: List[Tuple[str, object]]):
+        fields = {key: value for key, value in pairs if key in record.FIELDS}
+        if 'hash' in fields and 'blockNumber' in fields:
+            try:
+                return record.from_dict(fields)
+            except (KeyError, ValueError, TypeError, AttributeError):
+                return dict(pairs)
+
+        return dict(pairs)
+
+    return json.loads(raw, object_pairs_hook=decode_object)
+
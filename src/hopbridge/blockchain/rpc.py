@@ -0,0 +1,88 @@
+"""
+Raw JSON-RPC helpers for talking to node providers without going through web3.
+"""
+from typing import (
+    List,
+    Tuple,
+)
+
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.variables import http_session
+
+
+def rpc_batch_request(endpoint: str, calls: List[Tuple[str, list]], timeout: float = 10) -> list:
+    """
+    Sends a list of JSON-RPC calls to a node as a single batch request.
+
+    :param endpoint: Node provider network url endpoint
+    :param calls: List of (method, params) tuples
+    :param timeout: Max number of secs to wait for request
+    :return: List of results in the order of calls, None for every call that returned an error
+    """
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+               for i, (method, params) in enumerate(calls)]
+
+    response = http_session.post(endpoint, json=payload, timeout=timeout)
+    replies = response.json()
+
+    # Providers answer with a single error object if the whole batch is rejected
+    if not isinstance(replies, list):
+        raise ValueError(f"Batch request rejected by {endpoint} - {replies}")
+
+    results = [None] * len(calls)
+    for reply in replies:
+        if 'error' in reply:
+            log_error.warning(f"'RPCError' - {calls[reply['id']][0]} on {endpoint} - {reply['error']}")
+            continue
+
+        results[reply['id']] = reply['result']
+
+    return results
+
+
+def rpc_request(endpoint: str, method: str, params: list, timeout: float = 10):
+    """
+    Sends a single JSON-RPC call to a node.
+
+    :param endpoint: Node provider network url endpoint
+    :param method: JSON-RPC method name, eg. eth_blockNumber
+    :param params: List of method parameters
+    :param timeout: Max number of secs to wait for request
+    :return: Result field of the response
+    """
+    payload = {"jsonrpc": "2.0", "id": 0, "method": method, "params": params}
+
+    response = http_session.post(endpoint, json=payload, timeout=timeout)
+    reply = response.json()
+
+    if 'error' in reply:
+        raise ValueError(f"'RPCError' - {method} on {endpoint} - {reply['error']}")
+
+    return reply['result']
+
+
+def get_block_number(endpoint: str, timeout: float = 10) -> int:
+    """
+    Queries the latest block number of a network.
+
+    :param endpoint: Node provider network url endpoint
+    :param timeout: Max number of secs to wait for request
+    :return: Latest block number
+    """
+    return int(rpc_request(endpoint, "eth_blockNumber", [], timeout), 16)
+
+
+def eth_call_batch(endpoint: str, calls: List[Tuple[str, str]], block: int, timeout: float = 10) -> list:
+    """
+    Sends a list of eth_call requests as one batch request, all pinned to the same block.
+
+    :param endpoint: Node provider network url endpoint
+    :param calls: List of (contract address, call data) tuples
+    :param block: Block number to execute all calls at
+    :param timeout: Max number of secs to wait for request
+    :return: List of hex encoded return data in the order of calls, None for every failed call
+    """
+    block_tag = hex(block)
+    rpc_calls = [("eth_call", [{"to": address, "data": data}, block_tag]) for address, data in calls]
+
+    return rpc_batch_request(endpoint, rpc_calls, timeout)
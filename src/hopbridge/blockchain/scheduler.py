@@ -0,0 +1,226 @@
+"""
+Schedule scanning work on new blocks instead of fixed sleeps.
+"""
+from math import floor
+from concurrent.futures import ThreadPoolExecutor
+from time import (
+    sleep,
+    monotonic,
+)
+from typing import (
+    Dict,
+    List,
+    Set,
+    Tuple,
+)
+
+from src.hopbridge.blockchain.rpc import get_block_number
+from src.hopbridge.blockchain.read_cache import read_cache
+from src.hopbridge.blockchain.records import TxnRecord
+from src.hopbridge.common.logger import log_error
+
+
+class FixedRateTimer:
+
+    def __init__(self, interval: float):
+        """
+        Timer that ticks at a fixed rate, independent of how long the work between ticks takes.
+
+        :param interval: Seconds between ticks
+        """
+
+        self.interval = interval
+        self.next_tick = monotonic() + interval
+
+    def wait(self) -> None:
+        """
+        Sleeps until the next tick. Ticks missed while working are skipped rather than run back to back.
+
+        :return: None
+        """
+        now = monotonic()
+
+        if self.next_tick > now:
+            sleep(self.next_tick - now)
+            self.next_tick += self.interval
+
+        elif self.interval > 0:
+            # Work overran - continue at once and realign to the next tick on the schedule
+            missed = floor((now - self.next_tick) / self.interval) + 1
+            self.next_tick += missed * self.interval
+
+        else:
+            self.next_tick = now
+
+
+class BlockWatcher:
+
+    def __init__(self, endpoints: Dict[str, str], fallback_interval: float = 10, timeout: float = 3):
+        """
+        Tracks the head block of several networks with cheap 'eth_blockNumber' polls.
+
+        :param endpoints: Dictionary of network name -> node provider url endpoint
+        :param fallback_interval: Secs after which a network is triggered anyway if its head can not be polled
+        :param timeout: Max number of secs to wait for each poll
+        """
+
+        self.endpoints = {network.lower(): endpoint for network, endpoint in endpoints.items()}
+        self.fallback_interval = fallback_interval
+        self.timeout = timeout
+
+        self.heads = {network: None for network in self.endpoints}
+        self.last_trigger = {network: 0.0 for network in self.endpoints}
+
+        self.pool = ThreadPoolExecutor(max_workers=max(len(self.endpoints), 1))
+
+    def get_head(self, network: str) -> int or None:
+        """
+        Queries the latest block number of a network.
+
+        :param network: Network name
+        :return: Latest block number, None if the node did not respond
+        """
+
+        try:
+            return get_block_number(self.endpoints[network], self.timeout)
+        except Exception as e:
+            log_error.warning(f"'BlockWatcher' - Unable to fetch block number for {network} - {e}")
+            return None
+
+    def poll(self) -> Set[str]:
+        """
+        Polls all networks at once and returns the ones whose head block moved since the last poll.
+        Networks that can not be polled are returned once every fallback_interval secs.
+
+        :return: Set of network names to trigger
+        """
+        networks = list(self.endpoints)
+        heads = self.pool.map(self.get_head, networks)
+
+        now = monotonic()
+        triggered = set()
+        for network, head in zip(networks, heads):
+            if head is None:
+                moved = now - self.last_trigger[network] >= self.fallback_interval
+            else:
+                moved = self.heads[network] is None or head > self.heads[network]
+                self.heads[network] = max(head, self.heads[network] or 0)
+                read_cache.advance(network, head)
+
+            if moved:
+                triggered.add(network)
+                self.last_trigger[network] = now
+
+        return triggered
+
+
+class AdaptivePoller:
+
+    def __init__(self, count: int, min_interval: float = 2, max_interval: float = 600, backoff: float = 2,
+                 smoothing: float = 0.3, target_arrivals: float = 1):
+        """
+        Gives each contract its own polling interval from its observed transaction arrival rate.
+        The rate is an EWMA of the arrivals seen per poll. After a poll that found transactions the interval
+        is set so that about target_arrivals are expected per poll, after an empty poll it grows by backoff,
+        but never past what the contract's rate calls for. Intervals stay within the given bounds.
+
+        :param count: Number of contracts
+        :param min_interval: Min secs between polls of a contract
+        :param max_interval: Max secs between polls of a contract, or a list with one bound per contract
+        :param backoff: Factor the interval grows by after an empty poll
+        :param smoothing: Weight of the latest poll in the arrival rate estimate, 0 to 1
+        :param target_arrivals: Transactions expected per poll on a busy contract
+        """
+
+        self.min_interval = min_interval
+        self.max_intervals = max_interval if isinstance(max_interval, list) else [max_interval] * count
+        self.backoff = backoff
+        self.smoothing = smoothing
+        self.target_arrivals = target_arrivals
+
+        now = monotonic()
+        # Arrivals per sec, interval, time of last poll and time the next poll is due of each contract
+        self.rates = [0.0] * count
+        self.intervals = [min_interval] * count
+        self.last_poll = [now] * count
+        self.next_poll = [now] * count
+
+    def clamp(self, index: int, interval: float) -> float:
+        """Keeps an interval within the bounds of a contract."""
+
+        return min(max(interval, self.min_interval), self.max_intervals[index])
+
+    def seed(self, index: int, txns: List[TxnRecord]) -> None:
+        """
+        Estimates a contract's arrival rate from the timestamps of its transaction history.
+
+        :param index: Contract index
+        :param txns: List of transaction records
+        :return: None
+        """
+        stamps = sorted({txn.timestamp for txn in txns if txn.timestamp})
+
+        if len(stamps) >= 2 and stamps[-1] > stamps[0]:
+            self.rates[index] = (len(stamps) - 1) / (stamps[-1] - stamps[0])
+            self.intervals[index] = self.clamp(index, self.target_arrivals / self.rates[index])
+
+    def record(self, index: int, new_txns: int) -> None:
+        """
+        Updates a contract's arrival rate and interval after a poll.
+
+        :param index: Contract index
+        :param new_txns: Number of new transactions the poll found
+        :return: None
+        """
+        now = monotonic()
+        elapsed = max(now - self.last_poll[index], 1e-3)
+
+        rate = self.smoothing * new_txns / elapsed + (1 - self.smoothing) * self.rates[index]
+        self.rates[index] = rate
+
+        if new_txns > 0:
+            interval = self.target_arrivals / rate
+        else:
+            interval = self.intervals[index] * self.backoff
+            if rate > 0:
+                interval = min(interval, self.target_arrivals / rate)
+
+        self.intervals[index] = self.clamp(index, interval)
+        self.last_poll[index] = now
+        self.next_poll[index] = now + self.intervals[index]
+
+    def due(self) -> List[int]:
+        """
+        Returns the contracts due for a poll.
+
+        :return: List of contract indices
+        """
+        now = monotonic()
+
+        return [index for index, next_poll in enumerate(self.next_poll) if next_poll <= now]
+
+    def wait_time(self) -> float:
+        """Secs until the next contract is due, 0 if one is due now."""
+
+        return max(min(self.next_poll) - monotonic(), 0)
+
+    def expected_latency(self, index: int) -> float:
+        """
+        Expected secs between a transaction landing and the poll that detects it. Arrivals are
+        spread evenly over an interval, so on average they wait half of it.
+
+        :param index: Contract index
+        :return: Expected detection latency in secs
+        """
+
+        return self.intervals[index] / 2
+
+    def report(self) -> List[Tuple[int, float, float, float]]:
+        """
+        Returns the current schedule of every contract.
+
+        :return: List of (index, arrivals per hour, interval in secs, expected detection latency in secs)
+        """
+
+        return [(index, self.rates[index] * 3600, self.intervals[index], self.expected_latency(index))
+                for index in range(len(self.rates))]
@@ -0,0 +1,128 @@
+"""
+Bounded index of already seen transactions.
+"""
+from math import (
+    ceil,
+    log,
+)
+from hashlib import blake2b
+from collections import deque
+from typing import (
+    List,
+    Iterable,
+)
+
+from src.hopbridge.blockchain.records import TxnRecord
+
+
+def txn_key(txn: TxnRecord or dict) -> str:
+    """
+    Identifies one transfer, a transaction can hold several, eg. a Transfer and a TokenSwap.
+
+    :param txn: Transaction record or explorer dictionary
+    :return: Hash and log index, or hash, sender, receiver and value if the log index is unknown
+    """
+    log_index = txn.get('logIndex')
+    if log_index is not None:
+        return f"{txn['hash']}:{log_index}"
+
+    return f"{txn['hash']}:{txn.get('from')}:{txn.get('to')}:{txn.get('value')}"
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """
+        Space efficient set membership with no false negatives and a bounded false positive rate.
+
+        :param capacity: Number of items the filter is sized for
+        :param error_rate: False positive rate once capacity items are added
+        """
+
+        self.size = ceil(-capacity * log(error_rate) / log(2) ** 2)
+        self.hash_count = max(round(self.size / capacity * log(2)), 1)
+        self.bits = bytearray(ceil(self.size / 8))
+
+    def indices(self, key: str) -> Iterable[int]:
+        """Bit positions of a key, derived from two halves of one digest."""
+
+        digest = blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str) -> None:
+        """Adds a key to the filter."""
+
+        for index in self.indices(key):
+            self.bits[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, key: str) -> bool:
+        """Checks if a key was probably added."""
+
+        return all(self.bits[index >> 3] & (1 << (index & 7)) for index in self.indices(key))
+
+
+class SeenTxns:
+
+    def __init__(self, max_size: int = 10000, bloom_capacity: int = 0):
+        """
+        Remembers the most recent max_size transfer keys with O(1) lookups and evictions.
+        Evicted keys can be kept in a Bloom filter for long retention at a few bits per key.
+
+        :param max_size: Max number of keys kept exactly
+        :param bloom_capacity: Number of evicted keys the Bloom filter is sized for, 0 to forget them
+        """
+
+        self.max_size = max_size
+        self.hashes = set()
+        self.order = deque()
+        self.bloom = BloomFilter(bloom_capacity) if bloom_capacity > 0 else None
+
+    def __contains__(self, txn_hash: str) -> bool:
+        return txn_hash in self.hashes or (self.bloom is not None and txn_hash in self.bloom)
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def add(self, txn_hash: str) -> None:
+        """
+        Adds a key, evicting the oldest one if the index is full.
+
+        :param txn_hash: Transfer key, see txn_key
+        :return: None
+        """
+        if txn_hash in self.hashes:
+            return None
+
+        if len(self.order) >= self.max_size:
+            oldest = self.order.popleft()
+            self.hashes.discard(oldest)
+
+            if self.bloom is not None:
+                self.bloom.add(oldest)
+
+        self.hashes.add(txn_hash)
+        self.order.append(txn_hash)
+
+    def filter_new(self, txns: List[TxnRecord]) -> list:
+        """
+        Returns the transfers not seen before and marks all of them as seen, keyed by txn_key.
+        Each transfer is marked as soon as it is checked, so a transfer repeated within txns is returned once,
+        while several transfers of one transaction are all returned.
+
+        :param txns: List of transaction records
+        :return: List of transactions whose transfer was not seen before
+        """
+
+        new_txns = []
+        for txn in txns:
+            key = txn_key(txn)
+            if key in self:
+                continue
+
+            self.add(key)
+            new_txns.append(txn)
+
+        return new_txns
@@ -0,0 +1,191 @@
+"""
+Push-based transaction detection over WebSocket eth_subscribe, with HTTP backfill after reconnects.
+"""
+import json
+import asyncio
+
+from time import time
+from collections import OrderedDict
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+import websockets
+
+from src.hopbridge.blockchain.logs import LogScanner
+from src.hopbridge.blockchain.records import Erc20TxnRecord
+from src.hopbridge.common.logger import log_error
+
+
+class SubscriptionEngine:
+
+    def __init__(self, network: str, ws_endpoint: str, scanners: List[Tuple[int, LogScanner]],
+                 on_txns: Callable[[int, List[Erc20TxnRecord]], None], reconnect_delay: float = 1,
+                 max_reconnect_delay: float = 60, timeout: float = 10):
+        """
+        Subscribes to newHeads and to the logs of every scanner of one network, and hands each decoded
+        transaction to on_txns as soon as it is pushed. After every (re)connect the blocks missed while
+        disconnected are scanned over HTTP, so no transaction is lost between subscriptions.
+
+        :param network: Network name, eg. Optimism
+        :param ws_endpoint: Node provider WebSocket url endpoint
+        :param scanners: List of (index, scanner), index is passed back to on_txns
+        :param on_txns: Function called with (index, list of transaction records)
+        :param reconnect_delay: Secs to wait before the first reconnect, doubled after each failed attempt
+        :param max_reconnect_delay: Max secs to wait before a reconnect
+        :param timeout: Max number of secs to wait for a subscription reply
+        """
+
+        self.network = network.lower()
+        self.ws_endpoint = ws_endpoint
+        self.scanners = scanners
+        self.on_txns = on_txns
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.timeout = timeout
+
+        # Subscription id -> index in self.scanners, None for newHeads
+        self.subscriptions: Dict[str, int or None] = {}
+        # Timestamps of the latest heads, so pushed logs need no extra request
+        self.timestamps: OrderedDict = OrderedDict()
+
+        self.request_id = 0
+
+    async def request(self, ws, method: str, params: list):
+        """
+        Sends a JSON-RPC request and waits for its reply, handling notifications received meanwhile.
+
+        :param ws: Open WebSocket connection
+        :param method: JSON-RPC method name, eg. eth_subscribe
+        :param params: List of method parameters
+        :return: Result field of the reply
+        """
+        self.request_id += 1
+        request_id = self.request_id
+        await ws.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.recv(), self.timeout))
+
+            if message.get('id') == request_id:
+                if 'error' in message:
+                    raise ValueError(f"'RPCError' - {method} on {self.network} - {message['error']}")
+                return message['result']
+
+            self.handle(message)
+
+    async def subscribe(self, ws) -> None:
+        """Subscribes to new heads and to the logs of every scanner."""
+
+        self.subscriptions = {}
+
+        subscription_id = await self.request(ws, "eth_subscribe", ["newHeads"])
+        self.subscriptions[subscription_id] = None
+
+        for position, (_, scanner) in enumerate(self.scanners):
+            # Read once over HTTP, off the event loop
+            if scanner.swaps:
+                await asyncio.to_thread(scanner.resolve_swap_address, self.timeout)
+
+            for log_filter in scanner.log_filters():
+                subscription_id = await self.request(ws, "eth_subscribe", ["logs", log_filter])
+                self.subscriptions[subscription_id] = position
+
+    async def backfill(self) -> None:
+        """Scans every scanner's blocks since its last scanned block over HTTP."""
+
+        results = await asyncio.gather(*[scanner.get_new_txns() for _, scanner in self.scanners])
+
+        for (index, _), txns in zip(self.scanners, results):
+            if txns:
+                self.on_txns(index, txns)
+
+    def handle(self, message: dict) -> None:
+        """
+        Handles one subscription notification.
+
+        :param message: Parsed WebSocket message
+        :return: None
+        """
+        if message.get('method') != "eth_subscription":
+            return None
+
+        params = message['params']
+        if params['subscription'] not in self.subscriptions:
+            return None
+
+        position = self.subscriptions[params['subscription']]
+        result = params['result']
+
+        # New head - only remember its timestamp, a head whose logs were not pushed yet must be scanned again
+        if position is None:
+            block = int(result['number'], 16)
+            self.timestamps[block] = int(result['timestamp'], 16)
+            while len(self.timestamps) > 64:
+                self.timestamps.popitem(last=False)
+            return None
+
+        if result.get('removed'):
+            return None
+
+        index, scanner = self.scanners[position]
+        block = int(result['blockNumber'], 16)
+        timestamp = self.timestamps.get(block, int(time()))
+
+        txn = scanner.decode_log(result, timestamp)
+        if txn is not None:
+            self.on_txns(index, [txn])
+
+        # The scanner's cursor moves with the logs it processed, the backfill after a reconnect starts there
+        if scanner.block is not None and block > scanner.block:
+            scanner.block = block
+
+    async def run(self) -> None:
+        """Keeps the subscriptions open forever, reconnecting and backfilling after every disconnect."""
+
+        delay = self.reconnect_delay
+        while True:
+            try:
+                async with websockets.connect(self.ws_endpoint, ping_interval=20, ping_timeout=20) as ws:
+                    await self.subscribe(ws)
+
+                    # Subscribed first, so blocks pushed during the backfill are not missed
+                    await self.backfill()
+                    delay = self.reconnect_delay
+
+                    async for raw_message in ws:
+                        self.handle(json.loads(raw_message))
+
+            # WebSocketException covers closed connections and rejected handshakes, eg. an HTTP 429,
+            # KeyError and JSONDecodeError malformed replies
+            except (websockets.WebSocketException, OSError, asyncio.TimeoutError, json.JSONDecodeError, KeyError,
+                    TypeError, ValueError) as e:
+                log_error.warning(f"'SubscriptionEngine' - {self.network} disconnected, "
+                                  f"reconnecting in {delay} secs - {e}")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+
+async def poll_scanners(scanners: List[Tuple[int, LogScanner]], on_txns: Callable[[int, List[Erc20TxnRecord]], None],
+                        interval: float) -> None:
+    """
+    Scans over HTTP every interval secs, for networks with no WebSocket endpoint.
+
+    :param scanners: List of (index, scanner), index is passed back to on_txns
+    :param on_txns: Function called with (index, list of transaction records)
+    :param interval: Secs between scans
+    :return: None
+    """
+
+    while True:
+        results = await asyncio.gather(*[scanner.get_new_txns() for _, scanner in scanners])
+
+        for (index, _), txns in zip(scanners, results):
+            if txns:
+                on_txns(index, txns)
+
+        await asyncio.sleep(interval)
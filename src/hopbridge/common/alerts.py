@@ -0,0 +1,117 @@
+"""
+Alert state machine that turns repeated arbitrage sightings into open, update and close notices.
+"""
+from threading import Lock
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+
+from src.hopbridge.common.dispatcher import dispatcher
+
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_LENGTH = 4096
+
+
+class AlertTracker:
+
+    def __init__(self, size_change: float = 0.25, arb_change: float = 0.25, digest: bool = True):
+        """
+        Tracks open arbitrage opportunities per route and token. An opportunity is alerted when it opens,
+        again only when its size or arbitrage moves by the given fraction, and once more when it closes.
+        Alerts are collected and sent as one digest message per loop.
+
+        :param size_change: Min relative change of the swap amount that triggers an update
+        :param arb_change: Min relative change of the arbitrage that triggers an update
+        :param digest: Collect alerts until flush, otherwise send each alert at once
+        """
+
+        self.size_change = size_change
+        self.arb_change = arb_change
+        self.digest = digest
+
+        self.open: Dict[str, Tuple[float, float]] = {}
+        self.lines: List[str] = []
+
+        self.lock = Lock()
+
+    @staticmethod
+    def changed(old: float, new: float, threshold: float) -> bool:
+        """Checks if a value moved by more than a relative threshold."""
+
+        if old == 0:
+            return new != 0
+
+        return abs(new - old) / abs(old) >= threshold
+
+    def update(self, key: str, amount: float, arbitrage: float) -> str or None:
+        """
+        Records a qualifying opportunity.
+
+        :param key: Route and token key, eg. 'USDC ethereum->polygon'
+        :param amount: Swap in amount
+        :param arbitrage: Arbitrage at that amount
+        :return: 'open' or 'update' if the opportunity should be alerted, None otherwise
+        """
+
+        with self.lock:
+            if key not in self.open:
+                self.open[key] = (amount, arbitrage)
+                return "open"
+
+            old_amount, old_arbitrage = self.open[key]
+            if self.changed(old_amount, amount, self.size_change) or \
+                    self.changed(old_arbitrage, arbitrage, self.arb_change):
+                self.open[key] = (amount, arbitrage)
+                return "update"
+
+            return None
+
+    def close(self, key: str) -> bool:
+        """
+        Records that an opportunity is no longer there.
+
+        :param key: Route and token key
+        :return: True if the opportunity was open and a close notice should be sent
+        """
+
+        with self.lock:
+            return self.open.pop(key, None) is not None
+
+    def alert(self, message: str) -> None:
+        """
+        Adds a message to this loop's digest, or sends it at once if digests are off.
+
+        :param message: Alert message
+        :return: None
+        """
+
+        if not self.digest:
+            dispatcher.submit(message)
+            return None
+
+        with self.lock:
+            self.lines.append(message)
+
+    def flush(self) -> None:
+        """
+        Sends all alerts collected since the last flush as one message, split only if too long.
+
+        :return: None
+        """
+
+        with self.lock:
+            lines, self.lines = self.lines, []
+
+        chunk = ""
+        for line in lines:
+            if chunk and len(chunk) + len(line) + 1 > MAX_MESSAGE_LENGTH:
+                dispatcher.submit(chunk)
+                chunk = ""
+
+            chunk = f"{chunk}\n{line}" if chunk else line
+
+        if chunk:
+            dispatcher.submit(chunk)
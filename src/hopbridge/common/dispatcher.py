@@ -0,0 +1,192 @@
+"""
+Background Telegram alert dispatcher, so scanning never waits on notification I/O.
+"""
+from atexit import register
+from queue import (
+    Queue,
+    Full,
+)
+from threading import (
+    Lock,
+    Thread,
+)
+from time import (
+    sleep,
+    monotonic,
+)
+from typing import Dict
+
+from requests import Session
+from requests.adapters import HTTPAdapter
+
+from src.hopbridge.common.rate_limit import TokenBucket
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.variables import (
+    TOKEN,
+    CHAT_ID_ALERTS,
+)
+
+
+class TelegramDispatcher:
+
+    def __init__(self, max_queue: int = 200, high_water: float = 0.8, rate: float = 20 / 60, burst: int = 5,
+                 max_retries: int = 3, timeout: float = 10):
+        """
+        Sends Telegram messages from a background thread through a bounded queue and a pooled session.
+        Each chat has its own token bucket, and 'retry_after' answers pause that chat's bucket.
+        Under back-pressure low priority messages are dropped first, then all new messages.
+
+        :param max_queue: Max number of messages waiting to be sent
+        :param high_water: Queue fill ratio above which low priority messages are dropped
+        :param rate: Messages per sec allowed to each chat, Telegram allows 20 per minute in groups
+        :param burst: Max number of messages sent to a chat back to back
+        :param max_retries: Max number of attempts for a message Telegram did not accept
+        :param timeout: Max secs to wait for POST request
+        """
+
+        self.queue = Queue(maxsize=max_queue)
+        self.high_water = int(max_queue * high_water)
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        self.buckets: Dict[str, TokenBucket] = {}
+
+        self.session = Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+        self.counters = {"queued": 0, "sent": 0, "dropped": 0, "failed": 0, "retried": 0}
+        self.lock = Lock()
+
+        self.thread = None
+
+    def count(self, counter: str) -> None:
+        """Increments a metrics counter."""
+
+        with self.lock:
+            self.counters[counter] += 1
+
+    def metrics(self) -> Dict[str, int]:
+        """
+        Returns dispatcher metrics.
+
+        :return: Dictionary with current queue depth and message counters
+        """
+
+        with self.lock:
+            return {"queue_depth": self.queue.qsize(), **self.counters}
+
+    def summary(self) -> str:
+        """Returns the metrics as one line for the loop reports."""
+
+        metrics = self.metrics()
+
+        return f"Telegram dispatcher: {metrics['queue_depth']:,} waiting, {metrics['queued']:,} queued, " \
+               f"{metrics['sent']:,} sent, {metrics['retried']:,} retried, {metrics['failed']:,} failed, " \
+               f"{metrics['dropped']:,} dropped."
+
+    def submit(self, message_text: str, telegram_chat_id: str = "", low_priority: bool = False,
+               disable_web_page_preview: bool = True) -> bool:
+        """
+        Queues a message for sending and returns immediately.
+
+        :param message_text: Text message to send
+        :param telegram_chat_id: Telegram chat ID, default is 'CHAT_ID_ALERTS' from .env file
+        :param low_priority: Message may be dropped first when the queue fills up
+        :param disable_web_page_preview: Set web preview on/off
+        :return: True if the message was queued, False if it was dropped
+        """
+        # Alerting threads submit concurrently, only one of them may start the worker
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = Thread(target=self.run, name="telegram-dispatcher", daemon=True)
+                self.thread.start()
+
+        if low_priority and self.queue.qsize() >= self.high_water:
+            self.count("dropped")
+            log_error.warning(f"'TelegramDispatcher' - Queue above high water, dropped '{message_text}'")
+            return False
+
+        chat_id = str(telegram_chat_id) if telegram_chat_id else CHAT_ID_ALERTS
+        try:
+            self.queue.put_nowait((str(message_text), chat_id, disable_web_page_preview))
+        except Full:
+            self.count("dropped")
+            log_error.warning(f"'TelegramDispatcher' - Queue full, dropped '{message_text}'")
+            return False
+
+        self.count("queued")
+        return True
+
+    def run(self) -> None:
+        """Sends queued messages forever. Runs in the dispatcher thread."""
+
+        while True:
+            message_text, chat_id, disable_web_page_preview = self.queue.get()
+            try:
+                self.send(message_text, chat_id, disable_web_page_preview)
+            except Exception as e:
+                self.count("failed")
+                log_error.warning(f"'TelegramDispatcher' - {e} - '{message_text}' was not sent.")
+            finally:
+                self.queue.task_done()
+
+    def send(self, message_text: str, chat_id: str, disable_web_page_preview: bool = True) -> None:
+        """
+        Sends one message, respecting the chat's rate limit and Telegram's 'retry_after'.
+
+        :param message_text: Text message to send
+        :param chat_id: Telegram chat ID
+        :param disable_web_page_preview: Set web preview on/off
+        :return: None
+        """
+        bucket = self.buckets.get(chat_id)
+        if bucket is None:
+            bucket = self.buckets[chat_id] = TokenBucket(self.rate, self.burst)
+
+        url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
+        payload = {"chat_id": chat_id, "text": message_text,
+                   "disable_web_page_preview": disable_web_page_preview, "parse_mode": "HTML"}
+
+        for attempt in range(1, self.max_retries + 1):
+            bucket.acquire()
+
+            reply = self.session.post(url=url, data=payload, timeout=self.timeout).json()
+            if reply.get('ok'):
+                self.count("sent")
+                return None
+
+            retry_after = reply.get('parameters', {}).get('retry_after')
+            if retry_after is None:
+                break
+
+            # Rate limited - hold back every message to this chat, not just this one
+            self.count("retried")
+            bucket.pause(float(retry_after))
+
+        self.count("failed")
+        log_error.warning(f"'TelegramDispatcher' - Telegram message not sent after {attempt} attempts - {reply}")
+
+    def flush(self, timeout: float = 10) -> bool:
+        """
+        Waits for queued messages to be sent.
+
+        :param timeout: Max secs to wait
+        :return: True if the queue was emptied
+        """
+        deadline = monotonic() + timeout
+
+        while self.queue.unfinished_tasks and monotonic() < deadline:
+            if self.thread is None or not self.thread.is_alive():
+                return False
+            sleep(0.1)
+
+        return not self.queue.unfinished_tasks
+
+
+# Dispatcher shared by all alerting code of a process
+dispatcher = TelegramDispatcher()
+
+# Give queued alerts a chance to go out before the program exits
+register(dispatcher.flush)
@@ -91,6 +91,7 @@ def exit_handler(
         program_name: str = "",
         telegram_chat_id: str = "",
         info: str = "",
+        on_exit: Callable[[], None] = None,
 ) -> None:
     """
     Sends a notification message in Telegram to notify of program termination.
@@ -98,8 +99,14 @@ def exit_handler(
     :param program_name: Name of running program
     :param telegram_chat_id: Telegram Chat ID to send message to
     :param info: Additional info to include in debug message
+    :param on_exit: Shutdown hook to run first, eg. to close open sessions
     :returns: None
     """
+    if on_exit is not None:
+        try:
+            on_exit()
+        except Exception as e:
+            info = f"{info}\nShutdown hook failed - {e}"
 
     timestamp = datetime.now().astimezone().strftime(time_format)
 
@@ -16,10 +16,10 @@ def logger_setup(
     :param level: Logger level of severity
     :returns: An instance of the Logger class
     """
-    # Set up formatting style
+    # Set up formatting style, the file is opened on the first record
     formatter = logging.Formatter(log_format)
 
-    handler = logging.FileHandler(filename)
+    handler = logging.FileHandler(filename, delay=True)
     handler.setFormatter(formatter)
 
     # Create logger with name, level and handler
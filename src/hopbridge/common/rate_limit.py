@@ -0,0 +1,84 @@
+"""
+Token bucket rate limiting.
+"""
+from threading import Lock
+from time import (
+    sleep,
+    monotonic,
+)
+
+
+class TokenBucket:
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Allows bursts of up to capacity calls, refilled at rate calls per sec. Thread safe.
+
+        :param rate: Tokens added per sec
+        :param capacity: Max number of tokens the bucket holds
+        """
+
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+
+        self.lock = Lock()
+
+    def refill(self) -> None:
+        """Adds the tokens accrued since the last update. Must be called holding the lock."""
+
+        now = monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, tokens: float = 1) -> float:
+        """
+        Secs until the bucket holds the given number of tokens.
+
+        :param tokens: Number of tokens needed
+        :return: Secs to wait, 0 if available now
+        """
+
+        with self.lock:
+            self.refill()
+            return max(tokens - self.tokens, 0) / self.rate
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        Takes tokens from the bucket if available.
+
+        :param tokens: Number of tokens to take
+        :return: True if the tokens were taken
+        """
+
+        with self.lock:
+            self.refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+
+            return False
+
+    def acquire(self, tokens: float = 1) -> None:
+        """
+        Blocks until tokens are available and takes them.
+
+        :param tokens: Number of tokens to take
+        :return: None
+        """
+
+        while not self.try_acquire(tokens):
+            sleep(self.wait_time(tokens))
+
+    def pause(self, secs: float) -> None:
+        """
+        Empties the bucket for the given number of secs, eg. when the server asks to retry later.
+
+        :param secs: Secs before the next token is available
+        :return: None
+        """
+
+        with self.lock:
+            self.refill()
+            self.tokens = min(self.tokens, 1 - secs * self.rate)
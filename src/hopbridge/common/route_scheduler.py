@@ -0,0 +1,86 @@
+"""
+Spend each loop's quoting budget on the routes most likely to hold an arbitrage.
+"""
+from time import monotonic
+from typing import List
+
+
+class RouteScheduler:
+
+    def __init__(self, min_arbs: List[float], budget: int, max_staleness: float = 60, smoothing: float = 0.3):
+        """
+        Picks the routes to quote each loop. Routes not quoted for max_staleness secs are always picked,
+        the rest of the budget goes to the routes with the highest score: how close their last arbitrage
+        was to min_arb, plus how much it has been moving, plus how long ago they were quoted.
+
+        :param min_arbs: Min arbitrage of each route
+        :param budget: Max number of routes quoted per loop, stale routes may exceed it
+        :param max_staleness: Max secs a route goes without a quote
+        :param smoothing: Weight of the latest change in the volatility estimate, 0 to 1
+        """
+
+        self.min_arbs = [abs(float(min_arb)) or 1 for min_arb in min_arbs]
+        self.budget = budget
+        self.max_staleness = max_staleness
+        self.smoothing = smoothing
+
+        count = len(min_arbs)
+        # Last arbitrage, EWMA of its absolute change and time of the last quote of each route
+        self.arbs: List[float or None] = [None] * count
+        self.volatility = [0.0] * count
+        self.last_quote = [0.0] * count
+
+    def score(self, index: int, now: float) -> float:
+        """
+        Rates how urgently a route should be quoted, relative to its min arbitrage.
+
+        :param index: Route index
+        :param now: Current monotonic time
+        :return: Score, higher is quoted first
+        """
+        age = (now - self.last_quote[index]) / self.max_staleness
+
+        # Never quoted - quote as soon as the budget allows
+        if self.arbs[index] is None:
+            return float("inf")
+
+        closeness = min(max(self.arbs[index] / self.min_arbs[index], -1), 2)
+
+        return closeness + self.volatility[index] / self.min_arbs[index] + age
+
+    def select(self) -> List[int]:
+        """
+        Returns the routes to quote this loop.
+
+        :return: List of route indices, stale routes first
+        """
+        now = monotonic()
+        routes = range(len(self.arbs))
+
+        stale = sorted((index for index in routes if now - self.last_quote[index] >= self.max_staleness),
+                       key=lambda index: self.last_quote[index])
+
+        stale_set = set(stale)
+        fresh = sorted((index for index in routes if index not in stale_set),
+                       key=lambda index: self.score(index, now), reverse=True)
+
+        return stale + fresh[:max(self.budget - len(stale), 0)]
+
+    def record(self, index: int, arbitrage: float or None) -> None:
+        """
+        Records the result of a route's quote.
+
+        :param index: Route index
+        :param arbitrage: Best arbitrage of the quote, None if the quote failed
+        :return: None
+        """
+
+        if arbitrage is None:
+            return None
+
+        if self.arbs[index] is not None:
+            change = abs(arbitrage - self.arbs[index])
+            self.volatility[index] = self.smoothing * change + (1 - self.smoothing) * self.volatility[index]
+
+        self.arbs[index] = arbitrage
+        self.last_quote[index] = monotonic()
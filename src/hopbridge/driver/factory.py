@@ -0,0 +1,30 @@
+"""
+Create Chrome web driver instances.
+"""
+from atexit import register
+from copy import deepcopy
+
+from selenium.webdriver import Chrome
+from webdriver_manager.chrome import ChromeDriverManager
+
+from src.hopbridge.driver.options import options
+
+
+def create_driver(performance_log: bool = False) -> Chrome:
+    """
+    Opens a new Chromium web driver, quit automatically when the script exits.
+
+    :param performance_log: Record DevTools network events, read with driver.get_log('performance')
+    :return: Chrome webdriver instance
+    """
+    driver_options = options
+    if performance_log:
+        driver_options = deepcopy(options)
+        driver_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = Chrome(ChromeDriverManager().install(), options=driver_options)
+
+    # Quit chrome driver after whole script has finished execution
+    register(driver.quit)
+
+    return driver
@@ -0,0 +1,129 @@
+"""
+Pool of Chrome web drivers that work through a queue of pages concurrently.
+"""
+from queue import Queue
+from threading import (
+    Lock,
+    Thread,
+)
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+from selenium.webdriver import Chrome
+from selenium.common.exceptions import WebDriverException
+
+from src.hopbridge.driver.factory import create_driver
+from src.hopbridge.common.logger import log_error
+
+
+class BrowserPool:
+
+    def __init__(self, workers: int = 4, performance_log: bool = False):
+        """
+        Runs tasks on a fixed number of worker threads, each owning its own Chrome driver.
+        A worker checks its driver is responsive before every task, opens a new one if not,
+        and resets its page to about:blank after every task.
+
+        :param workers: Number of worker threads and drivers
+        :param performance_log: Open drivers that record DevTools network events
+        """
+
+        self.workers = max(int(workers), 1)
+        self.performance_log = performance_log
+        self.tasks = Queue()
+
+        self.drivers: List[Chrome or None] = [None] * self.workers
+        self.stats: List[Dict[str, int]] = [{"tasks": 0, "failures": 0, "restarts": 0} for _ in range(self.workers)]
+
+        # Drivers are opened one at a time, the driver manager download is not thread safe
+        self.lock = Lock()
+
+        self.threads = [Thread(target=self.run, args=(index,), name=f"browser-{index}", daemon=True)
+                        for index in range(self.workers)]
+        for thread in self.threads:
+            thread.start()
+
+    @staticmethod
+    def healthy(driver: Chrome) -> bool:
+        """Checks that a driver still answers commands."""
+
+        try:
+            driver.execute_script("return document.readyState")
+            return True
+        except WebDriverException:
+            return False
+
+    def restart(self, index: int) -> Chrome:
+        """
+        Quits a worker's driver, if any, and opens a new one.
+
+        :param index: Worker index
+        :return: New Chrome webdriver instance
+        """
+        old_driver = self.drivers[index]
+        self.drivers[index] = None
+
+        if old_driver is not None:
+            self.stats[index]['restarts'] += 1
+            try:
+                old_driver.quit()
+            except Exception:
+                pass
+
+        with self.lock:
+            self.drivers[index] = create_driver(self.performance_log)
+
+        return self.drivers[index]
+
+    def run(self, index: int) -> None:
+        """Executes queued tasks forever. Runs in the worker thread."""
+
+        while True:
+            func, args, results, position = self.tasks.get()
+            try:
+                driver = self.drivers[index]
+                if driver is None or not self.healthy(driver):
+                    driver = self.restart(index)
+
+                results[position] = func(driver, *args)
+                self.stats[index]['tasks'] += 1
+
+                # Leave a blank page so the next task starts from a fresh load
+                driver.get("about:blank")
+
+            except Exception as e:
+                self.stats[index]['failures'] += 1
+                log_error.warning(f"'BrowserPool' - Worker {index} - {e}")
+
+            finally:
+                self.tasks.task_done()
+
+    def map(self, func: Callable, args_list: List[tuple]) -> list:
+        """
+        Runs func(driver, *args) for every args in the list, spread over all workers,
+        and waits for all of them to finish.
+
+        :param func: Function taking a driver as first argument
+        :param args_list: List of argument tuples, one per task
+        :return: List of results in the order of args_list, None for failed tasks
+        """
+        results = [None] * len(args_list)
+
+        for position, args in enumerate(args_list):
+            self.tasks.put((func, args, results, position))
+
+        self.tasks.join()
+
+        return results
+
+    def metrics(self) -> List[Dict[str, int]]:
+        """
+        Returns per worker counters.
+
+        :return: List of dictionaries with tasks done, failures and driver restarts of each worker
+        """
+
+        return [dict(stats) for stats in self.stats]
@@ -0,0 +1,219 @@
+"""
+Asyncio engine that quotes every Hop AMM route as an independent task.
+"""
+import asyncio
+
+from typing import (
+    List,
+    Dict,
+)
+
+from aiohttp import (
+    ClientSession,
+    ClientTimeout,
+    TCPConnector,
+)
+from web3 import (
+    AsyncWeb3,
+    AsyncHTTPProvider,
+)
+from web3.contract import AsyncContract
+from web3.exceptions import ContractLogicError
+
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.read_cache import read_cache
+from src.hopbridge.evm_scanner.helpers import alert_arb
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.logger import log_error
+
+
+class AsyncQuoteEngine:
+
+    def __init__(self, endpoints: Dict[str, str], timeout: float = 10, connection_limit: int = 20,
+                 tracker: AlertTracker = None):
+        """
+        Quotes Hop AMM contracts with web3's async provider and one shared connection pool per chain.
+
+        :param endpoints: Dictionary of network name -> node provider url endpoint
+        :param timeout: Max number of secs each route may take before it is dropped for the loop
+        :param connection_limit: Max number of open connections to each node
+        :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+        """
+
+        self.endpoints = {network.lower(): endpoint for network, endpoint in endpoints.items()}
+        self.timeout = timeout
+        self.connection_limit = connection_limit
+        self.tracker = tracker
+
+        self.sessions = {}
+        self.web3s = {}
+        self.contracts = {}
+        # Reads in flight, so a duplicate read of the same block awaits the first one
+        self.pending: Dict[tuple, asyncio.Future] = {}
+
+    async def connect(self) -> None:
+        """
+        Opens one connection pool and async web3 instance per chain. Must run inside the event loop
+        that later runs check_arbs.
+
+        :return: None
+        """
+
+        for network, endpoint in self.endpoints.items():
+            connector = TCPConnector(limit=self.connection_limit, ttl_dns_cache=300)
+            session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout))
+
+            provider = AsyncHTTPProvider(endpoint)
+            await provider.cache_async_session(session)
+
+            self.sessions[network] = session
+            self.web3s[network] = AsyncWeb3(provider)
+
+    async def close(self) -> None:
+        """
+        Closes all connection pools.
+
+        :return: None
+        """
+
+        for session in self.sessions.values():
+            await session.close()
+
+        self.sessions = {}
+
+    def get_contract(self, contract: EvmContract) -> AsyncContract:
+        """
+        Returns an async twin of an initialised EvmContract, bound to its chain's connection pool.
+
+        :param contract: EvmContract instance
+        :return: web3 AsyncContract instance
+        """
+        key = (contract.name, contract.contract.address)
+
+        if key not in self.contracts:
+            w3 = self.web3s[contract.name]
+            self.contracts[key] = w3.eth.contract(address=contract.contract.address, abi=contract.contract.abi)
+
+        return self.contracts[key]
+
+    @staticmethod
+    def get_head(network: str) -> int or str:
+        """
+        Returns the head block of a chain learned by the BlockWatcher, so reads never wait for an extra
+        'eth_blockNumber' round trip.
+
+        :param network: Network name
+        :return: Block number, 'latest' if no recent head is known
+        """
+        block = read_cache.head(network)
+
+        return block if block is not None else "latest"
+
+    async def call_swap(self, contract: EvmContract, func_args: list, block: int) -> int:
+        """
+        Calls 'calculateSwap' at a block, answered from the read cache when the same read was already made.
+        Reads at 'latest' are only shared while in flight, never cached. A pinned read the node rejects,
+        eg. a lagging provider without the head block yet, is made again at 'latest'.
+
+        :param contract: EvmContract instance
+        :param func_args: calculateSwap arguments
+        :param block: Block number to pin the read to, or 'latest'
+        :return: Swap out amount in token precision
+        """
+        calldata = EvmContract.encode_contract_function(contract.contract, 'calculateSwap', func_args)
+        key = read_cache.key(contract.name, contract.contract.address, calldata, block)
+        pinned = block != "latest"
+
+        if pinned:
+            found, result = read_cache.lookup(key)
+            if found:
+                return result
+
+        if key not in self.pending:
+            call = self.get_contract(contract).functions.calculateSwap(*func_args).call(block_identifier=block)
+            self.pending[key] = asyncio.ensure_future(call)
+            self.pending[key].add_done_callback(lambda _: self.pending.pop(key, None))
+
+        try:
+            result = await asyncio.shield(self.pending[key])
+        except ContractLogicError:
+            raise
+        except ValueError:
+            if not pinned:
+                raise
+            return await self.call_swap(contract, func_args, "latest")
+
+        if pinned:
+            read_cache.put(key, result)
+
+        return result
+
+    async def calculate_swap(self, contract: EvmContract, swap_amounts: tuple, decimals: int) -> tuple:
+        """
+        Calculates the swap out amounts of one route, all amounts concurrently and pinned to the same block.
+
+        :param contract: EvmContract instance
+        :param swap_amounts: Amounts to swap in
+        :param decimals: Token decimals precision
+        :return: (swap_ins, swap_outs) tuple of the amounts that were quoted
+        """
+        block = self.get_head(contract.name)
+
+        calls = [self.call_swap(contract, [1, 0, int(amount * 10 ** decimals)], block) for amount in swap_amounts]
+        replies = await asyncio.gather(*calls, return_exceptions=True)
+
+        swap_ins = []
+        swap_outs = []
+        for amount, reply in zip(swap_amounts, replies):
+            if isinstance(reply, Exception):
+                log_error.warning(f"'calculateSwap' Error on {contract.name} - {reply}")
+                continue
+
+            swap_ins.append(amount)
+            swap_outs.append(float(reply / 10 ** decimals))
+
+        return tuple(swap_ins), swap_outs
+
+    async def check_arb(self, contract: EvmContract, swap_amounts: tuple, decimals: int, token: str,
+                        min_arb: int, *_) -> float or None:
+        """
+        Checks one HOP contract for swap out amount within the engine's timeout and notifies
+        if arbitrage is found.
+
+        :param contract: EVM contract instance
+        :param swap_amounts: Swap out amounts
+        :param decimals: Token decimals precision
+        :param token: Token name
+        :param min_arb: Min arbitrage required
+        :return: Highest arbitrage found, None if the contract could not be quoted
+        """
+        if contract.contract is None:
+            return None
+
+        try:
+            swap_ins, swap_outs = await asyncio.wait_for(self.calculate_swap(contract, swap_amounts, decimals),
+                                                         self.timeout)
+        except asyncio.TimeoutError:
+            log_error.warning(f"'calculateSwap' Timed out after {self.timeout} secs on {contract.name}")
+            return None
+
+        return alert_arb(swap_ins, swap_outs, token, min_arb, contract.name, self.tracker)
+
+    async def check_arbs(self, arb_args: List[list]) -> List[float or None]:
+        """
+        Checks all routes as independent tasks, so a slow chain never delays the others.
+
+        :param arb_args: List of [EvmContract, swap_amounts, decimals, token, min_arb] arguments
+        :return: Highest arbitrage of each route, None for routes that could not be quoted
+        """
+
+        results = await asyncio.gather(*[self.check_arb(*arg) for arg in arb_args], return_exceptions=True)
+
+        arbs = []
+        for arg, result in zip(arb_args, results):
+            if isinstance(result, Exception):
+                log_error.warning(f"'AsyncQuoteEngine' Error on {arg[0].name} - {result}")
+                result = None
+            arbs.append(result)
+
+        return arbs
@@ -0,0 +1,154 @@
+"""
+Hop bridge fees read from the L2 bridge contracts behind each AMM wrapper.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    List,
+    Dict,
+    Tuple,
+)
+
+from web3 import Web3
+
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.variables import (
+    ankr_endpoints,
+    hop_amm_addresses,
+    hop_amm_wrapper_addresses,
+)
+
+
+# Bonder fee in basis points if the L2 bridge of a route can not be read
+DEFAULT_BONDER_FEE_BPS = 4
+
+AMM_WRAPPER_ABI = [
+    {"inputs": [], "name": "bridge", "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "exchangeAddress",
+     "outputs": [{"internalType": "address", "name": "", "type": "address"}],
+     "stateMutability": "view", "type": "function"},
+]
+
+L2_BRIDGE_ABI = [
+    {"inputs": [], "name": "minBonderBps", "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+    {"inputs": [], "name": "minBonderFeeAbsolute",
+     "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+     "stateMutability": "view", "type": "function"},
+]
+
+
+class BridgeFees:
+
+    def __init__(self, bonder_fee_bps: float = DEFAULT_BONDER_FEE_BPS, min_bonder_fee: int = 0,
+                 relayer_fee: int = 0):
+        """
+        Fees of one coin on one chain, all in token precision.
+
+        :param bonder_fee_bps: Bonder fee in basis points, charged on transfers out of the chain
+        :param min_bonder_fee: Min bonder fee, 'minBonderFeeAbsolute' of the L2 bridge
+        :param relayer_fee: Fee paid to the relayer of transfers from Ethereum into the chain
+        """
+
+        self.bonder_fee_bps = bonder_fee_bps
+        self.min_bonder_fee = int(min_bonder_fee)
+        self.relayer_fee = int(relayer_fee)
+
+    def bonder_fee(self, amount: int) -> int:
+        """
+        Bonder fee of a transfer out of the chain, same minimum as 'L2_Bridge.send' enforces.
+
+        :param amount: hToken amount sent in token precision
+        :return: Fee in token precision
+        """
+
+        return max(int(amount * self.bonder_fee_bps) // 10000, self.min_bonder_fee)
+
+
+def amm_address(coin: str, network: str, w3: Web3 = None) -> str or None:
+    """
+    Returns the Hop AMM (Saddle Swap) address of a coin on a chain, read from its AMM wrapper if not configured.
+
+    :param coin: Token code, eg. USDC
+    :param network: Network name, eg. gnosis
+    :param w3: Web3 instance of the chain, one bound to its Ankr endpoint if None
+    :return: Checksum address, None if the chain has no known AMM for the coin
+    """
+    coin, network = coin.upper(), network.lower()
+
+    if network in hop_amm_addresses.get(coin, {}):
+        return hop_amm_addresses[coin][network]
+
+    wrapper_address = hop_amm_wrapper_addresses.get(coin, {}).get(network)
+    if wrapper_address is None:
+        return None
+
+    w3 = w3 if w3 is not None else Web3(Web3.HTTPProvider(ankr_endpoints[network]))
+    wrapper = w3.eth.contract(address=Web3.to_checksum_address(wrapper_address), abi=AMM_WRAPPER_ABI)
+    try:
+        return wrapper.functions.exchangeAddress().call()
+    except Exception as e:
+        log_error.warning(f"'BridgeFees' - Unable to read the {coin} AMM on {network} - {e}")
+        return None
+
+
+def read_bridge_fees(coin: str, network: str, bonder_fee_bps: float = None, relayer_fee: int = 0,
+                     w3: Web3 = None) -> BridgeFees:
+    """
+    Reads the bonder fee parameters of a coin's L2 bridge, found through its AMM wrapper.
+    A configured bonder_fee_bps is used if above the bridge's 'minBonderBps'.
+
+    :param coin: Token code, eg. USDC
+    :param network: Network name, eg. gnosis
+    :param bonder_fee_bps: Configured bonder fee in basis points, None to use the bridge's
+    :param relayer_fee: Relayer fee of transfers from Ethereum in token precision
+    :param w3: Web3 instance of the chain, one bound to its Ankr endpoint if None
+    :return: BridgeFees instance, with DEFAULT_BONDER_FEE_BPS if the bridge could not be read
+    """
+    coin, network = coin.upper(), network.lower()
+    default_bps = bonder_fee_bps if bonder_fee_bps is not None else DEFAULT_BONDER_FEE_BPS
+
+    wrapper_address = hop_amm_wrapper_addresses.get(coin, {}).get(network)
+    if wrapper_address is None:
+        log_error.warning(f"'BridgeFees' - No Hop AMM wrapper known for {coin} on {network}, "
+                          f"using {default_bps} bps")
+        return BridgeFees(default_bps, 0, relayer_fee)
+
+    w3 = w3 if w3 is not None else Web3(Web3.HTTPProvider(ankr_endpoints[network]))
+    try:
+        wrapper = w3.eth.contract(address=Web3.to_checksum_address(wrapper_address), abi=AMM_WRAPPER_ABI)
+        bridge = w3.eth.contract(address=wrapper.functions.bridge().call(), abi=L2_BRIDGE_ABI)
+
+        min_bps = bridge.functions.minBonderBps().call()
+        min_fee = bridge.functions.minBonderFeeAbsolute().call()
+    except Exception as e:
+        log_error.warning(f"'BridgeFees' - Unable to read the {coin} bridge on {network}, "
+                          f"using {default_bps} bps - {e}")
+        return BridgeFees(default_bps, 0, relayer_fee)
+
+    bps = max(min_bps, bonder_fee_bps) if bonder_fee_bps is not None else min_bps
+
+    return BridgeFees(bps, min_fee, relayer_fee)
+
+
+def load_bridge_fees(routes: List[Tuple[str, str, int]], bonder_fee_bps: Dict[str, float] = {},
+                     relayer_fee: Dict[str, Dict[str, float]] = {}) -> Dict[Tuple[str, str], BridgeFees]:
+    """
+    Reads the fees of many coins and chains at once.
+
+    :param routes: List of (coin, network, decimals) tuples
+    :param bonder_fee_bps: Dictionary of coin -> configured bonder fee in basis points
+    :param relayer_fee: Dictionary of coin -> network -> relayer fee in whole tokens
+    :return: Dictionary of (coin, network) -> BridgeFees
+    """
+    routes = list(dict.fromkeys((coin.upper(), network.lower(), int(decimals)) for coin, network, decimals in routes))
+
+    def read(route: Tuple[str, str, int]) -> BridgeFees:
+        coin, network, decimals = route
+        fee = relayer_fee.get(coin, {}).get(network, 0)
+        return read_bridge_fees(coin, network, bonder_fee_bps.get(coin), int(fee * 10 ** decimals))
+
+    with ThreadPoolExecutor(max_workers=max(len(routes), 1)) as pool:
+        fees = list(pool.map(read, routes))
+
+    return {(coin, network): fee for (coin, network, _), fee in zip(routes, fees)}
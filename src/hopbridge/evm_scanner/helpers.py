@@ -1,9 +1,21 @@
 from datetime import datetime
 from tabulate import tabulate
-from typing import Iterable
+from typing import (
+    List,
+    Dict,
+    Iterable,
+)
 
 from src.hopbridge.blockchain.evm import EvmContract
-from src.hopbridge.common.message import telegram_send_message
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.evm_scanner.stableswap import read_pool_states
+from src.hopbridge.evm_scanner.optimizer import find_optimal_swap
+from src.hopbridge.blockchain.rpc import (
+    get_block_number,
+    eth_call_batch,
+)
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.dispatcher import dispatcher
 from src.hopbridge.common.logger import (
     log_error,
     log_arbitrage,
@@ -42,6 +54,21 @@ def print_start_message(arguments: list) -> None:
                    tablefmt="fancy_grid", numalign="left", stralign="left", colalign="left"))
 
 
+def print_best_routes(routes: List[tuple]) -> None:
+    """Prints the best routes of the route matrix.
+
+    :param routes: Output of RouteMatrix.best_routes
+    """
+
+    table = [[coin, src, dest, f"{amount:,}", f"{arbitrage:,.3f} {coin}"]
+             for coin, src, dest, amount, arbitrage in routes]
+
+    columns = ["Token", "From", "To", "Swap_amount", "Arbitrage"]
+
+    print(tabulate(table, headers=columns, showindex=True,
+                   tablefmt="fancy_grid", numalign="left", stralign="left", colalign="left"))
+
+
 def calculate_swap(contract: EvmContract, swap_amounts: tuple, decimals: int) -> list:
     """
     Calculates the swap out amount for an initialised Evm Contract.
@@ -67,7 +94,164 @@ def calculate_swap(contract: EvmContract, swap_amounts: tuple, decimals: int) ->
     return out_amounts
 
 
-def alert_arb(swap_ins: Iterable, swap_outs: Iterable, token: str, min_arb: int, network: str) -> None:
+def group_by_network(arb_args: List[list]) -> Dict[str, List[list]]:
+    """
+    Groups route arguments by the node endpoint of their contract.
+
+    :param arb_args: List of [EvmContract, swap_amounts, decimals, token, min_arb] arguments
+    :return: Dictionary of node endpoint -> list of route arguments
+    """
+
+    networks = {}
+    for arg in arb_args:
+        networks.setdefault(arg[0].web3_endpoint, []).append(arg)
+
+    return networks
+
+
+def calculate_swap_batch(routes: List[list], timeout: float = 10) -> List[tuple]:
+    """
+    Calculates the swap out amounts of all routes on one network, sending every 'calculateSwap'
+    call as a single JSON-RPC batch request pinned to the latest block.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, ...] arguments sharing a node endpoint
+    :param timeout: Max number of secs to wait for request
+    :return: List of (swap_ins, swap_outs) tuples, one for each route
+    """
+
+    results = [((), []) for _ in routes]
+
+    calls = []
+    owners = []
+    for i, (contract, swap_amounts, decimals, *_) in enumerate(routes):
+        if contract.contract is None:
+            continue
+
+        for amount in swap_amounts:
+            func_args = [1, 0, int(amount * 10 ** decimals)]
+            data = EvmContract.encode_contract_function(contract.contract, 'calculateSwap', func_args)
+
+            calls.append((contract.contract.address, data))
+            owners.append((i, amount))
+
+    if not calls:
+        return results
+
+    endpoint = routes[0][0].web3_endpoint
+    try:
+        block = get_block_number(endpoint, timeout)
+        replies = eth_call_batch(endpoint, calls, block, timeout)
+    except Exception as e:
+        log_error.warning(f"'calculateSwap' Batch error on {routes[0][0].name} - {e}")
+        return results
+
+    swap_ins = [[] for _ in routes]
+    swap_outs = [[] for _ in routes]
+    for (i, amount), reply in zip(owners, replies):
+        contract, _, decimals, *_ = routes[i]
+        if reply is None:
+            continue
+
+        try:
+            swap_out = EvmContract.decode_contract_output(contract.contract, 'calculateSwap', reply)
+        except Exception as e:
+            log_error.warning(f"'calculateSwap' Error on {contract.name} - {e}")
+            continue
+
+        swap_ins[i].append(amount)
+        swap_outs[i].append(float(swap_out / 10 ** decimals))
+
+    return [(tuple(ins), outs) for ins, outs in zip(swap_ins, swap_outs)]
+
+
+def calculate_swap_multicall(routes: List[list], multicall: Multicall) -> List[tuple]:
+    """
+    Calculates the swap out amounts of all routes on one network with a single Multicall3 eth_call.
+    A failing 'calculateSwap' only drops its own amount.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, ...] arguments sharing a node endpoint
+    :param multicall: Multicall instance for the routes' network
+    :return: List of (swap_ins, swap_outs) tuples, one for each route
+    """
+
+    owners = []
+    for i, (contract, swap_amounts, decimals, *_) in enumerate(routes):
+        if contract.contract is None:
+            continue
+
+        for amount in swap_amounts:
+            func_args = [1, 0, int(amount * 10 ** decimals)]
+            multicall.add_call(contract.contract, 'calculateSwap', func_args)
+            owners.append((i, amount))
+
+    swap_ins = [[] for _ in routes]
+    swap_outs = [[] for _ in routes]
+    try:
+        replies = multicall.execute()
+    except Exception as e:
+        log_error.warning(f"'calculateSwap' Multicall error on {routes[0][0].name} - {e}")
+        replies = []
+
+    for (i, amount), (success, swap_out) in zip(owners, replies):
+        if not success:
+            continue
+
+        decimals = routes[i][2]
+        swap_ins[i].append(amount)
+        swap_outs[i].append(float(swap_out / 10 ** decimals))
+
+    return [(tuple(ins), outs) for ins, outs in zip(swap_ins, swap_outs)]
+
+
+def calculate_swap_local(routes: List[list], multicall: Multicall) -> List[tuple]:
+    """
+    Calculates the swap out amounts of all routes on one network with the off-chain StableSwap
+    simulator. Pool states are read with a single Multicall3 eth_call, amounts are priced locally.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, ...] arguments sharing a node endpoint.
+        Routes with a search_range as 6th argument are quoted only at their optimal swap amount
+    :param multicall: Multicall instance for the routes' network
+    :return: List of (swap_ins, swap_outs, break_even) tuples, one for each route. break_even is the
+        (low, high) range of profitable amounts of a searched route, None otherwise
+    """
+
+    results = [((), [], None) for _ in routes]
+
+    live = [i for i, route in enumerate(routes) if route[0].contract is not None]
+    try:
+        states = read_pool_states([(routes[i][0].contract, routes[i][2]) for i in live], multicall)
+    except Exception as e:
+        log_error.warning(f"'calculateSwap' Pool state error on {routes[0][0].name} - {e}")
+        return results
+
+    for i, pool in zip(live, states):
+        if pool is None:
+            continue
+
+        contract, swap_amounts, decimals, *_ = routes[i]
+        search_range = routes[i][5] if len(routes[i]) > 5 else ()
+        try:
+            if search_range:
+                def quote(amount: float) -> float:
+                    return pool.calculate_swap(1, 0, int(round(amount, 2) * 10 ** decimals)) / 10 ** decimals
+
+                optimum = find_optimal_swap(quote, *search_range)
+                results[i] = ((round(optimum['amount'], 2),), [float(optimum['swap_out'])], optimum['break_even'])
+                continue
+
+            swap_outs = pool.calculate_swaps(1, 0, [int(amount * 10 ** decimals) for amount in swap_amounts])
+        except ValueError as e:
+            log_error.warning(f"'calculateSwap' Simulation error on {contract.name} - {e}")
+            continue
+
+        results[i] = (tuple(swap_amounts), [float(swap_out / 10 ** decimals) for swap_out in swap_outs], None)
+
+    return results
+
+
+def alert_arb(swap_ins: Iterable, swap_outs: Iterable, token: str, min_arb: int, network: str,
+              tracker: AlertTracker = None, src_network: str = "ethereum",
+              break_even: tuple = None) -> float or None:
     """
     Checks if arbitrage >= min_arb_required and alerts via Telegram message.
 
@@ -76,31 +260,97 @@ def alert_arb(swap_ins: Iterable, swap_outs: Iterable, token: str, min_arb: int,
     :param token: Name of token being arbitraged
     :param min_arb: Minimum arbitrage required
     :param network: Name of the blockchain network
-    :return: None
+    :param tracker: If given, only the best amount is alerted and only when the opportunity opens, changes or closes
+    :param src_network: Name of the blockchain network swapped from
+    :param break_even: If given, (low, high) range of amounts with a non-negative arbitrage, added to the alerts
+    :return: Highest arbitrage of all amounts, None if there were no quotes
     """
 
     url = f"https://app.hop.exchange/#/send?token={token.upper()}" \
-          f"&sourceNetwork=ethereum&destNetwork={network.lower()}"
+          f"&sourceNetwork={src_network.lower()}&destNetwork={network.lower()}"
+    src_label = "ETH" if src_network.lower() == "ethereum" else src_network.upper()
+
+    timestamp = datetime.now().astimezone().strftime(time_format)
+    color_sign = etherscans[network.lower()][2]
+    break_even_msg = f"-->Break-even: {break_even[0]:,.2f} - {break_even[1]:,.2f} {token}\n" if break_even else ""
 
+    best = None
+    highest_arb = None
     for swap_in, swap_out in zip(swap_ins, swap_outs):
         arbitrage = swap_out - swap_in
+        if highest_arb is None or arbitrage > highest_arb:
+            highest_arb = arbitrage
+
         if arbitrage >= min_arb:
 
-            timestamp = datetime.now().astimezone().strftime(time_format)
-            color_sign = etherscans[network.lower()][2]
             message = f"{timestamp} - hop_contract\n" \
-                      f"Swap {swap_in:,} {token} for {swap_out:,.3f} {token}; ETH -> {network.upper()}{color_sign}\n" \
-                      f"-->Arbitrage: <a href='{url}'>{arbitrage:,.3f} {token}</a>\n"
+                      f"Swap {swap_in:,} {token} for {swap_out:,.3f} {token}; " \
+                      f"{src_label} -> {network.upper()}{color_sign}\n" \
+                      f"-->Arbitrage: <a href='{url}'>{arbitrage:,.3f} {token}</a>\n" \
+                      f"{break_even_msg}"
 
             ter_msg = f"{timestamp}\n" \
-                      f"Swap {swap_in:,} {token} for {swap_out:,.3f} {token} Ethereum -> {network}\n" \
-                      f"-->Arbitrage: {arbitrage:,.3f} {token}\n"
+                      f"Swap {swap_in:,} {token} for {swap_out:,.3f} {token} " \
+                      f"{src_network.capitalize()} -> {network}\n" \
+                      f"-->Arbitrage: {arbitrage:,.3f} {token}\n" \
+                      f"{break_even_msg}"
 
-            telegram_send_message(message)
             log_arbitrage.info(ter_msg)
 
+            if tracker is None:
+                dispatcher.submit(message)
+            elif best is None or arbitrage > best[1]:
+                best = (swap_in, arbitrage, message)
+
+    if tracker is None:
+        return highest_arb
+
+    key = f"{token.upper()} {src_network.lower()}->{network.lower()}"
+    if best is not None:
+        event = tracker.update(key, best[0], best[1])
+        if event == "open":
+            tracker.alert(best[2])
+        elif event == "update":
+            tracker.alert(f"Updated - {best[2]}")
+
+    # Close only on a successful quote, a failed one says nothing about the opportunity
+    elif swap_outs and tracker.close(key):
+        tracker.alert(f"{timestamp} - hop_contract\n"
+                      f"Closed: {token} {src_label} -> {network.upper()}{color_sign} "
+                      f"arbitrage below {min_arb} {token}\n")
+
+    return highest_arb
+
+
+def calculate_optimal_swap(contract: EvmContract, search_range: tuple, decimals: int) -> tuple:
+    """
+    Searches for the swap in amount with the highest arbitrage, one 'calculateSwap' call per evaluation.
+
+    :param contract: EvmContract instance
+    :param search_range: (low, high) swap in amounts to search between
+    :param decimals: Token decimals precision
+    :return: (swap_ins, swap_outs, break_even) tuple with the optimal amount only, break_even is the
+        (low, high) range of profitable amounts, None if there is none
+    """
+
+    def quote(amount: float) -> float:
+        # Quote amounts rounded to cents so the reported swap in matches its swap out
+        func_args = [1, 0, int(round(amount, 2) * 10 ** decimals)]
+        swap_out = EvmContract.run_contract_function(contract.contract, 'calculateSwap', func_args)
 
-def check_arb(contract: EvmContract, swap_amounts: tuple, decimals: int, token: str, min_arb: int) -> None:
+        return swap_out / 10 ** decimals
+
+    try:
+        optimum = find_optimal_swap(quote, *search_range)
+    except Exception as e:
+        log_error.warning(f"'calculateSwap' Error on {contract.name} - {e}")
+        return (), [], None
+
+    return (round(optimum['amount'], 2),), [float(optimum['swap_out'])], optimum['break_even']
+
+
+def check_arb(contract: EvmContract, swap_amounts: tuple, decimals: int, token: str, min_arb: int,
+              search_range: tuple = (), tracker: AlertTracker = None) -> float or None:
     """
     Checks HOP contract for swap out amount and notifies if arbitrage is found.
 
@@ -109,10 +359,72 @@ def check_arb(contract: EvmContract, swap_amounts: tuple, decimals: int, token:
     :param decimals: Token decimals precision
     :param token: Token name
     :param min_arb: Min arbitrage required
-    :return:
+    :param search_range: If given, (low, high) amounts to search for the optimal swap amount instead
+    :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+    :return: Highest arbitrage found, None if the contract could not be quoted
     """
     network_name = contract.name
 
-    swap_outs = calculate_swap(contract, swap_amounts, decimals)
+    break_even = None
+    if search_range:
+        swap_amounts, swap_outs, break_even = calculate_optimal_swap(contract, search_range, decimals)
+    else:
+        swap_outs = calculate_swap(contract, swap_amounts, decimals)
+
+    return alert_arb(swap_amounts, swap_outs, token, min_arb, network_name, tracker, break_even=break_even)
+
+
+def check_arbs_batch(routes: List[list], tracker: AlertTracker = None) -> List[float or None]:
+    """
+    Checks all HOP contracts of one network with a single batch request and notifies
+    if arbitrage is found.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, token, min_arb] arguments sharing a node endpoint
+    :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+    :return: Highest arbitrage of each route, None for routes that could not be quoted
+    """
+    arbs = []
+    for route, (swap_ins, swap_outs) in zip(routes, calculate_swap_batch(routes)):
+        contract, _, _, token, min_arb, *_ = route
+
+        arbs.append(alert_arb(swap_ins, swap_outs, token, min_arb, contract.name, tracker))
+
+    return arbs
+
+
+def check_arbs_multicall(routes: List[list], multicall: Multicall, tracker: AlertTracker = None) -> List[float or None]:
+    """
+    Checks all HOP contracts of one network with a single Multicall3 eth_call and notifies
+    if arbitrage is found.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, token, min_arb] arguments sharing a node endpoint
+    :param multicall: Multicall instance for the routes' network
+    :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+    :return: Highest arbitrage of each route, None for routes that could not be quoted
+    """
+    arbs = []
+    for route, (swap_ins, swap_outs) in zip(routes, calculate_swap_multicall(routes, multicall)):
+        contract, _, _, token, min_arb, *_ = route
+
+        arbs.append(alert_arb(swap_ins, swap_outs, token, min_arb, contract.name, tracker))
+
+    return arbs
+
+
+def check_arbs_local(routes: List[list], multicall: Multicall, tracker: AlertTracker = None) -> List[float or None]:
+    """
+    Checks all HOP contracts of one network with the off-chain StableSwap simulator and notifies
+    if arbitrage is found.
+
+    :param routes: List of [EvmContract, swap_amounts, decimals, token, min_arb] arguments sharing a node endpoint
+    :param multicall: Multicall instance for the routes' network
+    :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+    :return: Highest arbitrage of each route, None for routes that could not be quoted
+    """
+    arbs = []
+    for route, (swap_ins, swap_outs, break_even) in zip(routes, calculate_swap_local(routes, multicall)):
+        contract, _, _, token, min_arb, *_ = route
+
+        arbs.append(alert_arb(swap_ins, swap_outs, token, min_arb, contract.name, tracker, break_even=break_even))
 
-    alert_arb(swap_amounts, swap_outs, token, min_arb, network_name)
+    return arbs
@@ -0,0 +1,81 @@
+"""
+Search for the swap amount that maximises arbitrage on a single route.
+"""
+from math import sqrt
+from typing import Callable
+
+
+# Fraction of the interval kept after each golden-section step
+INV_GOLDEN_RATIO = (sqrt(5) - 1) / 2
+
+
+def find_optimal_swap(quote: Callable[[float], float], low: float, high: float,
+                      tolerance: float = 0, break_even: bool = True) -> dict:
+    """
+    Finds the swap in amount that maximises 'swap_out - swap_in' with a golden-section search.
+    StableSwap output is concave in the input amount, so arbitrage has a single maximum.
+
+    :param quote: Function returning the swap out amount for a swap in amount
+    :param low: Smallest swap in amount to consider
+    :param high: Largest swap in amount to consider
+    :param tolerance: Width of the final search interval, default is 0.1% of the range
+    :param break_even: Also search for the amounts where arbitrage turns zero
+    :return: Dictionary with amount, swap_out, arbitrage, break_even bounds and number of quote evaluations
+    """
+    if tolerance <= 0:
+        tolerance = (high - low) / 1000
+
+    # Cache quotes so that no amount is evaluated twice
+    quotes = {}
+
+    def arbitrage(amount: float) -> float:
+        if amount not in quotes:
+            quotes[amount] = quote(amount)
+
+        return quotes[amount] - amount
+
+    a, b = low, high
+    c = b - INV_GOLDEN_RATIO * (b - a)
+    d = a + INV_GOLDEN_RATIO * (b - a)
+    while b - a > tolerance:
+        if arbitrage(c) >= arbitrage(d):
+            b, d = d, c
+            c = b - INV_GOLDEN_RATIO * (b - a)
+        else:
+            a, c = c, d
+            d = a + INV_GOLDEN_RATIO * (b - a)
+
+    # Compare the interval's best point with the range edges in case arbitrage is monotonic
+    amount = max((c, d, low, high), key=arbitrage)
+    best_arb = arbitrage(amount)
+
+    bounds = None
+    if break_even and best_arb > 0:
+        lower = low if arbitrage(low) >= 0 else bisect_zero(arbitrage, low, amount, tolerance)
+        upper = high if arbitrage(high) >= 0 else bisect_zero(arbitrage, high, amount, tolerance)
+        bounds = (lower, upper)
+
+    return {'amount': amount, 'swap_out': quotes[amount], 'arbitrage': best_arb,
+            'break_even': bounds, 'evaluations': len(quotes)}
+
+
+def bisect_zero(function: Callable[[float], float], negative: float, positive: float, tolerance: float) -> float:
+    """
+    Finds where a function changes sign between two points.
+
+    :param function: Continuous function
+    :param negative: Point where function is negative
+    :param positive: Point where function is non-negative
+    :param tolerance: Max distance of the result from the sign change
+    :return: Closest point with a non-negative value
+    """
+
+    while abs(positive - negative) > tolerance:
+        middle = (negative + positive) / 2
+
+        if function(middle) >= 0:
+            positive = middle
+        else:
+            negative = middle
+
+    return positive
@@ -0,0 +1,259 @@
+"""
+Quote every source x destination route of each token from one snapshot of all Hop AMM pools.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    List,
+    Dict,
+    Tuple,
+)
+
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.evm_scanner.stableswap import (
+    StableSwapPool,
+    read_pool_states,
+)
+from src.hopbridge.evm_scanner.bridge_fees import (
+    BridgeFees,
+    load_bridge_fees,
+)
+from src.hopbridge.evm_scanner.helpers import alert_arb
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.logger import log_error
+
+
+def source_leg(pools: Dict[str, StableSwapPool], src_network: str, amounts: List[int],
+               fees: Dict[str, BridgeFees] = {}) -> List[int] or None:
+    """
+    Calculates the hToken amount sent to the destination for each amount sold on the source.
+    Ethereum sends 1:1, an L2 swaps the canonical token to the hToken and deducts the bonder fee.
+
+    :param pools: Dictionary of network -> pool snapshot of one token
+    :param src_network: Blockchain to sell from
+    :param amounts: Amounts sold in token precision
+    :param fees: Dictionary of network -> fees of one token
+    :return: hToken amounts in token precision, None if the source pool is not available
+    """
+
+    if src_network == "ethereum":
+        return list(amounts)
+
+    if src_network not in pools:
+        return None
+
+    bridge_fees = fees.get(src_network, BridgeFees())
+
+    return [max(h_amount - bridge_fees.bonder_fee(h_amount), 0)
+            for h_amount in pools[src_network].calculate_swaps(0, 1, amounts)]
+
+
+def destination_leg(pools: Dict[str, StableSwapPool], src_network: str, dest_network: str, h_amounts: List[int],
+                    fees: Dict[str, BridgeFees] = {}) -> List[int] or None:
+    """
+    Calculates the amount received for each hToken amount arriving on the destination.
+    Transfers from Ethereum pay the destination's relayer fee. Ethereum redeems 1:1, an L2 swaps
+    the hToken to the canonical token.
+
+    :param pools: Dictionary of network -> pool snapshot of one token
+    :param src_network: Blockchain the hTokens were sent from
+    :param dest_network: Blockchain to receive from
+    :param h_amounts: hToken amounts in token precision, output of source_leg
+    :param fees: Dictionary of network -> fees of one token
+    :return: Amounts received in token precision, None if the destination pool is not available
+    """
+
+    if src_network == "ethereum":
+        relayer_fee = fees.get(dest_network, BridgeFees()).relayer_fee
+        h_amounts = [max(h_amount - relayer_fee, 0) for h_amount in h_amounts]
+
+    if dest_network == "ethereum":
+        return list(h_amounts)
+
+    if dest_network not in pools:
+        return None
+
+    return pools[dest_network].calculate_swaps(1, 0, h_amounts)
+
+
+def quote_route(pools: Dict[str, StableSwapPool], src_network: str, dest_network: str, amounts: List[int],
+                fees: Dict[str, BridgeFees] = {}) -> List[int] or None:
+    """
+    Calculates the amount received for each amount sent over one Hop route.
+    Ethereum -> L2: the hToken minted on the destination, less the relayer fee, is swapped to the canonical token.
+    L2 -> X: the canonical token is swapped to the hToken on the source, the bonder fee is deducted,
+    then the hToken is swapped back on the destination or redeemed 1:1 on Ethereum.
+
+    :param pools: Dictionary of network -> pool snapshot of one token
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :param amounts: Amounts sent in token precision
+    :param fees: Dictionary of network -> fees of one token, DEFAULT_BONDER_FEE_BPS for networks missing
+    :return: Amounts received in token precision, None if a pool of the route is not available
+    """
+
+    h_amounts = source_leg(pools, src_network, amounts, fees)
+    if h_amounts is None:
+        return None
+
+    return destination_leg(pools, src_network, dest_network, h_amounts, fees)
+
+
+class RouteMatrix:
+
+    def __init__(self, arb_args: List[list], multicalls: Dict[str, Multicall], bonder_fee_bps: Dict[str, float] = {},
+                 relayer_fee: Dict[str, Dict[str, float]] = {}):
+        """
+        Quotes all routes between Ethereum and every chain with a configured AMM, L2 -> L2 included,
+        in both directions. Each loop reads every pool once, with one Multicall3 call per chain,
+        and every route reuses those snapshots, so N chains give (N + 1) * N routes per token
+        for the cost of N pool reads.
+
+        :param arb_args: List of [EvmContract, swap_amounts, decimals, coin, min_arb, ...] arguments, one per AMM
+        :param multicalls: Dictionary of node endpoint -> Multicall instance
+        :param bonder_fee_bps: Dictionary of coin -> bonder fee in basis points for L2 sources, used if above
+            the L2 bridge's 'minBonderBps'
+        :param relayer_fee: Dictionary of coin -> network -> relayer fee in whole tokens of transfers from Ethereum
+        """
+
+        self.multicalls = multicalls
+
+        # Per coin: AMMs by network, decimals, all swap amounts configured and the smallest min arbitrage
+        self.coins: Dict[str, dict] = {}
+        for contract, swap_amounts, decimals, coin, min_arb, *_ in arb_args:
+            if contract.contract is None:
+                continue
+
+            data = self.coins.setdefault(coin.upper(), {"amms": {}, "decimals": int(decimals),
+                                                         "amounts": set(), "min_arb": min_arb})
+            data['amms'][contract.name] = contract
+            data['amounts'].update(swap_amounts)
+            data['min_arb'] = min(data['min_arb'], min_arb)
+
+        for data in self.coins.values():
+            data['amounts'] = sorted(data['amounts'])
+
+        # AMMs grouped by endpoint, each group is read with one multicall
+        self.groups: Dict[str, List[Tuple[str, object, int]]] = {}
+        for coin, data in self.coins.items():
+            for contract in data['amms'].values():
+                self.groups.setdefault(contract.web3_endpoint, []).append((coin, contract, data['decimals']))
+
+        self.pool = ThreadPoolExecutor(max_workers=max(len(self.groups), 1))
+
+        # Bonder fee parameters of every L2 bridge, read once
+        fees = load_bridge_fees([(coin, network, data['decimals']) for coin, data in self.coins.items()
+                                 for network in data['amms']], bonder_fee_bps, relayer_fee)
+        self.fees: Dict[str, Dict[str, BridgeFees]] = {coin: {} for coin in self.coins}
+        for (coin, network), bridge_fees in fees.items():
+            self.fees[coin][network] = bridge_fees
+
+    def routes(self, coin: str) -> List[Tuple[str, str]]:
+        """
+        Lists every (source, destination) pair of a token.
+
+        :param coin: Token code, eg. USDC
+        :return: List of network pairs
+        """
+        networks = ["ethereum"] + sorted(self.coins[coin]['amms'])
+
+        return [(src, dest) for src in networks for dest in networks if src != dest]
+
+    def read_pools(self) -> Dict[str, Dict[str, StableSwapPool]]:
+        """
+        Reads the state of every AMM, one Multicall3 call per endpoint, all endpoints in parallel.
+
+        :return: Dictionary of coin -> network -> pool snapshot
+        """
+
+        def read_group(endpoint: str) -> List[StableSwapPool or None]:
+            amms = self.groups[endpoint]
+            try:
+                return read_pool_states([(contract.contract, decimals) for _, contract, decimals in amms],
+                                        self.multicalls[endpoint])
+            except Exception as e:
+                log_error.warning(f"'RouteMatrix' - Unable to read pools on {amms[0][1].name} - {e}")
+                return [None] * len(amms)
+
+        endpoints = list(self.groups)
+        pools: Dict[str, Dict[str, StableSwapPool]] = {coin: {} for coin in self.coins}
+        for endpoint, states in zip(endpoints, self.pool.map(read_group, endpoints)):
+            for (coin, contract, _), state in zip(self.groups[endpoint], states):
+                if state is not None:
+                    pools[coin][contract.name] = state
+
+        return pools
+
+    def matrix(self, pools: Dict[str, Dict[str, StableSwapPool]]) -> Dict[str, Dict[Tuple[str, str], List[float]]]:
+        """
+        Quotes every amount of every route of every token. Each source leg is computed once for all
+        amounts and shared by all destinations of that source.
+
+        :param pools: Output of read_pools
+        :return: Dictionary of coin -> (source, destination) -> amounts received, one per configured amount
+        """
+        result = {}
+
+        for coin, data in self.coins.items():
+            decimals = data['decimals']
+            amounts = [int(amount * 10 ** decimals) for amount in data['amounts']]
+            fees = self.fees[coin]
+
+            # hToken amounts after the source leg, shared by every destination
+            h_amounts = {}
+            for src in ["ethereum"] + sorted(data['amms']):
+                try:
+                    h_amounts[src] = source_leg(pools[coin], src, amounts, fees)
+                except ValueError as e:
+                    log_error.warning(f"'RouteMatrix' - {coin} on {src} - {e}")
+                    h_amounts[src] = None
+
+            result[coin] = {}
+            for src, dest in self.routes(coin):
+                if h_amounts[src] is None:
+                    continue
+
+                try:
+                    received = destination_leg(pools[coin], src, dest, h_amounts[src], fees)
+                except ValueError as e:
+                    log_error.warning(f"'RouteMatrix' - {coin} on {dest} - {e}")
+                    continue
+
+                if received is not None:
+                    result[coin][(src, dest)] = [amount / 10 ** decimals for amount in received]
+
+        return result
+
+    def best_routes(self, matrix: Dict[str, Dict[Tuple[str, str], List[float]]],
+                    count: int = 5) -> List[Tuple[str, str, str, float, float]]:
+        """
+        Ranks all routes by their highest arbitrage.
+
+        :param matrix: Output of matrix
+        :param count: Number of routes to return
+        :return: List of (coin, source, destination, amount, arbitrage), best first
+        """
+        best = []
+
+        for coin, routes in matrix.items():
+            for (src, dest), received in routes.items():
+                arbitrage, amount = max((out - amount, amount) for amount, out in zip(self.coins[coin]['amounts'],
+                                                                                       received))
+                best.append((coin, src, dest, amount, arbitrage))
+
+        return sorted(best, key=lambda route: route[4], reverse=True)[:count]
+
+    def check_arbs(self, tracker: AlertTracker = None) -> List[Tuple[str, str, str, float, float]]:
+        """
+        Quotes every route from one snapshot of all pools and alerts each route with enough arbitrage.
+
+        :param tracker: Alert state of all routes, if None every qualifying amount is alerted
+        :return: Best routes, output of best_routes
+        """
+        matrix = self.matrix(self.read_pools())
+
+        for coin, routes in matrix.items():
+            for (src, dest), received in routes.items():
+                alert_arb(self.coins[coin]['amounts'], received, coin, self.coins[coin]['min_arb'], dest, tracker,
+                          src_network=src)
+
+        return self.best_routes(matrix)
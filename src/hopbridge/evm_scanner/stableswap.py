@@ -0,0 +1,187 @@
+"""
+Off-chain replica of the Saddle StableSwap math used by Hop AMM pools.
+All arithmetic is integer arithmetic with the same rounding as SwapUtils.sol,
+so results match the contract's 'calculateSwap' to the wei.
+"""
+from typing import (
+    List,
+    Tuple,
+    Iterable,
+)
+
+from web3.contract import Contract
+
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.common.logger import log_error
+
+
+A_PRECISION = 100
+FEE_DENOMINATOR = 10 ** 10
+MAX_LOOP_LIMIT = 256
+POOL_PRECISION_DECIMALS = 18
+
+
+def within_one(a: int, b: int) -> bool:
+    """Checks if two numbers differ by at most one."""
+
+    return abs(a - b) <= 1
+
+
+def get_d(xp: List[int], a_precise: int) -> int:
+    """
+    Calculates the StableSwap invariant D.
+
+    :param xp: Pool balances scaled to pool precision
+    :param a_precise: Amplification coefficient multiplied by A_PRECISION
+    :return: Invariant D
+    """
+    num_tokens = len(xp)
+    s = sum(xp)
+    if s == 0:
+        return 0
+
+    d = s
+    n_a = a_precise * num_tokens
+    for _ in range(MAX_LOOP_LIMIT):
+        d_p = d
+        for x in xp:
+            d_p = d_p * d // (x * num_tokens)
+
+        prev_d = d
+        d = (n_a * s // A_PRECISION + d_p * num_tokens) * d // \
+            ((n_a - A_PRECISION) * d // A_PRECISION + (num_tokens + 1) * d_p)
+
+        if within_one(d, prev_d):
+            return d
+
+    raise ValueError("D does not converge")
+
+
+def get_y(a_precise: int, token_from: int, token_to: int, x: int, xp: List[int], d: int) -> int:
+    """
+    Calculates the new balance of token_to after token_from's balance is set to x.
+
+    :param a_precise: Amplification coefficient multiplied by A_PRECISION
+    :param token_from: Index of token being sold
+    :param token_to: Index of token being bought
+    :param x: New balance of token_from scaled to pool precision
+    :param xp: Pool balances scaled to pool precision
+    :param d: Invariant D of xp
+    :return: New balance of token_to scaled to pool precision
+    """
+    num_tokens = len(xp)
+    n_a = num_tokens * a_precise
+
+    c = d
+    s = 0
+    for i in range(num_tokens):
+        if i == token_from:
+            _x = x
+        elif i != token_to:
+            _x = xp[i]
+        else:
+            continue
+
+        s += _x
+        c = c * d // (_x * num_tokens)
+
+    c = c * d * A_PRECISION // (n_a * num_tokens)
+    b = s + d * A_PRECISION // n_a
+
+    y = d
+    for _ in range(MAX_LOOP_LIMIT):
+        y_prev = y
+        y = (y * y + c) // (2 * y + b - d)
+
+        if within_one(y, y_prev):
+            return y
+
+    raise ValueError("Approximation did not converge")
+
+
+class StableSwapPool:
+
+    def __init__(self, balances: List[int], a_precise: int, swap_fee: int, multipliers: List[int], block=None):
+        """
+        Snapshot of a Hop AMM pool's state.
+
+        :param balances: Token balances in token precision
+        :param a_precise: Amplification coefficient multiplied by A_PRECISION, output of 'getAPrecise'
+        :param swap_fee: Swap fee in FEE_DENOMINATOR units
+        :param multipliers: Multipliers that scale each token's balance to pool precision
+        :param block: Block number the state was read at
+        """
+
+        self.balances = [int(balance) for balance in balances]
+        self.a_precise = int(a_precise)
+        self.swap_fee = int(swap_fee)
+        self.multipliers = [int(multiplier) for multiplier in multipliers]
+        self.block = block
+
+        self.xp = [balance * multiplier for balance, multiplier in zip(self.balances, self.multipliers)]
+        self.d = get_d(self.xp, self.a_precise)
+
+    def calculate_swap(self, token_from: int, token_to: int, dx: int) -> int:
+        """
+        Calculates the amount of token_to received for dx of token_from, same as 'calculateSwap'.
+
+        :param token_from: Index of token being sold
+        :param token_to: Index of token being bought
+        :param dx: Amount of token_from to sell in token precision
+        :return: Amount of token_to received in token precision
+        """
+        x = int(dx) * self.multipliers[token_from] + self.xp[token_from]
+        y = get_y(self.a_precise, token_from, token_to, x, self.xp, self.d)
+
+        dy = self.xp[token_to] - y - 1
+        dy_fee = dy * self.swap_fee // FEE_DENOMINATOR
+
+        return (dy - dy_fee) // self.multipliers[token_to]
+
+    def calculate_swaps(self, token_from: int, token_to: int, dxs: Iterable[int]) -> List[int]:
+        """
+        Calculates swap out amounts for many amounts at once, reusing the pool's invariant.
+
+        :param token_from: Index of token being sold
+        :param token_to: Index of token being bought
+        :param dxs: Amounts of token_from to sell in token precision
+        :return: Amounts of token_to received in token precision
+        """
+
+        return [self.calculate_swap(token_from, token_to, dx) for dx in dxs]
+
+
+def read_pool_states(pools: List[Tuple[Contract, int]], multicall: Multicall) -> List[StableSwapPool or None]:
+    """
+    Reads balances, amplification and swap fee of many pools on one chain with a single eth_call.
+
+    :param pools: List of (Hop AMM Contract, token decimals) tuples
+    :param multicall: Multicall instance for the pools' network
+    :return: List of pool snapshots, None for every pool whose state could not be read
+    """
+    block = multicall.w3.eth.block_number
+
+    for contract, _ in pools:
+        multicall.add_call(contract, 'getTokenBalance', [0])
+        multicall.add_call(contract, 'getTokenBalance', [1])
+        multicall.add_call(contract, 'getAPrecise', [])
+        multicall.add_call(contract, 'swapStorage', [])
+
+    replies = multicall.execute(block)
+
+    states = []
+    for i, (contract, decimals) in enumerate(pools):
+        (ok_0, balance_0), (ok_1, balance_1), (ok_a, a_precise), (ok_s, storage) = replies[4 * i: 4 * i + 4]
+        if not (ok_0 and ok_1 and ok_a and ok_s):
+            log_error.warning(f"'StableSwapPool' - Unable to read pool state of {contract.address}")
+            states.append(None)
+            continue
+
+        # Field order of the 'swapStorage' getter differs between Saddle versions
+        outputs = contract.get_function_by_name('swapStorage').abi['outputs']
+        swap_fee = storage[[output['name'] for output in outputs].index('swapFee')]
+
+        multiplier = 10 ** (POOL_PRECISION_DECIMALS - decimals)
+        states.append(StableSwapPool([balance_0, balance_1], a_precise, swap_fee, [multiplier, multiplier], block))
+
+    return states
@@ -29,6 +29,18 @@ log_format = "%(asctime)s - %(levelname)s - %(message)s"
 # Time to wait for page to respond
 request_wait_time = 8
 
+# Max secs to wait for the Hop app to quote one swap amount
+quote_wait_time = 30
+
+# Secs the quoted amount must stay unchanged to be read
+quote_settle_time = 0.3
+
+# Folder of the persistent contract ABI cache, inside the package whatever the working directory
+abi_cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "abi_cache")
+
+# Secs after which a cached ABI is re-fetched from the explorer
+abi_cache_ttl = 7 * 24 * 3600
+
 infura_endpoints = {
     'ethereum': os.getenv("WEB3_INFURA_ETHEREUM"),
     'optimism': os.getenv("WEB3_INFURA_OPTIMISM"),
@@ -36,6 +48,15 @@ infura_endpoints = {
     'polygon': os.getenv("WEB3_INFURA_POLYGON"),
 }
 
+# WebSocket node endpoints for eth_subscribe
+ws_endpoints = {
+    'ethereum': os.getenv("WEB3_WS_ETHEREUM"),
+    'optimism': os.getenv("WEB3_WS_OPTIMISM"),
+    'arbitrum': os.getenv("WEB3_WS_ARBITRUM"),
+    'polygon': os.getenv("WEB3_WS_POLYGON"),
+    'gnosis': os.getenv("WEB3_WS_GNOSIS"),
+}
+
 ankr_endpoints = {
     'ethereum': 'https://rpc.ankr.com/eth',
     'bsc': 'https://rpc.ankr.com/bsc',
@@ -54,5 +75,51 @@ etherscans = {
     'gnosis': ['https://api.gnosisscan.io', 'https://gnosisscan.io', '🟫'],
 }
 
+# Hop AMM (Saddle Swap) contracts of every token on each L2, pool index 0 is the canonical token, 1 the hToken
+hop_amm_addresses = {
+    'USDC': {
+        'optimism': '0x3c0FFAca566fCcfD9Cc95139FEF6CBA143795963',
+        'arbitrum': '0x10541b07d8Ad2647Dc6cD67abd4c03575dade261',
+        'polygon': '0x5C32143C8B198F392d01f8446b754c181224ac26',
+    },
+    'USDT': {
+        'optimism': '0xeC4B41Af04cF917b54AEb6Df58c0f8D78895b5Ef',
+        'arbitrum': '0x18f7402B673Ba6Fb5EA4B95768aABb8aaD7ef18a',
+        'polygon': '0xB2f7d27B21a69a033f85C42d5EB079043BAadC81',
+    },
+    'DAI': {
+        'optimism': '0xF181eD90D6CfaC84B8073FdEA6D34Aa744B41810',
+        'arbitrum': '0xa5A33aB9063395A90CCbEa2D86a62EcCf27B5742',
+        'polygon': '0x25FB92E505F752F730cAD0Bd4fa17ecE4A384266',
+    },
+    'ETH': {
+        'optimism': '0xaa30D6bba6285d0585722e2440Ff89E23EF68864',
+        'arbitrum': '0x652d27c0F72771Ce5C76fd400edD61B406Ac6D97',
+        'polygon': '0x266e2dc3C4c59E42AA07afeE5B09E964cFFe6778',
+    },
+}
+
+# Hop AMM wrappers of every token on each L2, they point to the L2 bridge and to the AMM of their chain
+hop_amm_wrapper_addresses = {
+    'USDC': {
+        'optimism': '0x2ad09850b0CA4c7c1B33f5AcD6cBAbCaB5d6e796',
+        'arbitrum': '0xe22D2beDb3Eca35E6397e0C6D62857094aA26F52',
+        'polygon': '0x76b22b8C1079A44F1211D867D68b1eda76a635A7',
+        'gnosis': '0x76b22b8C1079A44F1211D867D68b1eda76a635A7',
+    },
+    'USDT': {
+        'optimism': '0x7D269D3E0d61A05a0bA976b7DBF8805bF844AF3F',
+        'arbitrum': '0xCB0a4177E0A60247C0ad18Be87f8eDfF6DD30283',
+        'polygon': '0x8741Ba6225A6BF91f9D73531A98A89807857a2B3',
+        'gnosis': '0x49094a1B3463c4e2E82ca41b8e6A023bdd6E222f',
+    },
+    'DAI': {
+        'optimism': '0xb3C68a491608952Cb1257FC9909a537a0173b63B',
+        'arbitrum': '0xe7F40BF16AB09f4a6906Ac2CAA4094aD2dA48Cc2',
+        'polygon': '0x28529fec439cfF6d7D1D5917e956dEE62Cd3BE5c',
+        'gnosis': '0x6C928f435d1F3329bABb42d69CCF043e3900EcF1',
+    },
+}
+
 tokens = ("ETH", "USDC", "DAI")
 networks = ("ethereum", "polygon", "gnosis", "optimism", "arbitrum")
@@ -0,0 +1,147 @@
+"""
+Compute the Hop app's "amount received" from on-chain AMM state, without a browser.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    List,
+    Dict,
+    Tuple,
+)
+
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.evm_scanner.stableswap import (
+    StableSwapPool,
+    read_pool_states,
+)
+from src.hopbridge.evm_scanner.bridge_fees import (
+    amm_address,
+    load_bridge_fees,
+)
+from src.hopbridge.evm_scanner.route_matrix import quote_route
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.web.price_query import (
+    record_arb,
+    alert_highest_arb,
+)
+from src.hopbridge.variables import ankr_endpoints
+
+
+class DirectQuoter:
+
+    def __init__(self, args: List[tuple], bonder_fee_bps: Dict[str, float] = {},
+                 relayer_fee: Dict[str, Dict[str, float]] = {}):
+        """
+        Quotes Hop routes from AMM state read over RPC. All pools of a chain are read with one
+        Multicall3 call per loop and every amount of every route is priced off-chain.
+
+        Ethereum -> L2: the hToken minted on the destination, less the relayer fee, is swapped to the canonical token.
+        L2 -> X: the canonical token is swapped to the hToken on the source, the bonder fee is deducted,
+        then the hToken is swapped back on the destination or redeemed 1:1 on Ethereum.
+        The bonder fee follows 'minBonderBps' and 'minBonderFeeAbsolute' of each L2 bridge, the LP fee
+        is the swap fee of each AMM.
+
+        :param args: List of (driver, coin info, in_network, out_network, coin_name, ...) route arguments
+        :param bonder_fee_bps: Dictionary of coin_name -> bonder fee in basis points for L2 sources, used if above
+            the L2 bridge's 'minBonderBps'
+        :param relayer_fee: Dictionary of coin_name -> network -> relayer fee in whole tokens of transfers from Ethereum
+        """
+
+        # Every AMM any route goes through
+        amms = set()
+        for _, data, in_network, out_network, coin, *_ in args:
+            for network in (in_network.lower(), out_network.lower()):
+                if network != "ethereum":
+                    amms.add((coin.upper(), network, int(data['decimals'])))
+
+        self.amms: Dict[str, List[Tuple[str, EvmContract, int]]] = {}
+        for coin, network, decimals in sorted(amms):
+            address = amm_address(coin, network)
+            if address is None:
+                log_error.warning(f"'DirectQuoter' - No Hop AMM known for {coin} on {network}")
+                continue
+
+            contract = EvmContract(network, address, ankr_endpoints[network])
+            if contract.contract is None:
+                continue
+            self.amms.setdefault(network, []).append((coin, contract, decimals))
+
+        self.fees = load_bridge_fees(sorted(amms), bonder_fee_bps, relayer_fee)
+
+        self.multicalls = {network: Multicall(ankr_endpoints[network]) for network in self.amms}
+        self.pool = ThreadPoolExecutor(max_workers=max(len(self.amms), 1))
+
+    def read_pools(self) -> Dict[Tuple[str, str], StableSwapPool]:
+        """
+        Reads the state of every AMM, one Multicall3 call per chain, all chains in parallel.
+
+        :return: Dictionary of (coin_name, network) -> pool snapshot
+        """
+
+        def read_network(network: str) -> List[StableSwapPool or None]:
+            try:
+                return read_pool_states([(contract.contract, decimals) for _, contract, decimals
+                                         in self.amms[network]], self.multicalls[network])
+            except Exception as e:
+                log_error.warning(f"'DirectQuoter' - Unable to read pools on {network} - {e}")
+                return [None] * len(self.amms[network])
+
+        networks = list(self.amms)
+        pools = {}
+        for network, states in zip(networks, self.pool.map(read_network, networks)):
+            for (coin, _, _), state in zip(self.amms[network], states):
+                if state is not None:
+                    pools[(coin, network)] = state
+
+        return pools
+
+    def quote(self, pools: Dict[Tuple[str, str], StableSwapPool], coin: str, src_network: str,
+              dest_network: str, amounts: List[int]) -> List[int] or None:
+        """
+        Calculates the amount received for each amount sent over a route.
+
+        :param pools: Output of read_pools
+        :param coin: Token code, eg. USDC
+        :param src_network: Blockchain to sell from
+        :param dest_network: Blockchain to receive from
+        :param amounts: Amounts sent in token precision
+        :return: Amounts received in token precision, None if a pool of the route is not available
+        """
+        coin = coin.upper()
+        network_pools = {network: pool for (pool_coin, network), pool in pools.items() if pool_coin == coin}
+        network_fees = {network: fees for (fee_coin, network), fees in self.fees.items() if fee_coin == coin}
+
+        return quote_route(network_pools, src_network.lower(), dest_network.lower(), amounts, network_fees)
+
+    def query_routes(self, args: List[tuple], tracker: AlertTracker = None) -> None:
+        """
+        Quotes every route from one state snapshot and alerts the highest arbitrage of each,
+        same as hop_web.py does with the web page quotes.
+
+        :param args: List of (driver, coin info, in_network, out_network, coin_name, special_chat) route arguments
+        :param tracker: If given, alert only when the opportunity opens, changes or closes
+        :return: None
+        """
+        pools = self.read_pools()
+
+        for _, data, in_network, out_network, coin, special_chat, *_ in args:
+            decimals = int(data['decimals'])
+            amounts = list(range(*data['range']))
+
+            try:
+                received = self.quote(pools, coin, in_network, out_network,
+                                      [amount * 10 ** decimals for amount in amounts])
+            except ValueError as e:
+                log_error.warning(f"'DirectQuoter' - {coin}, {in_network} -> {out_network} - {e}")
+                continue
+
+            if received is None:
+                continue
+
+            all_arbs = {}
+            for amount, amount_out in zip(amounts, received):
+                record_arb(all_arbs, amount, amount_out / 10 ** decimals, data, coin, in_network, out_network)
+
+            alert_highest_arb(all_arbs, data, coin, in_network, out_network, special_chat, tracker)
+
@@ -0,0 +1,276 @@
+"""
+Read Hop quotes from the network responses of the web app instead of its rendered page.
+"""
+import json
+
+from time import (
+    sleep,
+    monotonic,
+)
+from typing import (
+    Dict,
+    List,
+    Tuple,
+)
+from urllib.parse import (
+    urlparse,
+    parse_qs,
+)
+
+from selenium.webdriver import Chrome
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import (
+    WebDriverException,
+    TimeoutException,
+)
+
+from src.hopbridge.common.logger import log_error
+from src.hopbridge.web.price_query import (
+    hop_url,
+    record_arb,
+)
+from src.hopbridge.variables import (
+    request_wait_time,
+    quote_wait_time,
+)
+
+
+# Requests not needed to quote, never loaded
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*sentry.io*", "*hotjar.com*", "*mixpanel.com*",
+]
+
+# Quote endpoint the Hop app fetches its quotes from
+HOP_QUOTE_API = "https://api.hop.exchange/v1/quote"
+
+# Responses that carry quotes and fees are fetched from urls containing one of these
+QUOTE_URL_PATTERNS = ["api.hop.exchange"]
+
+# Secs between two reads of the performance log while waiting for a quote
+LOG_POLL_INTERVAL = 0.1
+
+# Payload keys of the amount received, in token precision
+RECEIVED_KEYS = ("estimatedReceived", "estimatedRecieved", "amountOut")
+
+# Payload keys of the fees charged on a transfer, in token precision
+FEE_KEYS = ("bonderFee", "destinationTxFee", "relayerFee", "lpFees")
+
+
+def enable_interception(driver: Chrome, blocked_urls: List[str] = BLOCKED_URLS) -> None:
+    """
+    Turns on DevTools network events and blocks requests not needed to quote.
+
+    :param driver: Chrome webdriver instance opened with performance_log=True
+    :param blocked_urls: Url patterns to block, '*' is a wildcard
+    :return: None
+    """
+
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_urls})
+
+
+def captured_responses(driver: Chrome, url_patterns: List[str] = QUOTE_URL_PATTERNS,
+                       pending: Dict[str, Tuple[str, int]] = None) -> List[Tuple[str, int, dict or None]]:
+    """
+    Reads the bodies of the responses received since the last call whose url matches a pattern.
+    A response whose body has not finished loading is kept in pending and returned by a later call.
+
+    :param driver: Chrome webdriver instance opened with performance_log=True
+    :param url_patterns: Substrings of the urls to capture
+    :param pending: Request id -> (url, status) of responses still loading, shared by successive calls
+    :return: List of (url, HTTP status, parsed body) in the order they finished, body None if it is not JSON
+    """
+    pending = pending if pending is not None else {}
+
+    finished = []
+    for entry in driver.get_log("performance"):
+        message = json.loads(entry['message'])['message']
+        params = message.get('params', {})
+
+        if message.get('method') == "Network.responseReceived":
+            url = params['response']['url']
+            if any(pattern in url for pattern in url_patterns):
+                pending[params['requestId']] = (url, int(params['response'].get('status', 200)))
+
+        elif message.get('method') == "Network.loadingFinished" and params.get('requestId') in pending:
+            finished.append(params['requestId'])
+
+        elif message.get('method') == "Network.loadingFailed":
+            pending.pop(params.get('requestId'), None)
+
+    responses = []
+    for request_id in finished:
+        url, status = pending.pop(request_id)
+        try:
+            body = driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+            payload = json.loads(body['body'])
+        except (WebDriverException, json.JSONDecodeError, KeyError):
+            payload = None
+
+        responses.append((url, status, payload))
+
+    return responses
+
+
+def parse_received(payload: dict or list, decimals: int) -> float or None:
+    """
+    Finds the amount received in a quote payload.
+
+    :param payload: Parsed response body
+    :param decimals: Token decimals
+    :return: Amount received, None if the payload has none
+    """
+
+    if isinstance(payload, dict):
+        for key in RECEIVED_KEYS:
+            if key in payload:
+                try:
+                    return int(payload[key]) / 10 ** decimals
+                except (TypeError, ValueError):
+                    return None
+
+        values = payload.values()
+    elif isinstance(payload, list):
+        values = payload
+    else:
+        return None
+
+    for value in values:
+        received = parse_received(value, decimals)
+        if received is not None:
+            return received
+
+    return None
+
+
+def parse_fees(payload: dict or list, decimals: int) -> Dict[str, float]:
+    """
+    Finds the fees in a quote or fee payload.
+
+    :param payload: Parsed response body
+    :param decimals: Token decimals
+    :return: Dictionary of fee key -> amount, empty if the payload has none
+    """
+    fees = {}
+
+    if isinstance(payload, dict):
+        for key in FEE_KEYS:
+            try:
+                fees[key] = int(payload[key]) / 10 ** decimals
+            except (KeyError, TypeError, ValueError):
+                continue
+
+        values = payload.values()
+    elif isinstance(payload, list):
+        values = payload
+    else:
+        return fees
+
+    for value in values:
+        for key, fee in parse_fees(value, decimals).items():
+            fees.setdefault(key, fee)
+
+    return fees
+
+
+def parse_amount(url: str, decimals: int) -> float or None:
+    """
+    Reads the swap amount from a quote request url.
+
+    :param url: Request url
+    :param decimals: Token decimals
+    :return: Amount sent, None if the url has none
+    """
+
+    try:
+        return int(parse_qs(urlparse(url).query)['amount'][0]) / 10 ** decimals
+    except (KeyError, ValueError):
+        return None
+
+
+def amount_url(url: str, amount: int) -> str:
+    """Returns the app url of a route with the amount to send filled in."""
+
+    return f"{url}{'&' if '?' in url else '?'}amount={amount}"
+
+
+def intercept_hop(
+        driver: Chrome,
+        data: dict,
+        src_network: str = "ethereum",
+        dest_network: str = "gnosis",
+        token_name: str = "USDC",
+        app_url: str = "",
+        url_patterns: List[str] = QUOTE_URL_PATTERNS,
+) -> dict or None:
+    """
+    Queries Hop Bridge like quote_hop, but never touches the page's fields. The app is opened with each amount
+    in its url, and the quote and fees the app fetches for it are read from the intercepted responses.
+
+    :param driver: Chrome webdriver instance opened with performance_log=True
+    :param data: Data info with amounts to sell and min. arbitrage
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :param token_name: Token code, eg. USDC
+    :param app_url: App url of the route, the route's Hop app url if empty
+    :param url_patterns: Substrings of the quote and fee response urls
+    :return: Dictionary of arbitrage -> [message, terminal message, amount], None if any amount was not quoted
+    """
+    url = app_url if app_url else hop_url(token_name, src_network, dest_network)
+    decimals = int(data['decimals'])
+    amounts = list(range(*data['range']))
+
+    # Amount -> amount received, amount -> fees, fees of responses with no amount are under None
+    quotes = {}
+    fees = {}
+    answered = set()
+    pending = {}
+
+    try:
+        enable_interception(driver)
+
+        # Responses of the routes this driver loaded before are not quotes of this route
+        driver.get_log("performance")
+
+        for amount in amounts:
+            driver.get(amount_url(url, amount))
+            WebDriverWait(driver, request_wait_time).until(
+                lambda page: page.execute_script("return document.readyState") == "complete")
+
+            # A response of an earlier amount may still arrive, every response is kept for its own amount
+            deadline = monotonic() + quote_wait_time
+            while amount not in answered and monotonic() < deadline:
+                for response_url, status, payload in captured_responses(driver, url_patterns, pending):
+                    response_amount = parse_amount(response_url, decimals)
+                    received = parse_received(payload, decimals)
+
+                    fees.setdefault(response_amount, {}).update(parse_fees(payload, decimals))
+                    if received is not None:
+                        quotes[response_amount] = received
+                    if received is not None or status >= 400:
+                        answered.add(response_amount)
+
+                if amount not in answered:
+                    sleep(LOG_POLL_INTERVAL)
+
+            if amount not in quotes:
+                log_error.warning(f"ReceivedError - {token_name}, {src_network} -> {dest_network} - "
+                                  f"no quote response for {amount:,}")
+                return None
+
+    except TimeoutException:
+        log_error.warning(f"Page {url} not loaded.")
+        return None
+
+    except WebDriverException:
+        log_error.warning(f"Error querying {url}")
+        return None
+
+    all_arbs = {}
+    for amount in amounts:
+        amount_fees = {**fees.get(None, {}), **fees.get(amount, {})}
+        record_arb(all_arbs, amount, quotes[amount], data, token_name, src_network, dest_network, amount_fees)
+
+    return all_arbs
@@ -1,9 +1,7 @@
-import time
 from datetime import datetime
 
 from selenium.webdriver import Chrome
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import (
@@ -11,38 +9,97 @@ from selenium.common.exceptions import (
     TimeoutException,
 )
 
-from src.hopbridge.common.message import telegram_send_message
+from src.hopbridge.common.alerts import AlertTracker
+from src.hopbridge.common.dispatcher import dispatcher
 from src.hopbridge.common.logger import (
     log_arbitrage,
     log_error,
 )
 from src.hopbridge.variables import (
     request_wait_time,
+    quote_wait_time,
+    quote_settle_time,
     time_format,
     CHAT_ID_SPECIAL,
 )
 
 
-def query_hop(
+# Swap amount input and amount received output of the Hop app
+IN_XPATH = "//*[@id='root']/div/div[3]/div/div/div[2]/div[2]/div[2]/div/input"
+OUT_XPATH = "//*[@id='root']/div/div[3]/div/div/div[4]/div[2]/div[2]/div/input"
+
+# Types each amount into the input and waits inside the page for the output to settle.
+# The value is set with the native setter plus an 'input' event so React picks it up.
+# An amount whose output does not settle in time is reported as an empty quote.
+QUOTE_SCRIPT = """
+const [inXpath, outXpath, amounts, settleMs, timeoutMs, done] = arguments;
+
+const find = (xpath) => document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const input = find(inXpath);
+const output = find(outXpath);
+if (!input || !output) {
+    done({error: "Input or output field not found"});
+    return;
+}
+
+const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, "value").set;
+const quotes = [];
+
+const quote = (i) => {
+    if (i >= amounts.length) {
+        done({quotes: quotes});
+        return;
+    }
+
+    const stale = output.value;
+    setValue.call(input, String(amounts[i]));
+    input.dispatchEvent(new Event("input", {bubbles: true}));
+
+    const started = Date.now();
+    let last = null;
+    let lastChanged = started;
+
+    const timer = setInterval(() => {
+        const now = Date.now();
+        const value = output.value;
+        if (value !== last) {
+            last = value;
+            lastChanged = now;
+        }
+
+        const settled = value !== "" && value !== stale && now - lastChanged >= settleMs;
+        if (settled || now - started >= timeoutMs) {
+            clearInterval(timer);
+            // On timeout the field may still show the previous amount's quote, report no quote instead
+            quotes.push(settled ? value : "");
+            quote(i + 1);
+        }
+    }, 50);
+};
+
+quote(0);
+"""
+
+
+def quote_hop(
         driver: Chrome,
         data: dict,
         src_network: str = "ethereum",
         dest_network: str = "gnosis",
         token_name: str = "USDC",
-        special_chat: dict = {},
-) -> None:
+) -> dict or None:
     """
-    Queries Hop Bridge and checks for arbitrage opportunity.
+    Queries Hop Bridge for the amount received of every swap amount of a route, without alerting.
 
     :param driver: Chrome webdriver instance
     :param data: Data info with amounts to sell and min. arbitrage
     :param src_network: Blockchain to sell from
     :param dest_network: Blockchain to receive from
     :param token_name: Token code, eg. USDC
-    :param special_chat: Send specific info, if empty ignore
+    :return: Dictionary of arbitrage -> [message, terminal message, amount], None if the page could not be queried
     """
-    url = f"https://app.hop.exchange/#/send?token={token_name}&sourceNetwork={src_network}" \
-          f"&destNetwork={dest_network}"
+    url = hop_url(token_name, src_network, dest_network)
 
     try:
         driver.get(url)
@@ -51,74 +108,149 @@ def query_hop(
         log_error.warning(f"Error querying {url}")
         return None
 
-    all_arbs = {}
-    for amount in range(*data['range']):
-
-        in_xpath = "//*[@id='root']/div/div[3]/div/div/div[2]/div[2]/div[2]/div/input"
-        try:
-            in_field = WebDriverWait(driver, request_wait_time).until(ec.element_to_be_clickable(
-                (By.XPATH, in_xpath)))
-
-        except TimeoutException:
-            log_error.warning(f"Element {in_xpath} not located.")
-            return None
+    try:
+        WebDriverWait(driver, request_wait_time).until(ec.element_to_be_clickable((By.XPATH, IN_XPATH)))
 
-        # Clear the entire field
-        in_field.send_keys(Keys.CONTROL + "a")
-        in_field.send_keys(Keys.DELETE)
-        in_field.send_keys(Keys.COMMAND + "a")
-        in_field.send_keys(Keys.DELETE)
-        # Fill in swap amount
-        in_field.send_keys(amount)
+    except TimeoutException:
+        log_error.warning(f"Element {IN_XPATH} not located.")
+        return None
 
-        timeout = time.time() + 30
-        out_xpath = "//*[@id='root']/div/div[3]/div/div/div[4]/div[2]/div[2]/div/input"
-        while True:
-            out_field = driver.find_element(By.XPATH, out_xpath)
-            received = out_field.get_attribute("value")
+    # All amounts are quoted in the page, one WebDriver round trip for the whole range
+    amounts = list(range(*data['range']))
+    driver.set_script_timeout(quote_wait_time * len(amounts) + request_wait_time)
+    try:
+        reply = driver.execute_async_script(QUOTE_SCRIPT, IN_XPATH, OUT_XPATH, amounts,
+                                            quote_settle_time * 1000, quote_wait_time * 1000)
+    except WebDriverException as e:
+        log_error.warning(f"QuoteScriptError - {token_name}, {src_network} -> {dest_network} - {e}")
+        return None
 
-            if received != "" or time.time() > timeout:
-                break
+    if reply.get('error'):
+        log_error.warning(f"QuoteScriptError - {token_name}, {src_network} -> {dest_network} - {reply['error']}")
+        return None
 
+    all_arbs = {}
+    for amount, received in zip(amounts, reply['quotes']):
         try:
             received = float(received.replace(",", ""))
         except ValueError as e:
             log_error.warning(f"ReceivedError - {token_name}, {src_network} -> {dest_network} - {e}")
             return None
 
-        # Calculate arbitrage
-        arbitrage = received - amount
+        # Record all arbs to select the highest later
+        record_arb(all_arbs, amount, received, data, token_name, src_network, dest_network)
 
-        decimals = int(data['decimals'])
-        arbitrage = round(arbitrage, int(decimals // 3))
+    return all_arbs
 
-        timestamp = datetime.now().astimezone().strftime(time_format)
-        message = f"{timestamp}\n" \
-                  f"Sell {amount:,} {token_name} {src_network} -> {dest_network}\n" \
-                  f"\t-->Arbitrage: <a href='{url}'>{arbitrage:,} {token_name}</a>\n"
 
-        ter_msg = f"Sell {amount:,} {token_name} {src_network} -> {dest_network}\n" \
-                  f"\t-->Arbitrage: {arbitrage:,} {token_name}\n"
+def hop_url(token_name: str, src_network: str, dest_network: str) -> str:
+    """
+    Returns the Hop app url of a route.
+
+    :param token_name: Token code, eg. USDC
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :return: Url
+    """
+
+    return f"https://app.hop.exchange/#/send?token={token_name}&sourceNetwork={src_network}" \
+           f"&destNetwork={dest_network}"
 
-        # Record all arbs to select the highest later
-        all_arbs[arbitrage] = [message, ter_msg, amount]
+
+def record_arb(all_arbs: dict, amount: float, received: float, data: dict, token_name: str,
+               src_network: str, dest_network: str, fees: dict = None) -> None:
+    """
+    Calculates the arbitrage of a quote and records it with its alert messages.
+
+    :param all_arbs: Dictionary of arbitrage -> [message, terminal message, amount] to record into
+    :param amount: Amount sold
+    :param received: Amount received
+    :param data: Data info with amounts to sell and min. arbitrage
+    :param token_name: Token code, eg. USDC
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :param fees: If given, dictionary of fee name -> amount charged, added to the messages
+    :return: None
+    """
+    url = hop_url(token_name, src_network, dest_network)
+
+    # Calculate arbitrage
+    arbitrage = received - amount
+
+    decimals = int(data['decimals'])
+    arbitrage = round(arbitrage, int(decimals // 3))
+
+    timestamp = datetime.now().astimezone().strftime(time_format)
+    fees_msg = ""
+    if fees:
+        fees_msg = f"\t-->Fees: {', '.join(f'{name} {fee:,} {token_name}' for name, fee in fees.items())}\n"
+
+    message = f"{timestamp}\n" \
+              f"Sell {amount:,} {token_name} {src_network} -> {dest_network}\n" \
+              f"\t-->Arbitrage: <a href='{url}'>{arbitrage:,} {token_name}</a>\n" \
+              f"{fees_msg}"
+
+    ter_msg = f"Sell {amount:,} {token_name} {src_network} -> {dest_network}\n" \
+              f"\t-->Arbitrage: {arbitrage:,} {token_name}\n" \
+              f"{fees_msg}"
+
+    all_arbs[arbitrage] = [message, ter_msg, amount]
+
+
+def alert_highest_arb(
+        all_arbs: dict,
+        data: dict,
+        token_name: str,
+        src_network: str,
+        dest_network: str,
+        special_chat: dict = {},
+        tracker: AlertTracker = None,
+) -> None:
+    """
+    Alerts the highest recorded arbitrage of a route if it is at least the min. arbitrage.
+
+    :param all_arbs: Dictionary of arbitrage -> [message, terminal message, amount], output of record_arb
+    :param data: Data info with amounts to sell and min. arbitrage
+    :param token_name: Token code, eg. USDC
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :param special_chat: Send specific info, if empty ignore
+    :param tracker: If given, alert only when the opportunity opens, changes or closes
+    """
 
     if len(all_arbs) > 0:
         highest_arb = max(all_arbs)
     else:
         return None
 
-    if highest_arb >= data['min_arb']:
-        message = all_arbs[highest_arb][0]
-        ter_msg = all_arbs[highest_arb][1]
-        amount_in = all_arbs[highest_arb][2]
-        telegram_send_message(message)
+    key = f"{token_name.upper()} {src_network.lower()}->{dest_network.lower()}"
+    if highest_arb < data['min_arb']:
+        if tracker is not None and tracker.close(key):
+            timestamp = datetime.now().astimezone().strftime(time_format)
+            tracker.alert(f"{timestamp}\n"
+                          f"Closed: {token_name} {src_network} -> {dest_network} arbitrage below "
+                          f"{data['min_arb']:,} {token_name}\n")
+        return None
+
+    message = all_arbs[highest_arb][0]
+    ter_msg = all_arbs[highest_arb][1]
+    amount_in = all_arbs[highest_arb][2]
+
+    if tracker is None:
+        dispatcher.submit(message)
+    else:
+        event = tracker.update(key, amount_in, highest_arb)
+        if event is None:
+            log_arbitrage.info(ter_msg)
+            return None
+
+        tracker.alert(message if event == "open" else f"Updated - {message}")
 
-        # If special chat required, send telegram msg to it
-        if special_chat:
-            if float(special_chat['max_swap_amount']) >= float(amount_in) and token_name.upper() in special_chat['coins']:
-                telegram_send_message(message, telegram_chat_id=CHAT_ID_SPECIAL)
+    # If special chat required, send telegram msg to it
+    if special_chat:
+        if float(special_chat['max_swap_amount']) >= float(amount_in) and token_name.upper() in special_chat['coins']:
+            dispatcher.submit(message, telegram_chat_id=CHAT_ID_SPECIAL, low_priority=True)
 
-        log_arbitrage.info(ter_msg)
-        timestamp = datetime.now().astimezone().strftime(time_format)
-        print(f"{timestamp} - {ter_msg}")
+    log_arbitrage.info(ter_msg)
+    timestamp = datetime.now().astimezone().strftime(time_format)
+    print(f"{timestamp} - {ter_msg}")
@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+from src.hopbridge.common.logger import (
+    log_arbitrage,
+    log_error,
+    log_txns,
+)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def log_dir(tmp_path_factory):
+    """Points the loggers, which write to logs/ relative to the working directory, at a temp dir."""
+
+    path = tmp_path_factory.mktemp("logs")
+    for logger in (log_arbitrage, log_error, log_txns):
+        for handler in logger.handlers:
+            handler.close()
+            handler.baseFilename = str(path / os.path.basename(handler.baseFilename))
+
+    return path
@@ -0,0 +1,160 @@
+"""
+Records the fixtures of the parity tests from live nodes and the Hop API. Needs network access.
+
+Usage:
+    python3 -m tests.record_fixtures --quotes USDC:ethereum:gnosis:10000 USDC:polygon:optimism:10000
+    python3 -m tests.record_fixtures --pools USDC:polygon DAI:gnosis
+"""
+import os
+import json
+
+from argparse import ArgumentParser
+from typing import (
+    List,
+    Dict,
+)
+
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.multicall import Multicall
+from src.hopbridge.evm_scanner.stableswap import (
+    StableSwapPool,
+    read_pool_states,
+)
+from src.hopbridge.evm_scanner.bridge_fees import (
+    amm_address,
+    read_bridge_fees,
+)
+from src.hopbridge.web.intercept import HOP_QUOTE_API
+from src.hopbridge.variables import (
+    http_session,
+    ankr_endpoints,
+)
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+DECIMALS = {"USDC": 6, "USDT": 6, "DAI": 18, "ETH": 18}
+
+# Swap amounts in whole tokens checked against 'calculateSwap', from dust to more than most pools hold
+SWAP_AMOUNTS = (0.01, 1, 1000, 100000, 10000000)
+
+
+def pool_fixture(pool: StableSwapPool) -> Dict[str, object]:
+    """Serialises a pool snapshot, big integers as strings."""
+
+    return {"block": pool.block, "balances": [str(balance) for balance in pool.balances],
+            "a_precise": str(pool.a_precise), "swap_fee": str(pool.swap_fee),
+            "multipliers": [str(multiplier) for multiplier in pool.multipliers]}
+
+
+def read_pool(coin: str, network: str, contract: EvmContract = None) -> StableSwapPool or None:
+    """Reads the current state of a coin's Hop AMM on a chain."""
+
+    contract = contract if contract is not None else EvmContract(network, amm_address(coin, network),
+                                                                 ankr_endpoints[network])
+
+    return read_pool_states([(contract.contract, DECIMALS[coin])], Multicall(ankr_endpoints[network]))[0]
+
+
+def record_pool(coin: str, network: str) -> dict:
+    """
+    Records a pool state with the contract's own 'calculateSwap' outputs in both directions at the same block.
+
+    :param coin: Token code, eg. USDC
+    :param network: Network name, eg. gnosis
+    :return: Fixture dictionary
+    """
+    decimals = DECIMALS[coin]
+    contract = EvmContract(network, amm_address(coin, network), ankr_endpoints[network])
+    pool = read_pool(coin, network, contract)
+
+    swaps = []
+    for amount in SWAP_AMOUNTS:
+        dx = int(amount * 10 ** decimals)
+        for token_from, token_to in ((0, 1), (1, 0)):
+            dy = contract.contract.functions.calculateSwap(token_from, token_to, dx).call(block_identifier=pool.block)
+            swaps.append({"token_from": token_from, "token_to": token_to, "dx": str(dx), "dy": str(dy)})
+
+    return {"coin": coin, "network": network, "decimals": decimals, "pool": pool_fixture(pool), "swaps": swaps}
+
+
+def record_quote(coin: str, src_network: str, dest_network: str, amount: float) -> dict:
+    """
+    Records one app.hop.exchange quote with the pool states and bridge fees it was computed from.
+
+    :param coin: Token code, eg. USDC
+    :param src_network: Blockchain to sell from
+    :param dest_network: Blockchain to receive from
+    :param amount: Amount sent in whole tokens
+    :return: Fixture dictionary
+    """
+    decimals = DECIMALS[coin]
+    amount_in = int(amount * 10 ** decimals)
+    networks = [network for network in (src_network, dest_network) if network != "ethereum"]
+
+    pools = {network: pool_fixture(read_pool(coin, network)) for network in networks}
+    fees = {network: read_bridge_fees(coin, network) for network in networks}
+
+    response = http_session.get(HOP_QUOTE_API, params={"amount": str(amount_in), "token": coin,
+                                                       "fromChain": src_network, "toChain": dest_network,
+                                                       "slippage": "0.5"}, timeout=10)
+    response.raise_for_status()
+    quote = response.json()
+
+    # Relayer fee the app charged on a transfer from Ethereum, if any
+    if src_network == "ethereum" and dest_network in fees:
+        fees[dest_network].relayer_fee = int(quote.get('relayerFee') or 0)
+
+    return {
+        "coin": coin,
+        "src_network": src_network,
+        "dest_network": dest_network,
+        "decimals": decimals,
+        "amount": str(amount_in),
+        "pools": pools,
+        "fees": {network: {"bonder_fee_bps": fee.bonder_fee_bps, "min_bonder_fee": str(fee.min_bonder_fee),
+                           "relayer_fee": str(fee.relayer_fee)} for network, fee in fees.items()},
+        "api_quote": quote,
+        "estimated_received": str(quote['estimatedReceived']),
+        "tolerance": "0",
+    }
+
+
+def append_fixtures(name: str, entries: List[dict]) -> None:
+    """Appends entries to a JSON list fixture."""
+
+    path = os.path.join(FIXTURES_DIR, name)
+    with open(path) as file:
+        fixtures = json.load(file)
+
+    fixtures.extend(entries)
+    with open(path, "w") as file:
+        json.dump(fixtures, file, indent=2)
+        file.write("\n")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Records parity test fixtures from live nodes and the Hop API.")
+    parser.add_argument("--quotes", nargs="+", metavar="COIN:SRC:DEST:AMOUNT",
+                        help="Records app.hop.exchange quotes with their pool states into hop_quotes.json.")
+    parser.add_argument("--pools", nargs="+", metavar="COIN:NETWORK",
+                        help="Records pool states with their 'calculateSwap' outputs into stableswap_pools.json.")
+    cli_args = parser.parse_args()
+
+    if cli_args.quotes:
+        recorded = []
+        for route in cli_args.quotes:
+            coin, src, dest, amount = route.split(":")
+            recorded.append(record_quote(coin.upper(), src.lower(), dest.lower(), float(amount)))
+
+        append_fixtures("hop_quotes.json", recorded)
+        print(f"Recorded {len(recorded)} quotes.")
+
+    if cli_args.pools:
+        recorded = []
+        for pool_route in cli_args.pools:
+            coin, network = pool_route.split(":")
+            recorded.append(record_pool(coin.upper(), network.lower()))
+
+        append_fixtures("stableswap_pools.json", recorded)
+        print(f"Recorded {len(recorded)} pools.")
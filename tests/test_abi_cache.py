@@ -0,0 +1,65 @@
+import os
+import asyncio
+
+from src.hopbridge.blockchain import (
+    abi_cache as abi_cache_module,
+    evm,
+)
+from src.hopbridge.blockchain.abi_cache import AbiCache
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.variables import abi_cache_dir
+
+
+ABI = [{"inputs": [], "name": "bridge", "outputs": [], "stateMutability": "view", "type": "function"}]
+ADDRESS = "0x" + "44" * 20
+
+
+def test_cache_dir_is_inside_the_package():
+    package_dir = os.path.dirname(os.path.abspath(abi_cache_module.__file__))
+
+    assert os.path.dirname(abi_cache_dir) == os.path.dirname(package_dir)
+
+
+def test_hits_never_fetch(tmp_path):
+    cache = AbiCache(str(tmp_path))
+    cache.put("gnosis", ADDRESS, ABI)
+
+    assert cache.get_or_fetch("gnosis", ADDRESS, lambda: 1 / 0) == ABI
+
+
+def test_entries_go_stale_after_ttl(tmp_path, monkeypatch):
+    cache = AbiCache(str(tmp_path), ttl=60)
+    cache.put("gnosis", ADDRESS, ABI)
+
+    assert not cache.is_stale("gnosis", ADDRESS)
+    assert not cache.is_stale("gnosis", "0x" + "55" * 20)
+
+    now = abi_cache_module.time()
+    monkeypatch.setattr(abi_cache_module, "time", lambda: now + 61)
+    assert cache.is_stale("gnosis", ADDRESS)
+
+    # Fetch times survive a restart
+    assert AbiCache(str(tmp_path), ttl=60).is_stale("gnosis", ADDRESS)
+
+
+def test_stale_abi_is_refreshed_in_the_low_priority_lane(tmp_path, monkeypatch):
+    cache = AbiCache(str(tmp_path), ttl=0)
+    cache.put("gnosis", ADDRESS, ABI)
+    monkeypatch.setattr(evm, "abi_cache", cache)
+
+    acquired = []
+
+    async def acquire(host, api_key, client="", priority=0):
+        acquired.append(priority)
+
+    monkeypatch.setattr(evm.explorer_scheduler, "acquire", acquire)
+    monkeypatch.setattr(EvmContract, "get_contract_abi", staticmethod(lambda *args: ABI + ABI))
+
+    contract = EvmContract.__new__(EvmContract)
+    contract.name, contract.contract_address = "gnosis", ADDRESS
+    contract.api, contract.node_api_key, contract.abi_endpoint = "https://api.gnosisscan.io", None, ""
+
+    asyncio.run(contract.refresh_abi())
+
+    assert acquired == [1]
+    assert cache.get("gnosis", ADDRESS) == ABI + ABI
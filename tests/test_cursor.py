@@ -0,0 +1,29 @@
+from src.hopbridge.blockchain.cursor import TxnCursor
+from src.hopbridge.blockchain.records import TxnRecord
+
+
+def txn(txn_hash: str, block: int) -> TxnRecord:
+    return TxnRecord(txn_hash, block, 1700000000, "0xaaa", "0xbbb", 0)
+
+
+def test_rescanned_transactions_are_returned_once():
+    cursor = TxnCursor(rescan_blocks=2)
+
+    first = cursor.advance([txn("0xa", 99), txn("0xb", 100)])
+
+    assert [t.hash for t in first] == ["0xa", "0xb"]
+    assert cursor.start_block == 98
+
+    # Next poll fetches blocks 98 onwards again
+    new_txns = cursor.advance([txn("0xa", 99), txn("0xb", 100), txn("0xc", 101)])
+
+    assert [t.hash for t in new_txns] == ["0xc"]
+    assert cursor.block == 101
+
+
+def test_hashes_below_the_rescan_window_are_dropped():
+    cursor = TxnCursor(rescan_blocks=2)
+    cursor.advance([txn("0xa", 90)])
+    cursor.advance([txn("0xb", 100)])
+
+    assert set(cursor.boundary) == {"0xb"}
@@ -0,0 +1,101 @@
+import os
+import json
+
+import pytest
+
+from src.hopbridge.evm_scanner.stableswap import StableSwapPool
+from src.hopbridge.evm_scanner.bridge_fees import BridgeFees
+from src.hopbridge.evm_scanner.route_matrix import (
+    quote_route,
+    source_leg,
+    destination_leg,
+)
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hop_quotes.json")
+
+with open(FIXTURES) as fixture_file:
+    RECORDED_QUOTES = json.load(fixture_file)
+
+
+def usdc_pool(balance: int = 10 ** 12) -> StableSwapPool:
+    """Balanced 6-decimal pool, A = 200 and 4 bps swap fee like the Hop USDC AMMs."""
+
+    return StableSwapPool([balance, balance], 20000, 4000000, [10 ** 12, 10 ** 12])
+
+
+def fixture_pool(state: dict) -> StableSwapPool:
+    return StableSwapPool(state['balances'], state['a_precise'], state['swap_fee'], state['multipliers'],
+                          state.get('block'))
+
+
+def fixture_fees(fees: dict) -> BridgeFees:
+    return BridgeFees(fees['bonder_fee_bps'], int(fees['min_bonder_fee']), int(fees['relayer_fee']))
+
+
+@pytest.mark.parametrize("quote", RECORDED_QUOTES or [None],
+                         ids=[f"{q['coin']}-{q['src_network']}-{q['dest_network']}-{q['amount']}"
+                              for q in RECORDED_QUOTES] or ["no-fixtures"])
+def test_quote_route_matches_recorded_hop_quotes(quote):
+    if quote is None:
+        pytest.skip("No recorded quotes, run python3 -m tests.record_fixtures --quotes with network access")
+
+    pools = {network: fixture_pool(state) for network, state in quote['pools'].items()}
+    fees = {network: fixture_fees(network_fees) for network, network_fees in quote['fees'].items()}
+
+    received = quote_route(pools, quote['src_network'], quote['dest_network'], [int(quote['amount'])], fees)[0]
+
+    assert abs(received - int(quote['estimated_received'])) <= int(quote['tolerance'])
+
+
+def test_ethereum_source_pays_destination_relayer_fee():
+    pools = {"gnosis": usdc_pool()}
+    fees = {"gnosis": BridgeFees(relayer_fee=250000)}
+
+    with_fee = quote_route(pools, "ethereum", "gnosis", [10 ** 9], fees)[0]
+    without_fee = quote_route(pools, "ethereum", "gnosis", [10 ** 9 - 250000])[0]
+
+    assert with_fee == without_fee
+
+
+def test_l2_source_deducts_bonder_fee_with_minimum():
+    pools = {"polygon": usdc_pool()}
+    h_amounts = pools["polygon"].calculate_swaps(0, 1, [10 ** 6, 10 ** 10])
+    fees = {"polygon": BridgeFees(bonder_fee_bps=4, min_bonder_fee=250000)}
+
+    sent = source_leg(pools, "polygon", [10 ** 6, 10 ** 10], fees)
+
+    assert sent[0] == h_amounts[0] - 250000
+    assert sent[1] == h_amounts[1] - h_amounts[1] * 4 // 10000
+
+
+def test_bonder_fee_never_makes_amounts_negative():
+    pools = {"polygon": usdc_pool()}
+    fees = {"polygon": BridgeFees(min_bonder_fee=10 ** 9)}
+
+    assert source_leg(pools, "polygon", [10 ** 6], fees) == [0]
+
+
+def test_l2_to_l2_composes_both_pools():
+    pools = {"polygon": usdc_pool(), "gnosis": usdc_pool(2 * 10 ** 12)}
+    fees = {"polygon": BridgeFees(bonder_fee_bps=4)}
+
+    h_amount = pools["polygon"].calculate_swap(0, 1, 10 ** 9)
+    h_amount -= h_amount * 4 // 10000
+
+    assert quote_route(pools, "polygon", "gnosis", [10 ** 9], fees) == [pools["gnosis"].calculate_swap(1, 0, h_amount)]
+
+
+def test_relayer_fee_only_charged_from_ethereum():
+    pools = {"polygon": usdc_pool(), "gnosis": usdc_pool()}
+    fees = {"gnosis": BridgeFees(bonder_fee_bps=0, relayer_fee=10 ** 6)}
+
+    assert destination_leg(pools, "polygon", "gnosis", [10 ** 8], fees) == destination_leg(pools, "polygon",
+                                                                                           "gnosis", [10 ** 8])
+
+
+def test_missing_pool_gives_no_quote():
+    pools = {"polygon": usdc_pool()}
+
+    assert quote_route(pools, "gnosis", "polygon", [10 ** 6]) is None
+    assert quote_route(pools, "polygon", "gnosis", [10 ** 6]) is None
@@ -0,0 +1,54 @@
+from threading import (
+    Thread,
+    Event,
+)
+
+from src.hopbridge.common import dispatcher as dispatcher_module
+from src.hopbridge.common.dispatcher import TelegramDispatcher
+
+
+def test_concurrent_submits_start_one_worker(monkeypatch):
+    release = Event()
+    workers = []
+
+    def run(self):
+        workers.append(self)
+        release.wait(5)
+
+    monkeypatch.setattr(TelegramDispatcher, "run", run)
+    telegram = TelegramDispatcher()
+
+    threads = [Thread(target=telegram.submit, args=(f"alert {i}",)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    release.set()
+
+    assert len(workers) == 1
+    assert telegram.metrics()['queued'] == 16
+
+
+def test_chat_bucket_is_created_once(monkeypatch):
+    created = []
+
+    class Bucket:
+        def __init__(self, rate, burst):
+            created.append(self)
+
+        def acquire(self):
+            pass
+
+    class Reply:
+        def json(self):
+            return {"ok": True}
+
+    monkeypatch.setattr(dispatcher_module, "TokenBucket", Bucket)
+    telegram = TelegramDispatcher()
+    monkeypatch.setattr(telegram.session, "post", lambda **kwargs: Reply())
+
+    for _ in range(3):
+        telegram.send("alert", "-100")
+
+    assert len(created) == 1
+    assert telegram.metrics()['sent'] == 3
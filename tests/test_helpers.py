@@ -0,0 +1,40 @@
+from src.hopbridge.evm_scanner import helpers
+from src.hopbridge.evm_scanner.helpers import (
+    calculate_optimal_swap,
+    check_arb,
+)
+
+
+class FakeContract:
+    name = "gnosis"
+    contract = object()
+
+
+def swap_out(amount: float) -> float:
+    """Concave quote with a profitable optimum at 10,000 tokens, profitable up to about 24,142 tokens."""
+
+    return amount + 20 - (amount - 10000) ** 2 / 10 ** 7
+
+
+def run_contract_function(contract, function_name, args_list):
+    return int(swap_out(args_list[2] / 10 ** 6) * 10 ** 6)
+
+
+def test_optimal_swap_reports_its_break_even_range(monkeypatch):
+    monkeypatch.setattr(helpers.EvmContract, "run_contract_function", staticmethod(run_contract_function))
+
+    swap_ins, swap_outs, break_even = calculate_optimal_swap(FakeContract(), (1000, 50000), 6)
+
+    assert abs(swap_ins[0] - 10000) < 200
+    assert break_even[0] == 1000
+    assert abs(break_even[1] - 24142) < 100
+
+
+def test_break_even_range_is_alerted(monkeypatch):
+    messages = []
+    monkeypatch.setattr(helpers.EvmContract, "run_contract_function", staticmethod(run_contract_function))
+    monkeypatch.setattr(helpers.dispatcher, "submit", lambda message, **kwargs: messages.append(message))
+
+    assert check_arb(FakeContract(), (), 6, "USDC", 10, search_range=(1000, 50000)) > 10
+    assert len(messages) == 1
+    assert "-->Break-even: 1,000.00 - 24,1" in messages[0]
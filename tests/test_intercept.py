@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+
+from threading import Thread
+from http.server import (
+    ThreadingHTTPServer,
+    SimpleHTTPRequestHandler,
+)
+from urllib.parse import (
+    urlparse,
+    urljoin,
+    parse_qs,
+)
+
+import pytest
+import requests
+
+from selenium.common.exceptions import WebDriverException
+
+from src.hopbridge.web.intercept import intercept_hop
+
+
+HOP_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "hop_app")
+
+# Amounts the stand-in API fails to quote, in token precision
+FAILING_AMOUNTS = {str(4000 * 10 ** 6)}
+
+USDC_DATA = {"decimals": 6, "range": [1000, 3001, 1000], "min_arb": 10}
+
+
+class HopAppHandler(SimpleHTTPRequestHandler):
+    """Serves the stand-in app page and answers quotes with 0.1% less than the amount sent."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=HOP_APP_DIR, **kwargs)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/v1/quote":
+            return super().do_GET()
+
+        amount = parse_qs(url.query)['amount'][0]
+        if amount in FAILING_AMOUNTS:
+            self.send_error(500)
+            return None
+
+        with open(os.path.join(HOP_APP_DIR, "quote.json")) as file:
+            quote = json.load(file)
+        quote['amountIn'] = amount
+        quote['estimatedReceived'] = str(int(amount) - int(amount) // 1000)
+
+        body = json.dumps(quote).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeDriver:
+    """Chrome stand-in whose page fetches the quote of the amount in its url, reported as DevTools network events."""
+
+    def __init__(self):
+        self.events = []
+        self.bodies = {}
+        self.requests = 0
+
+    def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+        if cmd == "Network.getResponseBody":
+            return {"body": self.bodies[params['requestId']]}
+        return {}
+
+    def get(self, url: str) -> None:
+        try:
+            requests.get(url, timeout=5).raise_for_status()
+        except requests.RequestException as e:
+            raise WebDriverException(str(e))
+
+        # Same fetch as the stand-in page's script
+        route = parse_qs(urlparse(url).fragment.split("?")[-1])
+        if 'amount' not in route:
+            return None
+
+        self.requests += 1
+        request_id = str(self.requests)
+        response = requests.get(urljoin(url, "/v1/quote"), timeout=5, params={
+            "amount": str(int(route['amount'][0]) * 10 ** 6), "token": route['token'][0],
+            "fromChain": route['sourceNetwork'][0], "toChain": route['destNetwork'][0], "slippage": "0.5"})
+
+        self.event("Network.responseReceived", {"requestId": request_id,
+                                                "response": {"url": response.url, "status": response.status_code}})
+        self.event("Network.loadingFinished", {"requestId": request_id})
+        self.bodies[request_id] = response.text
+
+    def execute_script(self, script: str):
+        return "complete"
+
+    def get_log(self, log_type: str) -> list:
+        events, self.events = self.events, []
+        return events
+
+    def event(self, method: str, params: dict) -> None:
+        self.events.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+
+@pytest.fixture(scope="module")
+def hop_app():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HopAppHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def quote_stand_in(driver, hop_app: str, data: dict) -> dict or None:
+    return intercept_hop(driver, data, "ethereum", "gnosis", "USDC",
+                         app_url=f"{hop_app}/#/send?token=USDC&sourceNetwork=ethereum&destNetwork=gnosis",
+                         url_patterns=["/v1/quote"])
+
+
+def test_quotes_read_from_the_pages_own_responses(hop_app):
+    driver = FakeDriver()
+    all_arbs = quote_stand_in(driver, hop_app, USDC_DATA)
+
+    assert sorted(arb[2] for arb in all_arbs.values()) == [1000, 2000, 3000]
+    assert sorted(all_arbs) == [-3.0, -2.0, -1.0]
+    assert driver.requests == 3
+
+
+def test_fees_of_the_quote_are_alerted(hop_app):
+    all_arbs = quote_stand_in(FakeDriver(), hop_app, USDC_DATA)
+
+    assert "-->Fees: bonderFee 0.25 USDC" in all_arbs[-1.0][0]
+
+
+def test_route_skipped_when_an_amount_is_not_quoted(hop_app):
+    driver = FakeDriver()
+    data = {**USDC_DATA, "range": [3000, 6001, 1000]}
+
+    assert quote_stand_in(driver, hop_app, data) is None
+    assert driver.requests == 2
+
+
+def test_unreachable_page_is_not_queried(hop_app):
+    driver = FakeDriver()
+
+    assert intercept_hop(driver, USDC_DATA, app_url=f"{hop_app}/missing.html") is None
+    assert driver.requests == 0
+
+
+@pytest.mark.skipif(shutil.which("chromedriver") is None, reason="chromedriver not installed")
+def test_quotes_read_from_api_responses_in_chrome(hop_app):
+    from selenium.webdriver import (
+        Chrome,
+        ChromeOptions,
+    )
+
+    options = ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = Chrome(options=options)
+    try:
+        all_arbs = quote_stand_in(driver, hop_app, USDC_DATA)
+    finally:
+        driver.quit()
+
+    assert sorted(all_arbs) == [-3.0, -2.0, -1.0]
@@ -0,0 +1,80 @@
+import pytest
+
+from src.hopbridge.blockchain import logs
+from src.hopbridge.blockchain.logs import (
+    TRANSFER_TOPIC,
+    TOKEN_SWAP_TOPIC,
+    LogScanner,
+    address_topic,
+)
+
+
+TOKEN = "0x" + "11" * 20
+CONTRACT = "0x" + "22" * 20
+SWAP = "0x" + "33" * 20
+
+
+def transfer_log(block: int, index: int = 0) -> dict:
+    return {"topics": [TRANSFER_TOPIC, address_topic(CONTRACT), address_topic(TOKEN)],
+            "data": "0x" + f"{10 ** 6:064x}", "blockNumber": hex(block), "logIndex": hex(index),
+            "transactionHash": f"0x{block:064x}"}
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    monkeypatch.setattr(logs, "get_block_number", lambda endpoint, timeout: 110)
+
+    log_scanner = LogScanner("gnosis", "http://node", TOKEN, CONTRACT, "hUSDC", 6, initial_blocks=10)
+    monkeypatch.setattr(log_scanner, "get_logs", lambda start, end, timeout: [transfer_log(105)])
+
+    return log_scanner
+
+
+def test_scan_advances_after_decoding(scanner, monkeypatch):
+    monkeypatch.setattr(scanner, "get_timestamps", lambda blocks, timeout: {105: 1700000000})
+
+    txns = scanner.scan()
+
+    assert [txn.block_number for txn in txns] == [105]
+    assert txns[0].timestamp == 1700000000
+    assert scanner.block == 110
+
+
+def test_failed_timestamps_keep_the_range_for_the_next_scan(scanner, monkeypatch):
+    def fail(blocks, timeout):
+        raise ConnectionError("node down")
+
+    monkeypatch.setattr(scanner, "get_timestamps", fail)
+
+    with pytest.raises(ConnectionError):
+        scanner.scan()
+
+    assert scanner.block is None
+
+
+def swap_filter_address(scanner: LogScanner) -> str:
+    return next(log_filter['address'] for log_filter in scanner.log_filters()
+                if log_filter['topics'] == [TOKEN_SWAP_TOPIC])
+
+
+def test_token_swaps_are_filtered_on_the_wrappers_swap_contract(scanner, monkeypatch):
+    calls = []
+
+    def rpc_request(endpoint, method, params, timeout):
+        calls.append(params[0])
+        return address_topic(SWAP)
+
+    monkeypatch.setattr(logs, "rpc_request", rpc_request)
+
+    assert swap_filter_address(scanner) == SWAP
+    assert swap_filter_address(scanner) == SWAP
+    assert [call['to'] for call in calls] == [CONTRACT]
+
+
+def test_token_swaps_of_a_contract_that_is_not_a_wrapper(scanner, monkeypatch):
+    def rpc_request(endpoint, method, params, timeout):
+        raise ValueError("execution reverted")
+
+    monkeypatch.setattr(logs, "rpc_request", rpc_request)
+
+    assert swap_filter_address(scanner) == CONTRACT
@@ -0,0 +1,42 @@
+from src.hopbridge.web.price_query import quote_hop
+
+
+class FakeElement:
+
+    def is_displayed(self) -> bool:
+        return True
+
+    def is_enabled(self) -> bool:
+        return True
+
+
+class FakeDriver:
+    """Chrome stand-in whose quote script replies with the given field values."""
+
+    def __init__(self, quotes: list):
+        self.quotes = quotes
+
+    def get(self, url: str) -> None:
+        pass
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        return FakeElement()
+
+    def set_script_timeout(self, timeout: float) -> None:
+        pass
+
+    def execute_async_script(self, script: str, *args) -> dict:
+        return {"quotes": self.quotes}
+
+
+DATA = {"decimals": 6, "range": [1000, 2001, 1000], "min_arb": 10}
+
+
+def test_settled_quotes_are_recorded():
+    all_arbs = quote_hop(FakeDriver(["1,000.5", "2,001"]), DATA)
+
+    assert sorted(all_arbs) == [0.5, 1.0]
+
+
+def test_timed_out_quote_fails_the_route():
+    assert quote_hop(FakeDriver(["1,000.5", ""]), DATA) is None
@@ -0,0 +1,55 @@
+from time import sleep
+from threading import Thread
+from concurrent.futures import ThreadPoolExecutor
+
+from src.hopbridge.blockchain import providers
+from src.hopbridge.blockchain.providers import ProviderSet
+
+
+FAST = "https://fast.node"
+SLOW = "https://slow.node"
+
+
+def fake_send(latencies: dict, sent: list):
+    def send(endpoint: str, payload: dict) -> dict:
+        sent.append(endpoint)
+        sleep(latencies[endpoint])
+        return {"jsonrpc": "2.0", "id": 0, "result": endpoint}
+
+    return send
+
+
+def test_slow_primary_is_hedged():
+    provider_set = ProviderSet("gnosis", [SLOW, FAST], min_hedge_delay=0.05)
+    sent = []
+    provider_set.send = fake_send({SLOW: 1, FAST: 0}, sent)
+
+    assert provider_set.hedged([SLOW, FAST], {"method": "eth_call"})['result'] == FAST
+    assert sent == [SLOW, FAST]
+
+
+def test_concurrent_callers_do_not_trigger_hedges():
+    provider_set = ProviderSet("gnosis", [FAST, SLOW], min_hedge_delay=0.2, max_concurrency=16)
+    sent = []
+    provider_set.send = fake_send({FAST: 0.1, SLOW: 0.1}, sent)
+
+    with ThreadPoolExecutor(max_workers=16) as callers:
+        list(callers.map(lambda _: provider_set.hedged([FAST, SLOW], {"method": "eth_call"}), range(16)))
+
+    assert sent == [FAST] * 16
+
+
+def test_one_provider_set_per_network(monkeypatch):
+    monkeypatch.setattr(providers, "provider_sets", {})
+    created = []
+
+    def create(network: str):
+        created.append(providers.get_provider_set(network))
+
+    threads = [Thread(target=create, args=("Optimism",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(provider_set) for provider_set in created}) == 1
@@ -0,0 +1,128 @@
+import asyncio
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.hopbridge.blockchain import (
+    evm,
+    scheduler,
+)
+from src.hopbridge.blockchain.evm import EvmContract
+from src.hopbridge.blockchain.read_cache import ReadCache
+from src.hopbridge.blockchain.scheduler import BlockWatcher
+from src.hopbridge.blockchain.providers import create_web3
+from src.hopbridge.evm_scanner import async_engine
+from src.hopbridge.evm_scanner.async_engine import AsyncQuoteEngine
+
+
+class FakeW3:
+    """Web3 stand-in with no 'eth', so any head query fails the test."""
+
+    network = "gnosis"
+
+
+class FakeCall:
+
+    def __init__(self, contract: "FakeContract"):
+        self.contract = contract
+
+    def call(self, block_identifier="latest"):
+        self.contract.calls.append(block_identifier)
+        if block_identifier in self.contract.missing_blocks:
+            raise ValueError({"code": -32000, "message": "header not found"})
+        return 42
+
+
+class FakeAsyncCall(FakeCall):
+
+    async def call(self, block_identifier="latest"):
+        return FakeCall.call(self, block_identifier)
+
+
+class FakeContract:
+
+    address = "0x" + "33" * 20
+
+    def __init__(self, missing_blocks: tuple = ()):
+        self.w3 = FakeW3()
+        self.calls = []
+        self.missing_blocks = missing_blocks
+        self.functions = {"calculateSwap": lambda *args: FakeCall(self)}
+
+    def encodeABI(self, fn_name: str, args: list) -> str:
+        return f"0x{fn_name}{args}"
+
+
+class FakeEvmContract:
+    """EvmContract stand-in of the async engine."""
+
+    name = "gnosis"
+
+    def __init__(self, contract: FakeContract):
+        self.contract = contract
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    read_cache = ReadCache()
+    monkeypatch.setattr(evm, "read_cache", read_cache)
+    monkeypatch.setattr(scheduler, "read_cache", read_cache)
+    monkeypatch.setattr(async_engine, "read_cache", read_cache)
+    return read_cache
+
+
+def test_unknown_head_reads_latest_without_querying_it(cache):
+    contract = FakeContract()
+
+    assert EvmContract.run_contract_function(contract, "calculateSwap", [1, 0, 10]) == 42
+    assert contract.calls == ["latest"]
+    assert cache.metrics()['size'] == 0
+
+
+def test_known_head_pins_and_memoizes_reads(cache):
+    contract = FakeContract()
+    cache.advance("gnosis", 100)
+
+    for _ in range(2):
+        EvmContract.run_contract_function(contract, "calculateSwap", [1, 0, 10])
+
+    assert contract.calls == [100]
+
+
+def test_lagging_provider_falls_back_to_latest(cache):
+    contract = FakeContract(missing_blocks=(100,))
+    cache.advance("gnosis", 100)
+
+    assert EvmContract.run_contract_function(contract, "calculateSwap", [1, 0, 10]) == 42
+    assert contract.calls == [100, "latest"]
+    assert cache.metrics()['size'] == 0
+
+
+def test_async_engine_falls_back_to_latest_on_a_lagging_provider(cache):
+    contract = FakeContract(missing_blocks=(100,))
+    evm_contract = FakeEvmContract(contract)
+    cache.advance("gnosis", 100)
+
+    engine = AsyncQuoteEngine({"Gnosis": "https://rpc.ankr.com/gnosis"})
+    # Async twin of the contract, its calls are coroutines
+    calculate_swap = SimpleNamespace(calculateSwap=lambda *args: FakeAsyncCall(contract))
+    engine.contracts[("gnosis", contract.address)] = SimpleNamespace(functions=calculate_swap)
+
+    assert asyncio.run(engine.call_swap(evm_contract, [1, 0, 10], engine.get_head("gnosis"))) == 42
+    assert contract.calls == [100, "latest"]
+    assert cache.metrics()['size'] == 0
+
+
+def test_block_watcher_and_reads_share_network_keys(cache, monkeypatch):
+    monkeypatch.setattr(scheduler, "get_block_number", lambda endpoint, timeout: 200)
+    contract = FakeContract()
+
+    BlockWatcher({"Gnosis": "https://rpc.ankr.com/gnosis"}).poll()
+    EvmContract.run_contract_function(contract, "calculateSwap", [1, 0, 10])
+
+    assert contract.calls == [200]
+
+
+def test_web3_instances_carry_their_network():
+    assert create_web3("Gnosis", "https://rpc.ankr.com/gnosis").network == "gnosis"
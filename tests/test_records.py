@@ -0,0 +1,45 @@
+import json
+
+from src.hopbridge.blockchain.records import (
+    TxnRecord,
+    Erc20TxnRecord,
+    decode_response,
+)
+
+
+TXN = {"blockNumber": "100", "timeStamp": "1700000000", "hash": "0xabc", "nonce": "1", "from": "0xAAA",
+       "to": "0xBBB", "value": "5", "gas": "21000", "isError": "0", "input": "0x", "contractAddress": "",
+       "methodId": "0x", "functionName": "swap(uint8,uint8,uint256,uint256,uint256)"}
+
+TOKEN_TXN = {**TXN, "value": "2500000", "tokenSymbol": "USDC", "tokenDecimal": "6"}
+
+
+def response(*txns) -> str:
+    return json.dumps({"status": "1", "message": "OK", "result": list(txns)})
+
+
+def test_transactions_are_decoded_into_records():
+    result = decode_response(response(TXN))['result']
+
+    assert isinstance(result[0], TxnRecord)
+    assert (result[0]['blockNumber'], result[0]['from'], result[0]['value']) == (100, "0xaaa", 5)
+
+
+def test_token_transfers_are_decoded_into_erc20_records():
+    txn = decode_response(response(TOKEN_TXN), Erc20TxnRecord)['result'][0]
+
+    assert (txn['tokenSymbol'], txn.amount) == ("USDC", 2.5)
+
+
+def test_undecodable_transactions_are_left_as_dictionaries():
+    result = decode_response(response(TXN, {**TXN, "blockNumber": "pending"}))['result']
+
+    assert isinstance(result[0], TxnRecord)
+    assert result[1] == {**TXN, "blockNumber": "pending"}
+
+
+def test_unmapped_fields_are_not_kept():
+    txn = decode_response(response(TXN))['result'][0]
+
+    assert txn.get('isError') is None
+    assert "isError" not in TxnRecord.FIELDS
@@ -0,0 +1,30 @@
+from src.hopbridge.blockchain.seen import SeenTxns
+from src.hopbridge.blockchain.records import Erc20TxnRecord
+
+
+def txn(txn_hash: str, value: int = 1) -> dict:
+    return {"hash": txn_hash, "from": "0x1", "to": "0x2", "value": str(value)}
+
+
+def test_duplicates_within_a_batch_are_returned_once():
+    seen = SeenTxns()
+
+    assert seen.filter_new([txn("0xa"), txn("0xb"), txn("0xa")]) == [txn("0xa"), txn("0xb")]
+    assert seen.filter_new([txn("0xb"), txn("0xc")]) == [txn("0xc")]
+
+
+def test_every_transfer_of_one_transaction_is_returned():
+    seen = SeenTxns()
+    transfer, swap, repeated = (Erc20TxnRecord("0xa", 1, 0, "0x1", "0x2", 5, "hUSDC", 6, log_index)
+                                for log_index in (3, 4, 3))
+
+    assert seen.filter_new([txn("0xb", 1), txn("0xb", 2)]) == [txn("0xb", 1), txn("0xb", 2)]
+    assert seen.filter_new([transfer, swap, repeated]) == [transfer, swap]
+
+
+def test_evicted_hashes_are_remembered_by_the_bloom_filter():
+    seen = SeenTxns(max_size=2, bloom_capacity=100)
+    seen.filter_new([txn("0xa"), txn("0xb"), txn("0xc")])
+
+    assert len(seen) == 2
+    assert seen.filter_new([txn("0xa")]) == []
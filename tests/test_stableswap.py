@@ -0,0 +1,65 @@
+import os
+import json
+
+import pytest
+
+from src.hopbridge.evm_scanner.stableswap import (
+    FEE_DENOMINATOR,
+    StableSwapPool,
+)
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "stableswap_pools.json")
+
+with open(FIXTURES) as fixture_file:
+    RECORDED_POOLS = json.load(fixture_file)
+
+RECORDED_SWAPS = [(pool, swap) for pool in RECORDED_POOLS for swap in pool['swaps']]
+
+# Unbalanced pool, in whole tokens, so both directions and large swaps are covered
+BALANCES = (1534227, 1287001)
+
+SWAP_FEE = 4000000
+
+DXS = (1, 37, 10 ** 4, 10 ** 6, 123456789, 10 ** 12)
+
+
+@pytest.mark.parametrize("pool, swap", RECORDED_SWAPS or [(None, None)],
+                         ids=[f"{p['coin']}-{p['network']}-{s['token_from']}{s['token_to']}-{s['dx']}"
+                              for p, s in RECORDED_SWAPS] or ["no-fixtures"])
+def test_calculate_swap_matches_recorded_contract_output(pool, swap):
+    if pool is None:
+        pytest.skip("No recorded pools, run python3 -m tests.record_fixtures --pools with network access")
+
+    state = pool['pool']
+    replica = StableSwapPool(state['balances'], state['a_precise'], state['swap_fee'], state['multipliers'])
+
+    assert replica.calculate_swap(swap['token_from'], swap['token_to'], int(swap['dx'])) == int(swap['dy'])
+
+
+@pytest.mark.parametrize("token_from, token_to", [(0, 1), (1, 0)])
+@pytest.mark.parametrize("dx", DXS)
+def test_fee_rounds_down_like_swap_utils(token_from, token_to, dx):
+    balances = [balance * 10 ** 18 for balance in BALANCES]
+    dy = StableSwapPool(balances, 20000, 0, [1, 1]).calculate_swap(token_from, token_to, dx * 10 ** 6)
+
+    received = StableSwapPool(balances, 20000, SWAP_FEE, [1, 1]).calculate_swap(token_from, token_to, dx * 10 ** 6)
+
+    assert received == dy - dy * SWAP_FEE // FEE_DENOMINATOR
+
+
+@pytest.mark.parametrize("token_from, token_to", [(0, 1), (1, 0)])
+@pytest.mark.parametrize("dx", DXS)
+def test_six_decimal_pool_truncates_eighteen_decimal_result(token_from, token_to, dx):
+    pool_6 = StableSwapPool([balance * 10 ** 6 for balance in BALANCES], 20000, SWAP_FEE, [10 ** 12, 10 ** 12])
+    pool_18 = StableSwapPool([balance * 10 ** 18 for balance in BALANCES], 20000, SWAP_FEE, [1, 1])
+
+    assert pool_6.xp == pool_18.xp
+    assert pool_6.calculate_swap(token_from, token_to, dx) == \
+        pool_18.calculate_swap(token_from, token_to, dx * 10 ** 12) // 10 ** 12
+
+
+def test_calculate_swaps_matches_single_swaps():
+    pool = StableSwapPool([balance * 10 ** 6 for balance in BALANCES], 20000, SWAP_FEE, [10 ** 12, 10 ** 12])
+
+    assert pool.calculate_swaps(1, 0, DXS) == [pool.calculate_swap(1, 0, dx) for dx in DXS]
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+import websockets
+
+from src.hopbridge.blockchain import subscriptions
+from src.hopbridge.blockchain.logs import (
+    TRANSFER_TOPIC,
+    LogScanner,
+    address_topic,
+)
+from src.hopbridge.blockchain.subscriptions import SubscriptionEngine
+
+
+TOKEN = "0x" + "11" * 20
+CONTRACT = "0x" + "22" * 20
+
+
+class FakeSocket:
+    """Connection whose every reply is the given raw message."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def send(self, message: str) -> None:
+        pass
+
+    async def recv(self) -> str:
+        return self.reply
+
+
+def test_rejected_handshakes_and_bad_replies_reconnect_with_backoff(monkeypatch):
+    attempts = [websockets.InvalidHandshake("server rejected WebSocket connection: HTTP 429"),
+                FakeSocket('{"jsonrpc": "2.0", "id": 1}'), FakeSocket("not json")]
+    delays = []
+
+    def connect(*args, **kwargs):
+        attempt = attempts.pop(0)
+        if isinstance(attempt, Exception):
+            raise attempt
+        return attempt
+
+    async def sleep(delay):
+        delays.append(delay)
+        if not attempts:
+            raise asyncio.CancelledError
+
+    monkeypatch.setattr(subscriptions.websockets, "connect", connect)
+    monkeypatch.setattr(subscriptions.asyncio, "sleep", sleep)
+
+    engine = SubscriptionEngine("gnosis", "wss://node", [], lambda index, txns: None)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(engine.run())
+
+    assert delays == [1, 2, 4]
+
+
+def notification(subscription: str, result: dict) -> dict:
+    return {"method": "eth_subscription", "params": {"subscription": subscription, "result": result}}
+
+
+def test_only_processed_logs_move_the_scanner_cursor():
+    scanner = LogScanner("gnosis", "http://node", TOKEN, CONTRACT, "hUSDC", 6)
+    scanner.block = 100
+    received = []
+
+    engine = SubscriptionEngine("gnosis", "wss://node", [(0, scanner)], lambda index, txns: received.extend(txns))
+    engine.subscriptions = {"heads": None, "transfers": 0}
+
+    engine.handle(notification("heads", {"number": hex(103), "timestamp": hex(1700000000)}))
+    assert scanner.block == 100
+
+    engine.handle(notification("transfers", {
+        "topics": [TRANSFER_TOPIC, address_topic(CONTRACT), address_topic(TOKEN)], "data": "0x" + f"{10 ** 6:064x}",
+        "blockNumber": hex(102), "logIndex": "0x0", "transactionHash": f"0x{102:064x}"}))
+
+    assert [txn.block_number for txn in received] == [102]
+    assert scanner.block == 102